@@ -2,7 +2,11 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
-from database import users_col, ledger_col
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from database import users_col, upsert_one
+from ledger import record_entry
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -38,9 +42,7 @@ def _user_response(user: dict) -> dict:
 
 
 @router.post("/register")
-def register(req: RegisterRequest):
-    if users_col.find_one({"email": req.email}):
-        raise HTTPException(status_code=400, detail="Email already registered")
+async def register(req: RegisterRequest):
     doc = {
         "email": req.email,
         "password": req.password,
@@ -48,8 +50,11 @@ def register(req: RegisterRequest):
         "provider": "email",
         "created_at": datetime.utcnow(),
     }
-    result = users_col.insert_one(doc)
-    ledger_col.insert_one({
+    try:
+        result = await users_col.insert_one(doc)  # unique email index rejects duplicates
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await record_entry({
         "user_email": req.email,
         "type": "credit",
         "amount": 0,
@@ -60,30 +65,31 @@ def register(req: RegisterRequest):
 
 
 @router.post("/login")
-def login(req: LoginRequest):
-    user = users_col.find_one({"email": req.email, "password": req.password})
+async def login(req: LoginRequest):
+    user = await users_col.find_one({"email": req.email, "password": req.password})
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return {"message": "Login successful", **_user_response(user)}
 
 
 @router.post("/google")
-def google_auth(req: GoogleAuthRequest):
-    user = users_col.find_one({"email": req.email})
+async def google_auth(req: GoogleAuthRequest):
+    # One atomic upsert: returns the existing user, or None when this call created it.
+    doc = {
+        "_id": ObjectId(),
+        "name": req.name,
+        "picture": req.picture,
+        "google_id": req.google_id,
+        "password": f"google_{req.google_id}",
+        "role": "user",
+        "provider": "google",
+        "created_at": datetime.utcnow(),
+    }
+    user = await upsert_one(users_col, {"email": req.email}, {"$setOnInsert": doc},
+                            return_document=ReturnDocument.BEFORE)
     if not user:
-        doc = {
-            "email": req.email,
-            "name": req.name,
-            "picture": req.picture,
-            "google_id": req.google_id,
-            "password": f"google_{req.google_id}",
-            "role": "user",
-            "provider": "google",
-            "created_at": datetime.utcnow(),
-        }
-        result = users_col.insert_one(doc)
-        user = {**doc, "_id": result.inserted_id}
-        ledger_col.insert_one({
+        user = {**doc, "email": req.email}
+        await record_entry({
             "user_email": req.email,
             "type": "credit",
             "amount": 0,
@@ -0,0 +1,111 @@
+"""
+N workers racing to claim M open jobs.
+Drives the app in-process (httpx ASGI transport) against a real MongoDB. Every
+worker walks the jobs in its own random order and POSTs /accept for each one it
+doesn't know is taken; like a polled feed, its view of taken jobs is only
+refreshed every --refresh attempts, so workers really do collide. Reports claims/s, the 200/409 split and latency,
+then checks that every job ended up assigned exactly once, to the worker whose
+request got the 200.
+
+Run (from backend/; point MONGO_DB at a scratch database):
+    MONGO_DB=equibridge_bench python -m bench.claims --workers 200 --jobs 2000
+    MONGO_DB=equibridge_bench python -m bench.claims --target disability
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import datetime
+
+import httpx
+from bson import ObjectId
+
+from bench.load import percentile
+import main
+from database import work_listings_col, disability_jobs_col
+
+TARGETS = {
+    "daily": (work_listings_col, "/daily/accept"),
+    "disability": (disability_jobs_col, "/disability/accept"),
+}
+
+
+async def _fixtures(col, m: int) -> list:
+    now = datetime.utcnow()
+    result = await col.insert_many([
+        {"title": f"Bench job {i}", "company": "Bench", "pay": 100, "status": "open", "accepted_by": None,
+         "created_at": now}
+        for i in range(m)
+    ])
+    return [str(i) for i in result.inserted_ids]
+
+
+async def _worker(http, path: str, email: str, jobs: list, taken: set, winners: dict, stats: dict, refresh: int):
+    mine = list(jobs)
+    random.shuffle(mine)
+    known, attempts = set(), 0
+    for job_id in mine:
+        if attempts % refresh == 0:
+            known = set(taken)  # poll the feed
+        if job_id in known:
+            continue
+        attempts += 1
+        start = time.perf_counter()
+        resp = await http.post(path, json={"user_email": email, "job_id": job_id})
+        stats["latency"].append((time.perf_counter() - start) * 1000)
+        stats["status"][resp.status_code] += 1
+        if resp.status_code == 200:
+            winners.setdefault(job_id, []).append(email)
+        taken.add(job_id)
+        known.add(job_id)
+
+
+async def run(target: str, n: int, m: int, refresh: int = 10):
+    col, path = TARGETS[target]
+    await main.startup()
+    jobs = await _fixtures(col, m)
+    taken, winners = set(), {}
+    stats = {"latency": [], "status": Counter()}
+
+    transport = httpx.ASGITransport(app=main.app)
+    limits = httpx.Limits(max_connections=n)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(http, path, f"bench-claim-{i}@equibridge.test", jobs, taken, winners, stats, refresh)
+            for i in range(n)
+        ))
+        elapsed = time.perf_counter() - started
+
+    # Exactly-once: one 200 per job, and the stored assignee is that winner
+    stored = {
+        str(d["_id"]): (d.get("status"), d.get("accepted_by"))
+        async for d in col.find({"_id": {"$in": [ObjectId(j) for j in jobs]}}, {"status": 1, "accepted_by": 1})
+    }
+    double = [j for j, w in winners.items() if len(w) > 1]
+    unclaimed = [j for j in jobs if j not in winners]
+    mismatched = [j for j, w in winners.items() if stored.get(j) != ("in_progress", w[0])]
+
+    attempts = sum(stats["status"].values())
+    print(f"{n} workers, {m} jobs on {path}: {attempts} attempts in {elapsed:.2f}s")
+    print(f"claims/s:   {len(winners) / elapsed:,.0f}   attempts/s: {attempts / elapsed:,.0f}")
+    print(f"responses:  {dict(stats['status'])}")
+    print(f"latency ms: p50 {percentile(stats['latency'], 50):.2f}  p99 {percentile(stats['latency'], 99):.2f}")
+    ok = not (double or unclaimed or mismatched)
+    print(f"{'✅' if ok else '❌'} exactly-once: {len(double)} double-claimed, {len(unclaimed)} unclaimed, "
+          f"{len(mismatched)} stored assignee mismatches")
+
+    await col.delete_many({"_id": {"$in": [ObjectId(j) for j in jobs]}})
+    await main.shutdown()
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=sorted(TARGETS), default="daily")
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--refresh", type=int, default=10, help="attempts between feed polls")
+    args = parser.parse_args()
+    raise SystemExit(0 if asyncio.run(run(args.target, args.workers, args.jobs, args.refresh)) else 1)
@@ -0,0 +1,79 @@
+"""
+Throughput of the in-memory dispatch engine on synthetic city-scale data.
+Scatters workers and listings over a Bangalore-sized box (a share of them with
+only a locality), builds the indexes, then matches listings in dispatcher-sized
+batches on one core. No database involved; the Mongo side of a run is one
+insert_many plus one bulk_write per batch.
+
+Run (from backend/):
+    python -m bench.dispatch --workers 100000 --listings 200000
+"""
+import argparse
+import random
+import time
+
+from bench.load import percentile
+from dispatch import BATCH_SIZE, DispatchEngine
+
+# Rough bounding box of Bangalore
+LAT_RANGE = (12.83, 13.14)
+LNG_RANGE = (77.46, 77.78)
+TYPES = ["Plumbing", "Electrical", "Carpentry", "Painting", "Cleaning", "Cooking", "Delivery", "Tailoring",
+         "Gardening", "General Labor", ""]
+LOCALITIES = [f"area {i}" for i in range(200)]
+
+
+def _place(rng: random.Random, geo_share: float) -> dict:
+    if rng.random() < geo_share:
+        return {"lat": rng.uniform(*LAT_RANGE), "lng": rng.uniform(*LNG_RANGE), "locality": ""}
+    return {"lat": None, "lng": None, "locality": rng.choice(LOCALITIES)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=100_000)
+    parser.add_argument("--listings", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--radius-km", type=float, default=3.0)
+    parser.add_argument("--geo-share", type=float, default=0.9, help="fraction of records with coordinates")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = DispatchEngine(radius_km=args.radius_km)
+
+    started = time.perf_counter()
+    for i in range(args.workers):
+        engine.upsert_worker(f"w{i}@bench", rng.choice(TYPES), **_place(rng, args.geo_share))
+    build_s = time.perf_counter() - started
+
+    listings = [
+        {"id": i, "user_email": f"poster{i}@bench", "problem_type": rng.choice(TYPES[:-2]), **_place(rng, args.geo_share)}
+        for i in range(args.listings)
+    ]
+
+    # Incremental refresh: re-register 1% of workers with a new position
+    started = time.perf_counter()
+    for i in rng.sample(range(args.workers), max(1, args.workers // 100)):
+        engine.upsert_worker(f"w{i}@bench", rng.choice(TYPES), **_place(rng, args.geo_share))
+    refresh_s = time.perf_counter() - started
+
+    batch_ms, offers = [], 0
+    started = time.perf_counter()
+    for i in range(0, len(listings), args.batch_size):
+        t0 = time.perf_counter()
+        offers += len(engine.match(listings[i:i + args.batch_size]))
+        batch_ms.append((time.perf_counter() - t0) * 1000)
+    match_s = time.perf_counter() - started
+
+    unmatched = args.listings * engine.offers - offers
+    print(f"workers:   {args.workers:,} indexed in {build_s:.2f}s ({engine.snapshot()})")
+    print(f"refresh:   {max(1, args.workers // 100):,} workers moved in {refresh_s * 1000:.1f}ms")
+    print(f"listings:  {args.listings:,} matched in {match_s:.2f}s -> {args.listings / match_s:,.0f} listings/s")
+    print(f"offers:    {offers:,} ({unmatched:,} slots unfilled)")
+    print(f"batch ms:  p50 {percentile(batch_ms, 50):.1f}  p99 {percentile(batch_ms, 99):.1f}  "
+          f"(batch of {args.batch_size})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Memory and fan-out cost of the job feed with many idle subscribers.
+Parks N subscriber coroutines on the in-process feed (what each SSE/WebSocket
+connection holds while idle), reports the traced memory per subscriber, then
+publishes events and measures how long it takes until every matching subscriber
+has picked its copy up. Sockets and HTTP framing are not included.
+
+Run (from backend/):
+    python -m bench.feed --subscribers 10000 --events 200
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from bench.load import percentile
+from feed import job_feed
+import daily_worker  # noqa: F401  registers the "daily" channel
+
+TYPES = ["Plumbing", "Electrical", "Carpentry", "Painting", "Cleaning", "Cooking", "Delivery", "Tailoring"]
+LOCALITIES = [f"area {i}" for i in range(50)]
+
+
+async def _idle(sub, received: list, heartbeat: float):
+    try:
+        while True:
+            item = await sub.next(heartbeat)
+            if item is not None:
+                received.append(time.perf_counter())
+    finally:
+        job_feed.unsubscribe(sub)
+
+
+async def run(n: int, events: int, heartbeat: float):
+    rng = random.Random(7)
+    received = []
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = []
+    for i in range(n):
+        # A third unfiltered, a third by problem type, a third by locality
+        filters = [{}, {"problem_type": rng.choice(TYPES)}, {"locality": rng.choice(LOCALITIES)}][i % 3]
+        sub = job_feed.subscribe("daily", **filters)
+        tasks.append(asyncio.create_task(_idle(sub, received, heartbeat)))
+    await asyncio.sleep(0.1)  # let every coroutine park on its wait
+    after = tracemalloc.take_snapshot()
+    grown = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+    print(f"subscribers: {job_feed.subscribers:,} idle, {grown / 1024 / 1024:.1f} MiB traced "
+          f"({grown / n:,.0f} B each, including the parked task)")
+
+    fanout_ms, delivered = [], 0
+    for i in range(events):
+        doc = {"_id": i, "title": "Bench", "status": "open", "problem_type": rng.choice(TYPES),
+               "locality": rng.choice(LOCALITIES)}
+        received.clear()
+        start = time.perf_counter()
+        expected = job_feed.publish("daily", "created", doc)
+        while len(received) < expected:  # yield until every woken subscriber has its copy
+            await asyncio.sleep(0)
+        fanout_ms.append((time.perf_counter() - start) * 1000)
+        delivered += len(received)
+
+    print(f"events:      {events} published, {delivered / events:,.0f} deliveries per event on average")
+    print(f"fan-out ms:  p50 {percentile(fanout_ms, 50):.2f}  p99 {percentile(fanout_ms, 99):.2f}")
+
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--heartbeat", type=float, default=15.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.events, args.heartbeat))
@@ -0,0 +1,108 @@
+"""
+Cost of grading a cohort in one /student/quiz/grade-batch call.
+Builds N synthetic answer sheets for one field and month and times the stages of
+the endpoint in-process: request validation, the array grader, a per-sheet
+Python loop for comparison, and building the bulk_write. With --http it also
+sends the whole batch through the app (httpx ASGI transport) against a real
+MongoDB with N fixture students, so the attempt insert_many and the summary
+bulk_write are included.
+
+Run (from backend/):
+    python -m bench.grading --submissions 100000
+    MONGO_DB=equibridge_bench python -m bench.grading --submissions 100000 --http --calls 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+
+from bench.load import percentile
+from curriculum import grade
+from student import BatchGradeRequest, _quiz_result
+
+KEY = (1, 1, 1, 2, 1)
+FIELD, MONTH = "Scientist", 1
+
+
+def _body(n: int, rng: random.Random) -> bytes:
+    submissions = [
+        {"user_email": f"bench-grade-{i}@equibridge.test",
+         "answers": [a if rng.random() < 0.7 else rng.randint(0, 3) for a in KEY],
+         "task_submission": "https://example.com/task" if i % 4 else ""}
+        for i in range(n)
+    ]
+    return json.dumps({"field": FIELD, "month": MONTH, "submissions": submissions}).encode()
+
+
+def _timed(fn, runs: int) -> tuple:
+    samples, out = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return out, samples
+
+
+def stages(body: bytes, runs: int):
+    req, parse_ms = _timed(lambda: BatchGradeRequest.model_validate_json(body), runs)
+    sheets = [s.answers for s in req.submissions]
+    scores, grade_ms = _timed(lambda: grade(KEY, sheets), runs)
+    loop, loop_ms = _timed(lambda: [sum(1 for i, a in enumerate(s) if i < len(KEY) and a == KEY[i]) for s in sheets],
+                           runs)
+    assert list(scores) == loop
+
+    def ops():
+        now = datetime.utcnow().isoformat()
+        return [{"user_email": s.user_email, "result": _quiz_result(MONTH, "t", scores[i], len(KEY), s.task_submission, now)}
+                for i, s in enumerate(req.submissions)]
+    _, ops_ms = _timed(ops, runs)
+
+    print(f"sheets:       {len(sheets):,} ({len(body) / 1024 / 1024:.1f} MiB request)")
+    for name, samples in (("validate", parse_ms), ("grade (array)", grade_ms), ("grade (loop)", loop_ms),
+                          ("build results", ops_ms)):
+        print(f"{name:<14} p50 {percentile(samples, 50):8.1f} ms  max {max(samples):8.1f} ms")
+
+
+async def http(body: bytes, n: int, calls: int):
+    import httpx
+    import main
+    from database import students_col
+
+    await main.startup()
+    emails = [f"bench-grade-{i}@equibridge.test" for i in range(n)]
+    await students_col.delete_many({"user_email": {"$in": emails}})
+    await students_col.insert_many([{"user_email": e, "name": "Bench", "field_of_interest": FIELD} for e in emails])
+
+    latency = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for _ in range(calls):
+            started = time.perf_counter()
+            resp = await client.post("/student/quiz/grade-batch", content=body,
+                                     headers={"content-type": "application/json"})
+            latency.append((time.perf_counter() - started) * 1000)
+            resp.raise_for_status()
+            out = resp.json()
+    print(f"end to end:   {calls} calls, stored {out['stored']:,} of {out['graded']:,}")
+    print(f"call ms:      p50 {percentile(latency, 50):.0f}  max {max(latency):.0f}  "
+          f"({n / (percentile(latency, 50) / 1000):,.0f} submissions/s)")
+
+    await students_col.delete_many({"user_email": {"$in": emails}})
+    await main.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5, help="repetitions of each in-process stage")
+    parser.add_argument("--http", action="store_true", help="also run the endpoint against MongoDB")
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    payload = _body(args.submissions, random.Random(args.seed))
+    stages(payload, args.runs)
+    if args.http:
+        asyncio.run(http(payload, args.submissions, args.calls))
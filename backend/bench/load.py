@@ -0,0 +1,113 @@
+"""
+HTTP load generator for the EquiBridge API.
+Opens N concurrent keep-alive clients against a running backend and reports
+requests/s plus p50/p99 latency per endpoint. Run it once on the old sync build
+and once on the current build to compare.
+
+Run (from backend/, with the API up on :8000):
+    python -m bench.load --concurrency 200 --duration 30
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+BENCH_USERS = 50
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+# ── Scenario: /daily/work polling mixed with profile reads and payouts ────────
+# (weight, method, path template, json body template)
+SCENARIO = [
+    (6, "GET", "/daily/work", None),
+    (2, "GET", "/daily/me/{email}", None),
+    (1, "GET", "/ledger/{email}", None),
+    (1, "POST", "/daily/withdraw", {"user_email": "{email}", "amount": 1}),
+]
+
+
+def _pick(weighted):
+    total = sum(w for w, *_ in weighted)
+    r = random.uniform(0, total)
+    for item in weighted:
+        r -= item[0]
+        if r <= 0:
+            return item
+    return weighted[-1]
+
+
+def _fill(value, email):
+    if isinstance(value, str):
+        return value.format(email=email)
+    if isinstance(value, dict):
+        return {k: _fill(v, email) for k, v in value.items()}
+    return value
+
+
+async def _prepare(http: httpx.AsyncClient) -> list:
+    emails = [f"bench-{i}@equibridge.test" for i in range(BENCH_USERS)]
+    for email in emails:
+        await http.post("/daily/register", json={
+            "user_email": email, "name": "Bench", "location": "Koramangala, Bangalore",
+        })
+    return emails
+
+
+async def _client(http, emails, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        _, method, path, body = _pick(SCENARIO)
+        email = random.choice(emails)
+        url = _fill(path, email)
+        start = time.perf_counter()
+        try:
+            resp = await http.request(method, url, json=_fill(body, email))
+            ok = resp.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        latencies[path].append(elapsed)
+        if not ok:
+            errors[path] += 1
+
+
+async def run(base_url: str, concurrency: int, duration: float):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as http:
+        emails = await _prepare(http)
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            _client(http, emails, deadline, latencies, errors) for _ in range(concurrency)
+        ])
+        wall = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    every = [x for v in latencies.values() for x in v]
+    print(f"concurrency={concurrency} duration={wall:.1f}s requests={total}")
+    print(f"{'endpoint':<24}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for path, samples in sorted(latencies.items()):
+        print(f"{path:<24}{len(samples) / wall:>10.1f}{percentile(samples, 50):>10.1f}"
+              f"{percentile(samples, 99):>10.1f}{errors[path]:>8}")
+    print(f"{'TOTAL':<24}{total / wall:>10.1f}{percentile(every, 50):>10.1f}"
+          f"{percentile(every, 99):>10.1f}{sum(errors.values()):>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.duration))
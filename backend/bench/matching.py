@@ -0,0 +1,69 @@
+"""
+Query latency of the disability job index at 1M open jobs.
+Builds the in-memory index from synthetic jobs (professions and skills drawn
+with a skewed popularity), then times top-k pages for random users: first pages,
+deep pages and users whose profession has no openings. No database involved.
+
+Run (from backend/):
+    python -m bench.matching --jobs 1000000 --queries 2000
+"""
+import argparse
+import random
+import time
+
+from bench.load import percentile
+from job_index import JobIndex
+
+
+def _vocab(prefix: str, n: int) -> list:
+    return [f"{prefix} {i}" for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--professions", type=int, default=40)
+    parser.add_argument("--skills", type=int, default=400)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    professions, skills = _vocab("profession", args.professions), _vocab("skill", args.skills)
+    # Zipf-ish popularity so a few professions and skills dominate, as in real listings
+    prof_w = [1 / (i + 1) for i in range(len(professions))]
+    skill_w = [1 / (i + 1) ** 0.8 for i in range(len(skills))]
+
+    index = JobIndex()
+    started = time.perf_counter()
+    for i in range(args.jobs):
+        index.add(i, rng.choices(professions, prof_w)[0], rng.choices(skills, skill_w, k=rng.randint(2, 5)))
+    print(f"index:   {len(index):,} jobs built in {time.perf_counter() - started:.1f}s")
+
+    scenarios = {
+        "page 1": lambda: 0,
+        "page 10": lambda: 9 * args.limit,
+    }
+    for name, offset in scenarios.items():
+        timings = []
+        for _ in range(args.queries):
+            profession = rng.choices(professions, prof_w)[0]
+            user_skills = rng.choices(skills, skill_w, k=rng.randint(3, 6))
+            t0 = time.perf_counter()
+            page = index.top(profession, user_skills, offset=offset(), limit=args.limit)
+            timings.append((time.perf_counter() - t0) * 1000)
+            assert len(page) == args.limit
+        print(f"{name:<22} p50 {percentile(timings, 50):6.2f} ms  p99 {percentile(timings, 99):6.2f} ms")
+
+    timings = []
+    for _ in range(args.queries):
+        user_skills = rng.choices(skills, skill_w, k=rng.randint(3, 6))
+        t0 = time.perf_counter()
+        index.top("no openings", user_skills, limit=args.limit)
+        timings.append((time.perf_counter() - t0) * 1000)
+    print(f"{'no profession match':<22} p50 {percentile(timings, 50):6.2f} ms  p99 {percentile(timings, 99):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Round trips and latency for the money-moving endpoints.
+Drives the app in-process (httpx ASGI transport) against a real MongoDB and
+counts the commands each request sends to the server. Ledger writes go through
+the write-behind queue and are flushed off the request path, so they are not
+counted.
+
+Run (from backend/; point MONGO_DB at a scratch database):
+    MONGO_DB=equibridge_bench python -m bench.money --requests 500
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+from pymongo import monitoring
+
+from bench.load import percentile
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event): pass
+    def failed(self, event): pass
+
+
+counter = CommandCounter()
+monitoring.register(counter)  # must precede the (lazy) client creation
+
+import main  # noqa: E402
+from database import daily_workers_col, work_listings_col, disability_users_col, disability_jobs_col  # noqa: E402
+
+EMAIL = "bench-money@equibridge.test"
+
+
+async def _fixtures(n: int) -> dict:
+    now = datetime.utcnow()
+    await daily_workers_col.update_one(
+        {"user_email": EMAIL},
+        {"$set": {"name": "Bench", "location": "Bench", "balance": 10_000_000.0, "total_earned": 0.0,
+                  "invested_amount": 0.0, "auto_invest": False, "created_at": now}},
+        upsert=True,
+    )
+    await disability_users_col.update_one(
+        {"user_email": EMAIL}, {"$set": {"name": "Bench", "total_earnings": 0.0}}, upsert=True,
+    )
+    work = await work_listings_col.insert_many([
+        {"title": "Bench job", "pay": 100, "status": "in_progress", "accepted_by": EMAIL, "created_at": now}
+        for _ in range(n)
+    ])
+    jobs = await disability_jobs_col.insert_many([
+        {"title": "Bench job", "company": "Bench", "pay": 100, "status": "completed", "accepted_by": EMAIL,
+         "created_at": now}
+        for _ in range(n)
+    ])
+    return {"work": [str(i) for i in work.inserted_ids], "jobs": [str(i) for i in jobs.inserted_ids]}
+
+
+def _by_user(i):
+    return {"user_email": EMAIL}
+
+
+async def _measure(http, name, n, make_body, path):
+    latencies, trips = [], []
+    for i in range(n):
+        before = counter.count
+        start = time.perf_counter()
+        resp = await http.post(path, json=make_body(i))
+        latencies.append((time.perf_counter() - start) * 1000)
+        trips.append(counter.count - before)
+        if resp.status_code != 200:
+            print(f"  {name}: HTTP {resp.status_code} {resp.text[:120]}")
+            break
+    print(f"{name:<22}{sum(trips) / len(trips):>12.2f}{percentile(latencies, 50):>10.2f}"
+          f"{percentile(latencies, 99):>10.2f}")
+
+
+async def run(n: int):
+    await main.startup()
+    ids = await _fixtures(n)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        print(f"{'endpoint':<22}{'round trips':>12}{'p50 ms':>10}{'p99 ms':>10}")
+        await _measure(http, "/investment/invest", n, _by_user, "/investment/invest")
+        await _measure(http, "/investment/recover", 1, _by_user, "/investment/recover")
+        await _measure(http, "/daily/withdraw", n, lambda i: {"user_email": EMAIL, "amount": 1}, "/daily/withdraw")
+        await _measure(http, "/daily/complete", n,
+                       lambda i: {"user_email": EMAIL, "job_id": ids["work"][i]}, "/daily/complete")
+        await _measure(http, "/disability/approve", n,
+                       lambda i: {"user_email": EMAIL, "job_id": ids["jobs"][i]}, "/disability/approve")
+    await main.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    asyncio.run(run(parser.parse_args().requests))
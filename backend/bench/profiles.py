@@ -0,0 +1,119 @@
+"""
+Bytes and latency of the profile reads with and without sparse fieldsets.
+Seeds one student, one daily worker and one disability user shaped like older
+accounts (inline data-URL photo and ID proof, a year of quiz summaries, completed
+jobs awaiting approval), then reads each profile endpoint in-process (httpx ASGI
+transport) two ways: with every field it can serve, as the endpoints returned
+before `fields=` existed, and with its lean default.
+
+Run (from backend/, against a scratch database):
+    MONGO_DB=equibridge_bench python -m bench.profiles --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import base64
+import os
+import time
+from datetime import datetime
+
+import httpx
+
+import main
+from bench.load import percentile
+from daily_worker import REVENUE_FIELDS as WORKER_REVENUE_FIELDS, WORKER_FIELDS
+from database import daily_workers_col, disability_jobs_col, disability_users_col, students_col
+from disability import REVENUE_FIELDS as DISABILITY_REVENUE_FIELDS
+from student import STUDENT_FIELDS
+
+EMAIL = "bench-profile@equibridge.test"
+INLINE_KB = 96  # typical phone photo uploaded before the media store
+
+
+def _data_url(kb: int) -> str:
+    return "data:image/jpeg;base64," + base64.b64encode(os.urandom(kb * 1024)).decode()
+
+
+async def _fixtures(jobs: int):
+    now = datetime.utcnow()
+    await students_col.insert_one({
+        "user_email": EMAIL, "name": "Bench", "age": 21, "document_id": "AADHAAR-1234-5678-9012",
+        "field_of_interest": "Scientist", "selected_org": "ISRO", "completed_steps": [1, 2, 3],
+        "total_funding_received": 45000, "progress_pct": 60, "job_placed": False, "salary": 50000,
+        "repayment_paid": 0, "months_repaid": 0, "created_at": now,
+        "quiz_results": {f"month_{m}": {
+            "month": m, "topic": "Physics Foundations", "score": 4, "total": 5, "pct_score": 80, "passed": True,
+            "task_submitted": True, "submitted_at": now.isoformat(), "attempts": 2,
+        } for m in range(1, 13)},
+    })
+    await daily_workers_col.insert_one({
+        "user_email": EMAIL, "name": "Bench", "location": "Koramangala", "locality": "koramangala",
+        "problem_type": "Plumbing", "photo_id": "", "photo_url": _data_url(INLINE_KB),
+        "geo": {"type": "Point", "coordinates": [77.62, 12.93]}, "last_seen": now,
+        "balance": 1200.0, "total_earned": 5400.0, "invested_amount": 800.0, "auto_invest": True, "created_at": now,
+    })
+    await disability_users_col.insert_one({
+        "user_email": EMAIL, "name": "Bench", "profession": "Tailor", "disability_type": "Visual",
+        "skills": ["stitching", "embroidery"], "id_proof": _data_url(INLINE_KB), "total_earnings": 3000.0,
+        "created_at": now,
+    })
+    await disability_jobs_col.insert_many([
+        {"title": f"Bench job {i}", "description": "x" * 400, "pay": 500, "accepted_by": EMAIL,
+         "status": "completed", "created_at": now} for i in range(jobs)
+    ])
+
+
+async def _cleanup():
+    for col in (students_col, daily_workers_col, disability_users_col):
+        await col.delete_many({"user_email": EMAIL})
+    await disability_jobs_col.delete_many({"accepted_by": EMAIL})
+
+
+async def _measure(http, path: str, params: dict, requests: int, concurrency: int) -> tuple:
+    latency, size = [], 0
+
+    async def client(count: int):
+        nonlocal size
+        for _ in range(count):
+            started = time.perf_counter()
+            resp = await http.get(path, params=params)
+            latency.append((time.perf_counter() - started) * 1000)
+            resp.raise_for_status()
+            size = len(resp.content)
+
+    await asyncio.gather(*(client(requests // concurrency) for _ in range(concurrency)))
+    return size, latency
+
+
+async def run(requests: int, concurrency: int, jobs: int):
+    await main.startup()
+    await _cleanup()
+    await _fixtures(jobs)
+    endpoints = [
+        ("/student/me/{}", STUDENT_FIELDS),
+        ("/daily/me/{}", WORKER_FIELDS),
+        ("/daily/revenue/{}", WORKER_REVENUE_FIELDS),
+        ("/disability/revenue/{}", DISABILITY_REVENUE_FIELDS),
+    ]
+    transport = httpx.ASGITransport(app=main.app)
+    limits = httpx.Limits(max_connections=concurrency)
+    print(f"{'endpoint':<24}{'fields':<9}{'bytes':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as http:
+            for template, fieldset in endpoints:
+                path = template.format(EMAIL)
+                for label, params in (("all", {"fields": ",".join(sorted(fieldset.allowed))}), ("default", {})):
+                    size, latency = await _measure(http, path, params, requests, concurrency)
+                    print(f"{template.format(''):<24}{label:<9}{size:>10,}"
+                          f"{percentile(latency, 50):>9.2f}{percentile(latency, 99):>9.2f}")
+    finally:
+        await _cleanup()
+        await main.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="per endpoint and variant")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=50, help="completed jobs awaiting approval")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.jobs))
@@ -0,0 +1,109 @@
+"""
+Process-local cache of the organization catalog (orgs + roadmaps).
+
+The catalog is seeded and barely changes, so every worker keeps it in memory and
+serves /student/organizations, /student/pipeline and the roadmap lookups in
+update_progress/get_job_status without touching Mongo. A background task polls a
+single version document (meta._id == "catalog") and reloads when it moves.
+
+After editing organizations by hand, bump the version:
+    python catalog.py --bump
+"""
+import asyncio
+import os
+from pymongo import ReturnDocument
+from database import organizations_col, meta_col
+
+POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "5"))
+VERSION_ID = "catalog"
+
+
+class Catalog:
+    def __init__(self):
+        self.version = None
+        self.by_name = {}    # name -> full org (with roadmap), API-shaped
+        self.by_field = {}   # field -> [org summaries without roadmap]
+        self.summaries = []  # every org without roadmap
+        self.steps = {}      # name -> {step: {"title", "estimated_fee"}}
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    async def _current_version(self) -> int:
+        doc = await meta_col.find_one({"_id": VERSION_ID}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    async def load(self):
+        async with self._lock:
+            version = await self._current_version()
+            by_name, by_field, summaries, steps = {}, {}, [], {}
+            async for org in organizations_col.find({}):
+                org["id"] = str(org.pop("_id"))
+                summary = {k: v for k, v in org.items() if k != "roadmap"}
+                by_name[org["name"]] = org
+                by_field.setdefault(org.get("field", ""), []).append(summary)
+                summaries.append(summary)
+                steps[org["name"]] = {
+                    s["step"]: {"title": s["title"], "estimated_fee": s.get("estimated_fee", 0)}
+                    for s in org.get("roadmap", [])
+                }
+            # Swap whole structures so readers never see a half-built catalog
+            self.by_name, self.by_field, self.summaries, self.steps = by_name, by_field, summaries, steps
+            self.version = version
+
+    async def ensure_loaded(self):
+        if not self.loaded:
+            await self.load()
+
+    async def refresh_if_stale(self):
+        if await self._current_version() != self.version:
+            await self.load()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(POLL_SECONDS)
+            try:
+                await self.refresh_if_stale()
+            except Exception as e:
+                print(f"⚠️  Catalog refresh failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # ── Reads (zero DB calls once loaded) ──────────────────────────────────────
+    async def organizations(self, field: str = "") -> list:
+        await self.ensure_loaded()
+        return self.by_field.get(field, []) if field else self.summaries
+
+    async def org(self, name: str):
+        await self.ensure_loaded()
+        return self.by_name.get(name)
+
+    async def roadmap_steps(self, name: str) -> dict:
+        await self.ensure_loaded()
+        return self.steps.get(name, {})
+
+
+async def bump_catalog_version() -> int:
+    doc = await meta_col.find_one_and_update(
+        {"_id": VERSION_ID}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
+
+
+catalog = Catalog()
+
+
+if __name__ == "__main__":
+    import sys
+    if "--bump" in sys.argv:
+        print(f"✅ Catalog version is now {asyncio.run(bump_catalog_version())}")
@@ -1,9 +1,17 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
-from database import daily_workers_col, work_listings_col, ledger_col
+from pymongo import ReturnDocument
+from database import daily_workers_col, work_listings_col, offers_col, upsert_one
+from dispatch import dispatcher
+from fieldset import FIELDS_QUERY, Fieldset
+from feed import job_feed
+from geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, geo_near, normalize_locality, point
+from keyset import decode_cursor, encode_cursor
+from ledger import record_entry
+from media import resolve_media, with_media_urls, with_thumbnail_urls
 
 router = APIRouter(prefix="/daily", tags=["daily"])
 
@@ -13,15 +21,21 @@ class WorkerRegisterRequest(BaseModel):
     name: str
     location: str
     problem_type: str = ""
-    photo_url: str = ""
+    photo_id: str = ""      # from POST /media
+    photo_url: str = ""     # legacy: inline data URL or external link
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class WorkRequest(BaseModel):
     user_email: str
     location: str
     problem_type: str
-    photo_url: str
+    photo_id: str = ""
+    photo_url: str = ""
     description: Optional[str] = ""
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class AcceptJobRequest(BaseModel):
@@ -32,186 +46,376 @@ class AcceptJobRequest(BaseModel):
 class CompleteJobRequest(BaseModel):
     user_email: str
     job_id: str
+    completion_video_id: str = ""
     completion_video_url: str = ""
     ai_verified: bool = False
 
 
 class WithdrawRequest(BaseModel):
     user_email: str
-    amount: float
+    amount: float = Field(gt=0)
 
 
 class ToggleInvestRequest(BaseModel):
     user_email: str
 
 
+# ── List projections ───────────────────────────────────────────────────────────
+# Feeds only need a card's worth of fields; media is referenced by thumbnail.
+WORK_LIST_FIELDS = {
+    "title": 1, "pay": 1, "location": 1, "problem_type": 1, "category": 1,
+    "emoji": 1, "description": 1, "photo_id": 1, "photo_url": 1, "created_at": 1,
+}
+WORKER_LIST_FIELDS = {"name": 1, "location": 1, "problem_type": 1, "photo_id": 1, "photo_url": 1}
+
+# Profile reads (?fields=): the photo comes from photo_id as a /media URL; the stored
+# photo_url can be a legacy inline data URL and the point is the worker's location.
+WORKER_PROFILE = ("user_email", "name", "location", "problem_type", "photo_id", "created_at")
+WORKER_WALLET = ("balance", "total_earned", "invested_amount", "auto_invest")
+WORKER_OPT_IN = ("photo_url", "locality", "geo", "last_seen")
+WORKER_FIELDS = Fieldset(default=WORKER_PROFILE, opt_in=WORKER_WALLET + WORKER_OPT_IN)
+REVENUE_FIELDS = Fieldset(default=WORKER_WALLET, opt_in=WORKER_PROFILE + WORKER_OPT_IN)
+
+
+def _list_item(doc):
+    doc["id"] = str(doc.pop("_id"))
+    if "distance_m" in doc:
+        doc["distance_km"] = round(doc.pop("distance_m") / 1000, 2)
+    return with_thumbnail_urls(doc)
+
+
+def _card(doc):
+    return _list_item({k: doc[k] for k in ("_id", *WORK_LIST_FIELDS) if k in doc})
+
+
+job_feed.register_channel("daily", "work_listings", _card, filters=("problem_type", "locality"))
+
+
 @router.post("/post-problem")
-def post_problem(req: WorkRequest):
+async def post_problem(req: WorkRequest):
+    photo_id, photo_url = await resolve_media(req.photo_id, req.photo_url)
     doc = {
         "user_email": req.user_email,
         "location": req.location,
+        "locality": normalize_locality(req.location),
         "problem_type": req.problem_type,
-        "photo_url": req.photo_url,  # This is the "proof pic" of the problem
+        "photo_id": photo_id,  # This is the "proof pic" of the problem
+        "photo_url": photo_url,
         "description": req.description,
         "status": "open",
         "created_at": datetime.utcnow()
     }
-    result = work_listings_col.insert_one(doc)
-    doc["id"] = str(result.inserted_id)
-    doc.pop("_id", None)
-    return doc
+    if req.lat is not None and req.lng is not None:
+        doc["geo"] = point(req.lat, req.lng)
+    await work_listings_col.insert_one(doc)
+    dispatcher.notify()  # offer it to nearby workers on the next batch
+    job_feed.emit("daily", "created", doc)
+    return _sid(doc)
 
 
 def _sid(doc):
     if doc and "_id" in doc:
         doc["id"] = str(doc.pop("_id"))
-    return doc
+    return with_media_urls(doc)
 
 
-@router.post("/register")
-def register_worker(req: WorkerRegisterRequest):
-    existing = daily_workers_col.find_one({"user_email": req.user_email})
-    if existing:
-        # Update location and problem type on re-login
-        daily_workers_col.update_one(
-            {"user_email": req.user_email},
-            {"$set": {
-                "location": req.location,
-                "problem_type": req.problem_type,
-                "photo_url": req.photo_url,
-                "last_seen": datetime.utcnow(),
-            }}
-        )
-        updated = daily_workers_col.find_one({"user_email": req.user_email})
-        return _sid(updated)
+def _job_title(job: dict) -> str:
+    # Seeded listings have a title; problems posted by users only have a problem_type
+    return job.get("title") or job.get("problem_type") or "Job"
 
-    doc = {
-        "user_email": req.user_email,
-        "name": req.name,
+
+@router.post("/register")
+async def register_worker(req: WorkerRegisterRequest):
+    # Runs on every app open: refresh location/problem type, create the wallet only once.
+    photo_id, photo_url = await resolve_media(req.photo_id, req.photo_url)
+    now = datetime.utcnow()
+    fields = {
         "location": req.location,
+        "locality": normalize_locality(req.location),
         "problem_type": req.problem_type,
-        "photo_url": req.photo_url,
-        "balance": 0.0,
-        "total_earned": 0.0,
-        "invested_amount": 0.0,
-        "auto_invest": False,
-        "created_at": datetime.utcnow(),
-        "last_seen": datetime.utcnow(),
+        "photo_id": photo_id,
+        "photo_url": photo_url,
+        "last_seen": now,
     }
-    result = daily_workers_col.insert_one(doc)
-    doc["id"] = str(result.inserted_id)
-    doc.pop("_id", None)
-    return doc
+    # A registration without coordinates drops the old point rather than keep a stale one
+    geo = point(req.lat, req.lng)
+    update = {"$set": {**fields, "geo": geo}} if geo else {"$set": fields, "$unset": {"geo": ""}}
+    worker = await upsert_one(
+        daily_workers_col,
+        {"user_email": req.user_email},
+        {
+            **update,
+            "$setOnInsert": {
+                "name": req.name,
+                "balance": 0.0,
+                "total_earned": 0.0,
+                "invested_amount": 0.0,
+                "auto_invest": False,
+                "created_at": now,
+            },
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    return _sid(worker)
 
 
 @router.get("/me/{user_email}")
-def get_worker(user_email: str):
-    worker = daily_workers_col.find_one({"user_email": user_email})
+async def get_worker(user_email: str, fields: str = FIELDS_QUERY):
+    projection = WORKER_FIELDS.projection(WORKER_FIELDS.select(fields))
+    worker = await daily_workers_col.find_one({"user_email": user_email}, projection)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     return _sid(worker)
 
 
 @router.get("/nearby")
-def get_nearby_workers(location: str = "", problem_type: str = "", limit: int = 10):
-    """Return workers near a location who match a problem type."""
+async def get_nearby_workers(
+    location: str = "",
+    problem_type: str = "",
+    limit: int = Query(10, ge=1, le=100),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+):
+    """Return workers near a point (nearest first) or in a locality, matching a problem type."""
     query = {}
     if problem_type:
         query["problem_type"] = problem_type
-    if location:
-        # Simple substring match for city/area name
-        query["location"] = {"$regex": location.split(",")[0].strip(), "$options": "i"}
 
-    workers = list(daily_workers_col.find(query).limit(limit))
-    for w in workers:
-        w["id"] = str(w.pop("_id"))
-        # Remove sensitive info
-        w.pop("balance", None)
-        w.pop("total_earned", None)
-    return workers
+    # Projections keep balances and other private fields off the wire
+    if lat is not None and lng is not None:
+        workers = await daily_workers_col.aggregate([
+            geo_near(lat, lng, radius_km, query),
+            {"$limit": limit},
+            {"$project": {**WORKER_LIST_FIELDS, "distance_m": 1}},
+        ]).to_list(None)
+    else:
+        if location:
+            query["locality"] = normalize_locality(location)
+        workers = await daily_workers_col.find(query, WORKER_LIST_FIELDS).limit(limit).to_list(None)
+    return [_list_item(w) for w in workers]
+
+
+# ── Open-work feed ─────────────────────────────────────────────────────────────
+# Pages walk the partial "open" indexes in (created_at, _id) or (pay, created_at, _id)
+# order, so page N costs the same as page 1 however many listings exist.
+MAX_PAGE_SIZE = 100
+WORK_SORTS = {
+    "newest": [("created_at", -1), ("_id", -1)],
+    "pay": [("pay", -1), ("created_at", -1), ("_id", -1)],
+}
+
+
+# Keyset cursors carry (pay, created_at, _id); distance cursors carry the last
+# distance plus the ids already returned at exactly that distance.
+def _parse_cursor(raw: dict, geo: bool):
+    if geo:
+        return float(raw["d"]), [ObjectId(i) for i in raw["x"]]
+    created_at = datetime.fromisoformat(raw["t"]) if raw["t"] is not None else None
+    return raw.get("p"), created_at, ObjectId(raw["i"])
+
+
+def _decode_cursor(token: str, geo: bool):
+    return decode_cursor(token, lambda raw: _parse_cursor(raw, geo))
+
+
+def _after(sort: str, pay, created_at: Optional[datetime], oid: ObjectId) -> list:
+    """$or clauses selecting the rows that follow (pay, created_at, _id) in sort order."""
+    # Legacy listings without created_at sort after every dated one, like a missing pay
+    if created_at is None:
+        newer = [{"created_at": None, "_id": {"$lt": oid}}]
+    else:
+        newer = [{"created_at": {"$lt": created_at}}, {"created_at": created_at, "_id": {"$lt": oid}},
+                 {"created_at": None}]
+    if sort == "newest":
+        return newer
+    # Listings without a pay sort last; $lt on a number never matches them, so add them explicitly
+    tail = [{"pay": pay, **clause} for clause in newer]
+    if pay is None:
+        return tail
+    return [{"pay": {"$lt": pay}}, {"pay": None}] + tail
 
 
 @router.get("/work")
-def get_work():
-    jobs = list(work_listings_col.find({"status": "open"}))
-    for j in jobs:
-        j["id"] = str(j.pop("_id"))
-    return jobs
+async def get_work(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    problem_type: str = "",
+    location: str = "",
+    min_pay: Optional[float] = None,
+    sort: str = Query("newest", pattern="^(newest|pay)$"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+):
+    """Open listings: nearest first when lat/lng are given, otherwise by `sort`."""
+    query = {"status": "open"}
+    if problem_type:
+        query["problem_type"] = problem_type
+    if min_pay is not None:
+        query["pay"] = {"$gte": min_pay}
+    if lat is not None and lng is not None:
+        return await _nearby_work(query, lat, lng, radius_km, limit, cursor)
+    if location:
+        query["locality"] = normalize_locality(location)
+    if cursor:
+        query["$or"] = _after(sort, *_decode_cursor(cursor, geo=False))
+
+    docs = work_listings_col.find(query, WORK_LIST_FIELDS).sort(WORK_SORTS[sort]).limit(limit + 1)
+    jobs, last, has_more = [], None, False
+    async for doc in docs:
+        if len(jobs) == limit:
+            has_more = True  # the extra row only signals another page
+            break
+        created_at = doc.get("created_at")
+        last = {"p": doc.get("pay"), "t": created_at.isoformat() if created_at else None, "i": str(doc["_id"])}
+        jobs.append(_list_item(doc))
+
+    return {
+        "jobs": jobs,
+        "next_cursor": encode_cursor(last) if has_more else None,
+        "limit": limit,
+    }
+
+
+async def _nearby_work(query: dict, lat: float, lng: float, radius_km: float, limit: int, cursor: Optional[str]):
+    min_distance, seen = None, []
+    if cursor:
+        min_distance, seen = _decode_cursor(cursor, geo=True)
+        query["_id"] = {"$nin": seen}
+    docs = await work_listings_col.aggregate([
+        geo_near(lat, lng, radius_km, query, min_distance),
+        {"$limit": limit + 1},
+        {"$project": {**WORK_LIST_FIELDS, "distance_m": 1}},
+    ]).to_list(None)
+    docs, next_cursor = _geo_page(docs, limit, min_distance, seen)
+    return {"jobs": [_list_item(d) for d in docs], "next_cursor": next_cursor, "limit": limit}
+
+
+def _geo_page(docs: list, limit: int, min_distance: Optional[float], seen: list) -> tuple:
+    """Trim a $geoNear batch of limit + 1 rows to the page and build the cursor that follows it."""
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    last = docs[-1]["distance_m"]
+    ties = [d["_id"] for d in docs if d["distance_m"] == last]
+    if last == min_distance:
+        ties = seen + ties  # the tie spans earlier pages too; keep excluding what they returned
+    return docs, encode_cursor({"d": last, "x": [str(i) for i in ties]})
+
+
+@router.get("/offers/{user_email}")
+async def get_offers(user_email: str, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """Pending dispatch offers for a worker, newest first, with the listing card attached."""
+    offers = await offers_col.find(
+        {"worker_email": user_email, "status": "pending"}, {"listing_id": 1, "score": 1, "created_at": 1},
+    ).sort("created_at", -1).limit(limit).to_list(None)
+    listings = {
+        doc["_id"]: doc
+        for doc in await work_listings_col.find(
+            {"_id": {"$in": [o["listing_id"] for o in offers]}, "status": "open"}, WORK_LIST_FIELDS,
+        ).to_list(None)
+    }
+    return [
+        {"id": str(o["_id"]), "score": o["score"], "offered_at": o["created_at"], "job": _list_item(listings[o["listing_id"]])}
+        for o in offers if o["listing_id"] in listings
+    ]
 
 
 @router.post("/accept")
-def accept_job(req: AcceptJobRequest):
-    job = work_listings_col.find_one({"_id": ObjectId(req.job_id)})
+async def accept_job(req: AcceptJobRequest):
+    # Claim only while still open: of two workers racing, exactly one matches.
+    job = await work_listings_col.find_one_and_update(
+        {"_id": ObjectId(req.job_id), "status": "open"},
+        {"$set": {"status": "in_progress", "accepted_by": req.user_email, "accepted_at": datetime.utcnow()}},
+        projection={"title": 1, "problem_type": 1, "locality": 1, "pay": 1},
+    )
     if not job:
+        if await work_listings_col.find_one({"_id": ObjectId(req.job_id)}, {"_id": 1}):
+            raise HTTPException(status_code=409, detail="Job already taken")
         raise HTTPException(status_code=404, detail="Job not found")
-    work_listings_col.update_one(
-        {"_id": ObjectId(req.job_id)},
-        {"$set": {"status": "in_progress", "accepted_by": req.user_email}}
-    )
-    return {"message": f"Job '{job['title']}' accepted!", "pay": job["pay"]}
+    job_feed.emit("daily", "claimed", {**job, "status": "in_progress"})
+    return {"message": f"Job '{_job_title(job)}' accepted!", "pay": job.get("pay", 0)}
 
 
 @router.post("/complete")
-def complete_job(req: CompleteJobRequest):
-    job = work_listings_col.find_one({"_id": ObjectId(req.job_id)})
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    pay = job["pay"]
-    work_listings_col.update_one(
-        {"_id": ObjectId(req.job_id)},
+async def complete_job(req: CompleteJobRequest):
+    # Flip to completed and read pay/title in one step; only the worker holding the claim
+    # can complete it, and a job can only pay out once.
+    video_id, video_url = await resolve_media(req.completion_video_id, req.completion_video_url)
+    job = await work_listings_col.find_one_and_update(
+        {"_id": ObjectId(req.job_id), "status": "in_progress", "accepted_by": req.user_email},
         {"$set": {
             "status": "completed",
-            "completion_video_url": req.completion_video_url,
+            "completion_video_id": video_id,
+            "completion_video_url": video_url,
             "ai_verified": req.ai_verified,
-        }}
+        }},
+        projection={"pay": 1, "title": 1, "problem_type": 1, "locality": 1},
     )
-    daily_workers_col.update_one(
+    if not job:
+        current = await work_listings_col.find_one({"_id": ObjectId(req.job_id)}, {"status": 1, "accepted_by": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if current.get("status") == "completed":
+            raise HTTPException(status_code=409, detail="Job already completed")
+        if current.get("status") != "in_progress":
+            raise HTTPException(status_code=409, detail="Job has not been accepted")
+        raise HTTPException(status_code=403, detail="Job was accepted by another worker")
+    job_feed.emit("daily", "completed", {**job, "status": "completed"})
+    pay = job.get("pay", 0)
+    worker = await daily_workers_col.find_one_and_update(
         {"user_email": req.user_email},
-        {"$inc": {"balance": pay, "total_earned": pay}}
+        {"$inc": {"balance": pay, "total_earned": pay}},
+        projection={"balance": 1},
+        return_document=ReturnDocument.AFTER,
     )
-    ledger_col.insert_one({
+    await record_entry({
         "user_email": req.user_email,
         "type": "credit",
         "amount": pay,
-        "description": f"Completed: {job['title']}" + (" (AI Verified ✅)" if req.ai_verified else ""),
+        "description": f"Completed: {_job_title(job)}" + (" (AI Verified ✅)" if req.ai_verified else ""),
         "timestamp": datetime.utcnow(),
     })
-    worker = daily_workers_col.find_one({"user_email": req.user_email})
-    return {"message": "Job completed!", "pay": pay, "new_balance": worker["balance"]}
+    return {"message": "Job completed!", "pay": pay, "new_balance": worker["balance"] if worker else pay}
 
 
 @router.get("/revenue/{user_email}")
-def get_revenue(user_email: str):
-    worker = daily_workers_col.find_one({"user_email": user_email})
+async def get_revenue(user_email: str, fields: str = FIELDS_QUERY):
+    projection = REVENUE_FIELDS.projection(REVENUE_FIELDS.select(fields))
+    worker = await daily_workers_col.find_one({"user_email": user_email}, projection)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     return _sid(worker)
 
 
 @router.post("/toggle-invest")
-def toggle_invest(req: ToggleInvestRequest):
-    worker = daily_workers_col.find_one({"user_email": req.user_email})
+async def toggle_invest(req: ToggleInvestRequest):
+    worker = await daily_workers_col.find_one({"user_email": req.user_email})
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     new_val = not worker.get("auto_invest", False)
-    daily_workers_col.update_one({"user_email": req.user_email}, {"$set": {"auto_invest": new_val}})
+    await daily_workers_col.update_one({"user_email": req.user_email}, {"$set": {"auto_invest": new_val}})
     return {"auto_invest": new_val, "message": f"Auto-invest {'enabled' if new_val else 'disabled'}"}
 
 
 @router.post("/withdraw")
-def withdraw(req: WithdrawRequest):
-    worker = daily_workers_col.find_one({"user_email": req.user_email})
+async def withdraw(req: WithdrawRequest):
+    worker = await daily_workers_col.find_one_and_update(
+        {"user_email": req.user_email, "balance": {"$gte": req.amount}},
+        {"$inc": {"balance": -req.amount}},
+        projection={"balance": 1},
+        return_document=ReturnDocument.AFTER,
+    )
     if not worker:
-        raise HTTPException(status_code=404, detail="Worker not found")
-    if worker["balance"] < req.amount:
+        if not await daily_workers_col.find_one({"user_email": req.user_email}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Worker not found")
         raise HTTPException(status_code=400, detail="Insufficient balance")
-    daily_workers_col.update_one({"user_email": req.user_email}, {"$inc": {"balance": -req.amount}})
-    ledger_col.insert_one({
+    await record_entry({
         "user_email": req.user_email,
         "type": "debit",
         "amount": req.amount,
         "description": "Withdrawal to bank account",
         "timestamp": datetime.utcnow(),
     })
-    worker = daily_workers_col.find_one({"user_email": req.user_email})
     return {"message": "Withdrawal successful", "withdrawn": req.amount, "new_balance": worker["balance"]}
@@ -1,6 +1,13 @@
-from pymongo import MongoClient
-from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import os
+import socket
+import threading
+import time
 
 # Load .env file if present
 try:
@@ -13,38 +20,220 @@ except ImportError:
 # Default: local MongoDB (works with Compass on localhost:27017)
 # Override by setting MONGO_URI in backend/.env
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGO_DB", "equibridge")
 
-print(f"🔌 Connecting to MongoDB: {MONGO_URI[:40]}...")
-client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
 
-# Test connection
-try:
-    client.admin.command("ping")
-    print("✅ MongoDB connected successfully!")
-except Exception as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    print("   Make sure MongoDB is running: mongod --dbpath C:\\data\\db")
+def _env_int(name: str, default=None):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+# Pool sizing — size maxPoolSize against the uvicorn worker count using the
+# checkout wait times reported by /health/ready. Unset vars keep pymongo defaults.
+POOL_OPTIONS = {
+    "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 100),
+    "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+    "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS"),
+    "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+    "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 20000),
+    "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS"),
+    "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+}
+
+
+# ── Pool monitoring ────────────────────────────────────────────────────────────
+def percentile_ms(ordered: list, pct: float) -> float:
+    """pct-th percentile of sorted millisecond samples as reported by /health; 0.0 when empty."""
+    return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 3) if ordered else 0.0
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks how long requests wait to check a connection out of the pool."""
+
+    def __init__(self, window: int = 2048):
+        self._lock = threading.Lock()
+        self._local = threading.local()  # pymongo checks out on the calling thread
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.max_wait_ms = 0.0
+        self.connections_open = 0
+
+    def _wait_ms(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else None
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait = self._wait_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            if wait is not None:
+                self._waits.append(wait)
+                self.max_wait_ms = max(self.max_wait_ms, wait)
+
+    def connection_check_out_failed(self, event):
+        self._wait_ms()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open = max(0, self.connections_open - 1)
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "max_pool_size": POOL_OPTIONS["maxPoolSize"],
+                "min_pool_size": POOL_OPTIONS["minPoolSize"],
+                "connections_open": self.connections_open,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+            }
+
+        stats["checkout_wait_ms"] = {
+            "samples": len(waits),
+            "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p50": percentile_ms(waits, 50),
+            "p99": percentile_ms(waits, 99),
+            "max": round(self.max_wait_ms, 3),
+        }
+        return stats
+
+
+pool_monitor = PoolMonitor()
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Create the Motor client on first use — importing a router never connects."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                print(f"🔌 Connecting to MongoDB: {MONGO_URI[:40]}...")
+                options = {k: v for k, v in POOL_OPTIONS.items() if v is not None}
+                _client = AsyncIOMotorClient(MONGO_URI, event_listeners=[pool_monitor], **options)
+    return _client
+
+
+def get_db() -> AsyncIOMotorDatabase:
+    return get_client()[DB_NAME]
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+class _LazyCollection:
+    """Module-level collection handle that resolves against the lazy client."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
+    def __repr__(self):
+        return f"<LazyCollection {DB_NAME}.{self.name}>"
 
-db = client["equibridge"]
 
 # ── Collections ────────────────────────────────────────────────────────────────
-users_col: Collection = db["users"]
-students_col: Collection = db["students"]
-organizations_col: Collection = db["organizations"]
-work_listings_col: Collection = db["work_listings"]
-daily_workers_col: Collection = db["daily_workers"]
-investments_col: Collection = db["investments"]
-disability_users_col: Collection = db["disability_users"]
-disability_jobs_col: Collection = db["disability_jobs"]
-ledger_col: Collection = db["ledger"]
-
-# ── Indexes ────────────────────────────────────────────────────────────────────
-def create_indexes():
+users_col: AsyncIOMotorCollection = _LazyCollection("users")
+students_col: AsyncIOMotorCollection = _LazyCollection("students")
+organizations_col: AsyncIOMotorCollection = _LazyCollection("organizations")
+work_listings_col: AsyncIOMotorCollection = _LazyCollection("work_listings")
+daily_workers_col: AsyncIOMotorCollection = _LazyCollection("daily_workers")
+investments_col: AsyncIOMotorCollection = _LazyCollection("investments")
+disability_users_col: AsyncIOMotorCollection = _LazyCollection("disability_users")
+disability_jobs_col: AsyncIOMotorCollection = _LazyCollection("disability_jobs")
+ledger_col: AsyncIOMotorCollection = _LazyCollection("ledger")
+ledger_rollups_col: AsyncIOMotorCollection = _LazyCollection("ledger_rollups")
+offers_col: AsyncIOMotorCollection = _LazyCollection("offers")
+recommendations_col: AsyncIOMotorCollection = _LazyCollection("recommendations")
+curricula_col: AsyncIOMotorCollection = _LazyCollection("curricula")
+quiz_attempts_col: AsyncIOMotorCollection = _LazyCollection("quiz_attempts")
+meta_col: AsyncIOMotorCollection = _LazyCollection("meta")
+
+
+DUPLICATE_KEY = 11000
+
+
+@contextmanager
+def duplicates_ignored():
+    """Around an unordered bulk write: rows the unique index already holds are not an error."""
     try:
-        users_col.create_index("email", unique=True)
-        students_col.create_index("user_email", unique=True)
-        daily_workers_col.create_index("user_email", unique=True)
-        disability_users_col.create_index("user_email", unique=True)
-        organizations_col.create_index([("field", 1), ("name", 1)])
+        yield
+    except BulkWriteError as e:
+        if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+            raise
+
+
+async def upsert_one(col, filter: dict, update: dict, **kwargs):
+    """find_one_and_update(upsert=True), retried once if a concurrent upsert won the insert."""
+    try:
+        return await col.find_one_and_update(filter, update, upsert=True, **kwargs)
+    except DuplicateKeyError:
+        return await col.find_one_and_update(filter, update, upsert=True, **kwargs)
+
+
+# ── Leases ─────────────────────────────────────────────────────────────────────
+# Background loops that must run in one process at a time (dispatch, recommendation
+# fan-out) hold a lease document in `meta` and renew it on every pass.
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def hold_lease(name: str, seconds: float, owner: str = PROCESS_ID) -> bool:
+    """Take or renew meta._id == name for `owner`; False while another live owner holds it."""
+    now = datetime.utcnow()
+    try:
+        await meta_col.update_one(
+            {"_id": name, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False  # the lease exists and belongs to someone else
+
+
+# Test connection
+async def ping(log: bool = True) -> bool:
+    try:
+        await get_client().admin.command("ping")
+        if log:
+            print("✅ MongoDB connected successfully!")
+        return True
     except Exception as e:
-        print(f"⚠️  Index creation warning: {e}")
+        if log:
+            print(f"❌ MongoDB connection failed: {e}")
+            print("   Make sure MongoDB is running: mongod --dbpath C:\\data\\db")
+        return False
+
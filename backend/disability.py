@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from bson import ObjectId
-from database import disability_users_col, disability_jobs_col, ledger_col
+from pymongo import ReturnDocument
+from database import disability_users_col, disability_jobs_col, recommendations_col, upsert_one
+from ledger import record_entry
+from feed import job_feed
+from fieldset import FIELDS_QUERY, Fieldset
+from job_index import job_index, PROFESSION_WEIGHT
+from recommend import recommend_for, user_keys, card
 
 router = APIRouter(prefix="/disability", tags=["disability"])
 
@@ -42,39 +48,48 @@ def _sid(doc):
     return doc
 
 
+# /revenue shows earnings; the ID proof and profile details are opt-in
+REVENUE_FIELDS = Fieldset(
+    default=("name", "profession", "disability_type", "total_earnings", "pending_earnings"),
+    opt_in=("user_email", "skills", "created_at", "id_proof"),
+    computed=("pending_earnings",),
+)
+
+JOB_CARD_FIELDS = ("_id", "title", "company", "description", "required_skills", "pay", "profession", "job_type",
+                   "emoji", "created_at")
+job_feed.register_channel(
+    "disability", "disability_jobs", lambda doc: _sid({k: doc[k] for k in JOB_CARD_FIELDS if k in doc}),
+    filters=("profession",),
+)
+
+
 @router.post("/register")
-def register_disability_user(req: DisabilityRegisterRequest):
-    existing = disability_users_col.find_one({"user_email": req.user_email})
-    if existing:
-        disability_users_col.update_one(
-            {"user_email": req.user_email},
-            {"$set": {
+async def register_disability_user(req: DisabilityRegisterRequest):
+    user = await upsert_one(
+        disability_users_col,
+        {"user_email": req.user_email},
+        {
+            "$set": {
                 "profession": req.profession,
                 "disability_type": req.disability_type,
                 "skills": req.skills,
-                "name": req.name
-            }}
-        )
-        return _sid(disability_users_col.find_one({"user_email": req.user_email}))
-    
-    doc = {
-        "user_email": req.user_email,
-        "name": req.name,
-        "id_proof": req.id_proof,
-        "profession": req.profession,
-        "disability_type": req.disability_type,
-        "skills": req.skills,
-        "total_earnings": 0.0,
-        "created_at": datetime.utcnow(),
-    }
-    result = disability_users_col.insert_one(doc)
-    doc["id"] = str(result.inserted_id)
-    doc.pop("_id", None)
-    return doc
+                "name": req.name,
+                **user_keys(req.profession, req.skills),
+            },
+            "$setOnInsert": {
+                "id_proof": req.id_proof,
+                "total_earnings": 0.0,
+                "created_at": datetime.utcnow(),
+            },
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    await recommend_for([user])  # later posts reach the user through the fan-out
+    return _sid(user)
 
 
 @router.post("/post-job")
-def post_job(req: PostJobRequest):
+async def post_job(req: PostJobRequest):
     doc = {
         "title": req.title,
         "company": req.company,
@@ -85,109 +100,147 @@ def post_job(req: PostJobRequest):
         "status": "open",
         "created_at": datetime.utcnow(),
     }
-    result = disability_jobs_col.insert_one(doc)
+    result = await disability_jobs_col.insert_one(doc)
+    job_feed.emit("disability", "created", doc)
     doc["id"] = str(result.inserted_id)
     doc.pop("_id", None)
     return doc
 
 
+MAX_PAGE_SIZE = 100
+MAX_OFFSET = 2000
+
+
 @router.get("/jobs")
-def get_jobs(profession: str = "", user_email: str = ""):
+async def get_jobs(
+    profession: str = "",
+    user_email: str = "",
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_OFFSET),
+):
+    """Open jobs ranked by match_score (profession match > shared skills), newest first on ties."""
     user_skills = []
     if user_email:
-        user = disability_users_col.find_one({"user_email": user_email})
+        user = await disability_users_col.find_one({"user_email": user_email}, {"skills": 1, "profession": 1})
         if user:
             user_skills = user.get("skills", [])
             if not profession:
                 profession = user.get("profession", "")
 
-    query = {"status": "open"}
-    # We fetch all open jobs and tag them with match metadata
-    jobs = list(disability_jobs_col.find(query))
-    
-    results = []
-    for j in jobs:
-        j["id"] = str(j.pop("_id"))
-        
-        # Calculate skill matches
-        job_skills = j.get("required_skills", [])
-        matches = [s for s in job_skills if s in user_skills]
-        j["skill_match_count"] = len(matches)
-        j["is_profession_match"] = j.get("profession") == profession
-        
-        # Heuristic for sorting: profession match > skill match count
-        j["match_score"] = (10 if j["is_profession_match"] else 0) + len(matches)
-        results.append(j)
-    
-    # Sort by match score descending
-    results.sort(key=lambda x: x["match_score"], reverse=True)
-    return results
+    if not job_index.loaded:
+        await job_index.load()
+    # Rank from the in-memory index, then read only this page's documents. A job claimed
+    # through another process (without a change stream) is evicted here and the page re-ranked.
+    while True:
+        ranked = job_index.top(profession, user_skills, offset=offset, limit=limit + 1)
+        docs = {
+            d["_id"]: d
+            for d in await disability_jobs_col.find(
+                {"_id": {"$in": [job_id for job_id, _, _ in ranked]}, "status": "open"},
+                {f: 1 for f in JOB_CARD_FIELDS},
+            ).to_list(None)
+        }
+        stale = [job_id for job_id, _, _ in ranked if job_id not in docs]
+        if not stale:
+            break
+        for job_id in stale:
+            job_index.remove(job_id)
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+
+    jobs = []
+    for job_id, score, shared in ranked:
+        j = _sid(docs[job_id])
+        j["skill_match_count"] = shared
+        j["is_profession_match"] = score - shared == PROFESSION_WEIGHT
+        j["match_score"] = score
+        jobs.append(j)
+    return {"jobs": jobs, "next_offset": offset + limit if has_more else None, "limit": limit}
+
+
+@router.get("/recommendations/{user_email}")
+async def get_recommendations(user_email: str):
+    """Precomputed matches, best first: one read of the user's capped recommendation list."""
+    doc = await recommendations_col.find_one({"user_email": user_email}, {"jobs": 1, "updated_at": 1})
+    if not doc:
+        return {"jobs": [], "updated_at": None}
+    # A job claimed moments ago may not have been pulled from the list yet
+    jobs = [card(e) for e in doc.get("jobs", []) if not job_index.loaded or e["job_id"] in job_index]
+    return {"jobs": jobs, "updated_at": doc.get("updated_at")}
 
 
 @router.post("/accept")
-def accept_job(req: AcceptJobRequest):
-    job = disability_jobs_col.find_one({"_id": ObjectId(req.job_id)})
+async def accept_job(req: AcceptJobRequest):
+    # The status check and the claim are one operation, so a job is never accepted twice.
+    job = await disability_jobs_col.find_one_and_update(
+        {"_id": ObjectId(req.job_id), "status": "open"},
+        {"$set": {"status": "in_progress", "accepted_by": req.user_email, "accepted_at": datetime.utcnow()}},
+        projection={"profession": 1},
+    )
     if not job:
+        if await disability_jobs_col.find_one({"_id": ObjectId(req.job_id)}, {"_id": 1}):
+            raise HTTPException(status_code=409, detail="Job is no longer open")
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    if job.get("status") != "open":
-        raise HTTPException(status_code=400, detail="Job is no longer open")
-
-    disability_jobs_col.update_one(
-        {"_id": ObjectId(req.job_id)}, 
-        {"$set": {"status": "in_progress", "accepted_by": req.user_email, "accepted_at": datetime.utcnow()}}
-    )
+    job_feed.emit("disability", "claimed", {**job, "status": "in_progress"})
     return {"message": "Job accepted! Please complete it to receive payment."}
 
 
 @router.get("/my-active-jobs/{user_email}")
-def get_my_active_jobs(user_email: str):
-    jobs = list(disability_jobs_col.find({
+async def get_my_active_jobs(user_email: str):
+    jobs = await disability_jobs_col.find({
         "accepted_by": user_email, 
         "status": {"$in": ["in_progress", "completed", "approved"]}
-    }))
+    }).to_list(None)
     for j in jobs:
         j["id"] = str(j.pop("_id"))
     return jobs
 
 
 @router.post("/complete")
-def complete_job(req: StatusUpdateRequest):
-    job = disability_jobs_col.find_one({"_id": ObjectId(req.job_id), "accepted_by": req.user_email})
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found or not assigned to you")
-    
-    disability_jobs_col.update_one(
-        {"_id": ObjectId(req.job_id)}, 
-        {"$set": {"status": "completed", "completed_at": datetime.utcnow()}}
+async def complete_job(req: StatusUpdateRequest):
+    # Only the holder of an in-progress claim can complete it, so an approved job
+    # cannot be flipped back to completed and paid again.
+    job = await disability_jobs_col.find_one_and_update(
+        {"_id": ObjectId(req.job_id), "status": "in_progress", "accepted_by": req.user_email},
+        {"$set": {"status": "completed", "completed_at": datetime.utcnow()}},
     )
+    if not job:
+        current = await disability_jobs_col.find_one({"_id": ObjectId(req.job_id)}, {"status": 1, "accepted_by": 1})
+        if not current or current.get("accepted_by") != req.user_email:
+            raise HTTPException(status_code=404, detail="Job not found or not assigned to you")
+        raise HTTPException(status_code=409, detail=f"Job already {current.get('status')}")
+    job_feed.emit("disability", "completed", {**job, "status": "completed"})
     return {"message": "Job marked as complete! Waiting for client approval."}
 
 
 @router.post("/approve")
-def approve_job(req: StatusUpdateRequest):
+async def approve_job(req: StatusUpdateRequest):
     # In a real app, this would be called by the client/org. 
     # For this demo, we can call it from the UI to show the payment flow.
-    job = disability_jobs_col.find_one({"_id": ObjectId(req.job_id)})
+    # Only a completed job matches, so approval (and payment) happens exactly once.
+    job = await disability_jobs_col.find_one_and_update(
+        {"_id": ObjectId(req.job_id), "status": "completed"},
+        {"$set": {"status": "approved", "approved_at": datetime.utcnow()}},
+        projection={"pay": 1, "accepted_by": 1, "title": 1, "company": 1},
+    )
     if not job:
+        if await disability_jobs_col.find_one({"_id": ObjectId(req.job_id)}, {"_id": 1}):
+            raise HTTPException(status_code=400, detail="Only completed jobs can be approved")
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    if job.get("status") != "completed":
-        raise HTTPException(status_code=400, detail="Only completed jobs can be approved")
+    job_index.remove(job["_id"])  # normally gone since accept; drops stragglers from a missed event
 
     pay = job["pay"]
     user_email = job["accepted_by"]
 
-    # Mark as approved
-    disability_jobs_col.update_one(
-        {"_id": ObjectId(req.job_id)}, 
-        {"$set": {"status": "approved", "approved_at": datetime.utcnow()}}
-    )
-    
     # Credit the user
-    disability_users_col.update_one({"user_email": user_email}, {"$inc": {"total_earnings": pay}})
+    user = await disability_users_col.find_one_and_update(
+        {"user_email": user_email},
+        {"$inc": {"total_earnings": pay}},
+        projection={"total_earnings": 1},
+        return_document=ReturnDocument.AFTER,
+    )
     
-    ledger_col.insert_one({
+    await record_entry({
         "user_email": user_email,
         "type": "credit",
         "amount": pay,
@@ -195,20 +248,22 @@ def approve_job(req: StatusUpdateRequest):
         "timestamp": datetime.utcnow(),
     })
     
-    user = disability_users_col.find_one({"user_email": user_email})
     return {"message": f"₹{pay} credited to worker!", "total_earnings": user["total_earnings"] if user else pay}
 
 
 @router.get("/revenue/{user_email}")
-def get_revenue(user_email: str):
-    user = disability_users_col.find_one({"user_email": user_email})
+async def get_revenue(user_email: str, fields: str = FIELDS_QUERY):
+    names = REVENUE_FIELDS.select(fields)
+    user = await disability_users_col.find_one({"user_email": user_email}, REVENUE_FIELDS.projection(names))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # Also fetch pending earnings
-    pending_jobs = list(disability_jobs_col.find({"accepted_by": user_email, "status": "completed"}))
-    pending_total = sum(j.get("pay", 0) for j in pending_jobs)
-    
+
     res = _sid(user)
-    res["pending_earnings"] = pending_total
+    if "pending_earnings" in names:
+        # Completed but not yet approved; summed on the server instead of shipping every job
+        pending = await disability_jobs_col.aggregate([
+            {"$match": {"accepted_by": user_email, "status": "completed"}},
+            {"$group": {"_id": None, "total": {"$sum": "$pay"}}},
+        ]).to_list(None)
+        res["pending_earnings"] = pending[0]["total"] if pending else 0
     return res
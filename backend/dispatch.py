@@ -0,0 +1,295 @@
+"""
+Batch dispatch: offer each new open listing to the best few nearby workers.
+
+DispatchEngine is pure in-memory. Workers sit in a ~0.5 km grid (when they have
+coordinates) or a locality bucket (when they don't), split by problem_type, so a
+listing only looks at same-type (and generalist) workers. The grid is searched in
+rings outward from the listing and stops once nothing further out can win or
+DISPATCH_MAX_CANDIDATES have been scored. Candidates are scored on type match,
+distance and recent offer load, and the top DISPATCH_OFFERS become offers.
+
+Dispatcher wraps the engine with Mongo: it folds in workers seen since the last
+refresh (last_seen watermark), pulls listings created since the last dispatched
+one (created_at/_id watermark in meta._id == "dispatch"), and writes a whole batch
+of offers with one insert_many plus one bulk_write on work_listings. It runs every
+DISPATCH_INTERVAL seconds and right after each post (`dispatcher.notify()`).
+
+created_at is set by the app before the insert commits, so a listing can land
+behind one that already moved the watermark. Only listings older than
+DISPATCH_GRACE_SECONDS are admitted, by which time every earlier insert has
+committed. One process at a time runs the loop, holding the "dispatch_lease"
+document in `meta`; the others stay idle until it expires.
+"""
+import asyncio
+import heapq
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from database import daily_workers_col, work_listings_col, offers_col, meta_col, duplicates_ignored, hold_lease
+from geo import DEFAULT_RADIUS_KM
+
+INTERVAL = float(os.getenv("DISPATCH_INTERVAL", "2"))
+BATCH_SIZE = int(os.getenv("DISPATCH_BATCH_SIZE", "2000"))
+OFFERS_PER_LISTING = int(os.getenv("DISPATCH_OFFERS", "3"))
+RADIUS_KM = float(os.getenv("DISPATCH_RADIUS_KM", str(DEFAULT_RADIUS_KM)))
+LOAD_HALF_LIFE = float(os.getenv("DISPATCH_LOAD_HALF_LIFE", "900"))  # seconds
+GRACE = timedelta(seconds=float(os.getenv("DISPATCH_GRACE_SECONDS", "2")))
+LEASE_SECONDS = float(os.getenv("DISPATCH_LEASE_SECONDS", "30"))
+
+CELL_KM = 0.5
+KM_PER_DEG = 111.32
+GENERALISTS = ("", "General Labor")  # matched to any listing, at a lower score
+W_TYPE, W_DISTANCE, W_LOAD = 1.0, 1.0, 0.25
+LOCALITY_DISTANCE = 0.5  # distance score when only the locality matched
+MAX_CANDIDATES = int(os.getenv("DISPATCH_MAX_CANDIDATES", "64"))  # stop widening the search past this
+STATE_ID = "dispatch"
+LEASE_ID = "dispatch_lease"
+
+
+class DispatchEngine:
+    def __init__(self, radius_km: float = RADIUS_KM, offers: int = OFFERS_PER_LISTING,
+                 half_life: float = LOAD_HALF_LIFE, max_candidates: int = MAX_CANDIDATES):
+        self.radius_km = radius_km
+        self.offers = offers
+        self.half_life = half_life
+        self.max_candidates = max_candidates
+        self.workers = {}     # email -> (problem_type, key, is_cell) where key is a cell or locality
+        self.grid = {}        # (row, col) -> {problem_type: {email: (x_km, y_km)}}
+        self.localities = {}  # locality -> {problem_type: set(email)}
+        self.load = {}        # email -> (decayed offer count, as_of)
+
+    # ── Index maintenance ──────────────────────────────────────────────────────
+    # Cells are ~CELL_KM square everywhere: each row of cells has its own
+    # longitude scale, and positions are kept in projected kilometres.
+    @staticmethod
+    def _row(lat: float) -> int:
+        return int(lat * KM_PER_DEG // CELL_KM)
+
+    @staticmethod
+    def _x(lng: float, row: int) -> float:
+        return lng * KM_PER_DEG * math.cos(math.radians((row + 0.5) * CELL_KM / KM_PER_DEG))
+
+    def upsert_worker(self, email: str, problem_type: str = "", lat=None, lng=None, locality: str = ""):
+        self.remove_worker(email)
+        problem_type = problem_type or ""
+        if lat is not None and lng is not None:
+            row = self._row(lat)
+            x, y = self._x(lng, row), lat * KM_PER_DEG
+            cell = (row, int(x // CELL_KM))
+            self.grid.setdefault(cell, {}).setdefault(problem_type, {})[email] = (x, y)
+            self.workers[email] = (problem_type, cell, True)
+        elif locality:
+            self.localities.setdefault(locality, {}).setdefault(problem_type, set()).add(email)
+            self.workers[email] = (problem_type, locality, False)
+
+    def remove_worker(self, email: str):
+        old = self.workers.pop(email, None)
+        if not old:
+            return
+        problem_type, key, is_cell = old
+        buckets = self.grid.get(key) if is_cell else self.localities.get(key)
+        members = buckets.get(problem_type) if buckets else None
+        if members is not None:
+            if is_cell:
+                members.pop(email, None)
+            else:
+                members.discard(email)
+
+    def _load(self, email: str, now: float) -> float:
+        value, as_of = self.load.get(email, (0.0, now))
+        return value * 0.5 ** ((now - as_of) / self.half_life) if value else 0.0
+
+    def _bump_load(self, email: str, now: float):
+        self.load[email] = (self._load(email, now) + 1.0, now)
+
+    # ── Matching ───────────────────────────────────────────────────────────────
+    def _types(self, problem_type: str) -> list:
+        return [(problem_type, W_TYPE)] + [(g, W_TYPE / 2) for g in GENERALISTS if g != problem_type]
+
+    def _ring(self, lat: float, lng: float, k: int):
+        """Cells at Chebyshev distance k from the listing's cell."""
+        row = self._row(lat)
+        for r in range(row - k, row + k + 1):
+            c = int(self._x(lng, r) // CELL_KM)
+            if abs(r - row) == k:
+                yield from ((r, col) for col in range(c - k, c + k + 1))
+            else:
+                yield (r, c - k)
+                yield (r, c + k)
+
+    def _best(self, listing: dict, now: float) -> list:
+        """Top offers for one listing as a min-heap of (score, email)."""
+        heap, seen = [], 0
+        poster = listing.get("user_email")
+        types = self._types(listing.get("problem_type") or "")
+
+        def consider(email, score):
+            # Load only lowers a score, so skip the decay maths when it can't place
+            if email == poster or (len(heap) == self.offers and score <= heap[0][0]):
+                return
+            score -= W_LOAD * self._load(email, now)
+            if len(heap) < self.offers:
+                heapq.heappush(heap, (score, email))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, email))
+
+        bucket = self.localities.get(listing.get("locality") or "")
+        if bucket:
+            for problem_type, type_score in types:
+                for email in bucket.get(problem_type, ()):
+                    consider(email, type_score + W_DISTANCE * LOCALITY_DISTANCE)
+
+        lat, lng = listing.get("lat"), listing.get("lng")
+        if lat is None or lng is None:
+            return heap
+        y, radius = lat * KM_PER_DEG, self.radius_km
+        for k in range(math.ceil(radius / CELL_KM) + 1):
+            # Everything in ring k is at least (k - 1) cells away, so once the heap is
+            # full of scores that nothing out there can beat, or we have scored
+            # enough candidates, stop widening.
+            if len(heap) == self.offers and (
+                seen >= self.max_candidates
+                or heap[0][0] >= W_TYPE + W_DISTANCE * (1 - max(0, k - 1) * CELL_KM / radius)
+            ):
+                break
+            for cell_key in self._ring(lat, lng, k):
+                cell = self.grid.get(cell_key)
+                if not cell:
+                    continue
+                x = self._x(lng, cell_key[0])
+                for problem_type, type_score in types:
+                    for email, (wx, wy) in cell.get(problem_type, {}).items():
+                        km = math.hypot(wx - x, wy - y)
+                        if km <= radius:
+                            seen += 1
+                            consider(email, type_score + W_DISTANCE * (1 - km / radius))
+        return heap
+
+    def match(self, listings: list, now: float = None) -> list:
+        """Return offers [(listing_id, email, score)] and charge each offer to the worker's load."""
+        now = time.time() if now is None else now
+        offers = []
+        for listing in listings:
+            for score, email in sorted(self._best(listing, now), reverse=True):
+                offers.append((listing["id"], email, round(score, 4)))
+                self._bump_load(email, now)
+        return offers
+
+    def snapshot(self) -> dict:
+        return {"workers": len(self.workers), "cells": len(self.grid), "localities": len(self.localities)}
+
+
+class Dispatcher:
+    def __init__(self, engine: DispatchEngine = None, interval: float = INTERVAL, batch_size: int = BATCH_SIZE):
+        self.engine = engine or DispatchEngine()
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wake = asyncio.Event()
+        self._task = None
+        self._workers_seen = None  # last_seen watermark
+        # metrics
+        self.dispatched = 0
+        self.offered = 0
+        self.runs = 0
+
+    # ── Workers ────────────────────────────────────────────────────────────────
+    async def refresh_workers(self):
+        query = {"last_seen": {"$gte": self._workers_seen}} if self._workers_seen else {}
+        async for w in daily_workers_col.find(
+            query, {"user_email": 1, "problem_type": 1, "geo": 1, "locality": 1, "last_seen": 1},
+        ):
+            lng, lat = (w.get("geo") or {}).get("coordinates", (None, None))
+            self.engine.upsert_worker(w["user_email"], w.get("problem_type", ""), lat, lng, w.get("locality", ""))
+            if w.get("last_seen") and (self._workers_seen is None or w["last_seen"] > self._workers_seen):
+                self._workers_seen = w["last_seen"]
+
+    # ── Listings ───────────────────────────────────────────────────────────────
+    async def _watermark(self):
+        state = await meta_col.find_one({"_id": STATE_ID}) or {}
+        return state.get("created_at"), state.get("listing_id")
+
+    async def _pending_listings(self) -> list:
+        created_at, listing_id = await self._watermark()
+        query = {"status": "open", "created_at": {"$lte": datetime.utcnow() - GRACE}}
+        if created_at:
+            query["$or"] = [{"created_at": {"$gt": created_at}}, {"created_at": created_at, "_id": {"$gt": listing_id}}]
+        docs = work_listings_col.find(
+            query, {"user_email": 1, "problem_type": 1, "geo": 1, "locality": 1, "created_at": 1},
+        ).sort([("created_at", 1), ("_id", 1)]).limit(self.batch_size)
+        return await docs.to_list(None)
+
+    async def dispatch_once(self) -> int:
+        """Match one batch of new listings; returns how many listings were processed."""
+        await self.refresh_workers()
+        docs = await self._pending_listings()
+        if not docs:
+            return 0
+        listings = []
+        for d in docs:
+            lng, lat = (d.get("geo") or {}).get("coordinates", (None, None))
+            listings.append({"id": d["_id"], "user_email": d.get("user_email"), "problem_type": d.get("problem_type"),
+                             "lat": lat, "lng": lng, "locality": d.get("locality")})
+        offers = self.engine.match(listings)
+        await self._write(offers)
+
+        last = docs[-1]
+        await meta_col.update_one(
+            {"_id": STATE_ID}, {"$set": {"created_at": last["created_at"], "listing_id": last["_id"]}}, upsert=True,
+        )
+        self.dispatched += len(docs)
+        self.offered += len(offers)
+        return len(docs)
+
+    async def _write(self, offers: list):
+        if not offers:
+            return
+        now = datetime.utcnow()
+        per_listing = {}
+        for listing_id, email, _ in offers:
+            per_listing.setdefault(listing_id, []).append(email)
+        # A batch replayed after a crash re-offers the same pairs; the unique index drops them
+        with duplicates_ignored():
+            await offers_col.insert_many([
+                {"listing_id": listing_id, "worker_email": email, "score": score, "status": "pending", "created_at": now}
+                for listing_id, email, score in offers
+            ], ordered=False)
+        await work_listings_col.bulk_write([
+            UpdateOne({"_id": listing_id}, {"$addToSet": {"offered_to": {"$each": emails}}, "$set": {"dispatched_at": now}})
+            for listing_id, emails in per_listing.items()
+        ], ordered=False)
+
+    # ── Loop ───────────────────────────────────────────────────────────────────
+    def notify(self):
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                # Drain the backlog in full batches before sleeping again, renewing the lease per batch
+                while await hold_lease(LEASE_ID, LEASE_SECONDS) and await self.dispatch_once() == self.batch_size:
+                    pass
+                self.runs += 1
+            except Exception as e:
+                print(f"⚠️  Dispatch run failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {**self.engine.snapshot(), "dispatched": self.dispatched, "offered": self.offered, "runs": self.runs}
+
+
+dispatcher = Dispatcher()
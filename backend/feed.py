@@ -0,0 +1,280 @@
+"""
+Push feed of job events over server-sent events or a WebSocket.
+
+    GET /feed/stream?channel=daily&problem_type=Plumbing&locality=Koramangala
+    WS  /feed/ws?channel=disability&profession=Tailor
+
+Channels are registered by the routers that own the collections ("daily" for
+work_listings, "disability" for disability_jobs). Events are `created`,
+`claimed` and `completed`; a subscriber only gets the ones whose job matches all
+the filters it passed.
+
+Where Mongo runs as a replica set, one change stream per process watches both
+collections, so every process sees every write. On a single node (or under
+tests) opening the stream fails and the feed falls back to in-process pub/sub:
+the routers call `job_feed.emit()` after their writes and only subscribers on the
+same process are reached.
+
+An idle subscriber costs one small object with an empty deque. A subscriber
+that falls FEED_QUEUE_SIZE events behind has its backlog dropped and is sent a
+single `resync` event, telling it to refetch the list.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import Optional
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pymongo.errors import PyMongoError
+from database import get_db
+from geo import normalize_locality
+
+router = APIRouter(prefix="/feed", tags=["feed"])
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "64"))
+HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", "15"))
+FILTERS = ("problem_type", "profession", "locality")  # most selective first
+STATUS_EVENTS = {"in_progress": "claimed", "completed": "completed"}
+RESYNC = ("resync", "{}")
+
+
+class Subscriber:
+    __slots__ = ("channel", "filters", "key", "queue", "wake", "lagged")
+
+    def __init__(self, channel: str, filters: dict):
+        self.channel = channel
+        self.filters = filters
+        field = next((f for f in FILTERS if f in filters), None)
+        self.key = (channel, field, filters.get(field))
+        self.queue = deque()
+        self.wake = asyncio.Event()
+        self.lagged = False
+
+    def matches(self, attrs: dict) -> bool:
+        return all(attrs.get(f) == v for f, v in self.filters.items())
+
+    def push(self, event: tuple):
+        if len(self.queue) >= QUEUE_SIZE:
+            self.queue.clear()
+            self.lagged = True
+        else:
+            self.queue.append(event)
+        self.wake.set()
+
+    async def next(self, timeout: float) -> Optional[tuple]:
+        """Next (event, data), or None after `timeout` seconds of silence."""
+        if not self.queue and not self.lagged:
+            # A timer handle rather than wait_for(), which parks an extra Task per subscriber
+            self.wake.clear()
+            timer = asyncio.get_running_loop().call_later(timeout, self.wake.set)
+            try:
+                await self.wake.wait()
+            finally:
+                timer.cancel()
+        if self.lagged:
+            self.lagged = False
+            return RESYNC
+        return self.queue.popleft() if self.queue else None
+
+
+class Feed:
+    def __init__(self):
+        self.channels = {}  # channel -> (collection, card(doc) -> dict, filter fields)
+        self.by_key = {}    # (channel, filter field, value) -> set(Subscriber)
+        self.listeners = {}  # channel -> [callback(kind, doc)] for in-process indexes
+        self.mode = "local"
+        self._task = None
+        self.published = 0
+        self.listener_errors = 0
+        self.stream_errors = 0
+
+    def register_channel(self, channel: str, collection: str, card, filters: tuple):
+        self.channels[channel] = (collection, card, filters)
+
+    def listen(self, channel: str, callback):
+        """Call `callback(kind, doc)` for every event on the channel, before subscribers see it."""
+        self.listeners.setdefault(channel, []).append(callback)
+
+    # ── Subscribers ────────────────────────────────────────────────────────────
+    def subscribe(self, channel: str, **filters) -> Subscriber:
+        fields = self.channels[channel][2] if channel in self.channels else ()
+        filters = {k: v for k, v in filters.items() if v and k in fields}
+        if "locality" in filters:
+            filters["locality"] = normalize_locality(filters["locality"])
+        sub = Subscriber(channel, filters)
+        self.by_key.setdefault(sub.key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        subs = self.by_key.get(sub.key)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self.by_key[sub.key]
+
+    @property
+    def subscribers(self) -> int:
+        return sum(len(s) for s in self.by_key.values())
+
+    # ── Publishing ─────────────────────────────────────────────────────────────
+    def publish(self, channel: str, kind: str, doc: dict) -> int:
+        """Queue the event for every matching subscriber; returns how many got it."""
+        if channel not in self.channels:
+            return 0
+        _, card, fields = self.channels[channel]
+        for callback in self.listeners.get(channel, ()):
+            try:
+                callback(kind, doc)
+            except Exception:
+                # One broken index must not stop the others or the subscribers
+                self.listener_errors += 1
+                logger.exception("Feed listener %r failed on %s %s", callback, kind, doc.get("_id"))
+        attrs = {f: doc.get(f) for f in fields}
+        if kind == "created":
+            payload = {"job": card(dict(doc))}
+        else:
+            payload = {"id": str(doc["_id"]), "status": doc.get("status")}
+        # Serialize once; every matching subscriber gets the same string
+        event = (kind, json.dumps(payload, default=str))
+        candidates = [self.by_key.get((channel, None, None), ())]
+        candidates += [self.by_key.get((channel, f, attrs[f]), ()) for f in fields if attrs.get(f)]
+        delivered = 0
+        for subs in candidates:
+            for sub in subs:
+                if sub.matches(attrs):
+                    sub.push(event)
+                    delivered += 1
+        self.published += 1
+        return delivered
+
+    def emit(self, channel: str, kind: str, doc: dict):
+        """Called by routers after a write; a no-op when the change stream is delivering."""
+        if self.mode == "local":
+            self.publish(channel, kind, doc)
+
+    # ── Change stream ──────────────────────────────────────────────────────────
+    def _on_change(self, change: dict):
+        channel = next((c for c, (coll, _, _) in self.channels.items() if coll == change["ns"]["coll"]), None)
+        doc = change.get("fullDocument")
+        if not channel or not doc:
+            return
+        if change["operationType"] == "insert":
+            if doc.get("status") == "open":
+                self.publish(channel, "created", doc)
+            return
+        status = change.get("updateDescription", {}).get("updatedFields", {}).get("status")
+        if status in STATUS_EVENTS:
+            self.publish(channel, STATUS_EVENTS[status], doc)
+
+    async def _watch(self, stream):
+        resume = None
+        while True:
+            try:
+                async with stream:
+                    async for change in stream:
+                        resume = change["_id"]
+                        try:
+                            self._on_change(change)
+                        except Exception:
+                            self.stream_errors += 1
+                            logger.exception("Feed dropped change %s", change.get("documentKey"))
+            except PyMongoError as e:
+                logger.warning("Feed change stream interrupted, resuming: %s", e)
+                await asyncio.sleep(1)
+            except Exception:
+                # Anything else would end the task silently and leave every index stale
+                self.stream_errors += 1
+                logger.exception("Feed change stream failed, restarting")
+                await asyncio.sleep(1)
+            stream = self._open(resume)
+
+    def _open(self, resume_after=None):
+        collections = [coll for coll, _, _ in self.channels.values()]
+        pipeline = [{"$match": {"ns.coll": {"$in": collections}, "operationType": {"$in": ["insert", "update"]}}}]
+        return get_db().watch(pipeline, full_document="updateLookup", resume_after=resume_after)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        stream = self._open()
+        try:
+            first = await stream.try_next()  # opening the cursor is what fails without a replica set
+        except PyMongoError as e:
+            print(f"ℹ️  Change streams unavailable ({e}); job feed is in-process only")
+            return
+        self.mode = "change_stream"
+        if first:
+            self._on_change(first)
+        self._task = asyncio.create_task(self._watch(stream))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.mode = "local"
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": self.mode,
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "listener_errors": self.listener_errors,
+            "stream_errors": self.stream_errors,
+        }
+
+
+job_feed = Feed()
+
+
+# ── Endpoints ──────────────────────────────────────────────────────────────────
+async def _sse(request: Request, sub: Subscriber):
+    try:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            item = await sub.next(HEARTBEAT_SECONDS)
+            if item is None:
+                yield ": ping\n\n"  # keeps proxies from closing an idle stream
+            else:
+                yield f"event: {item[0]}\ndata: {item[1]}\n\n"
+    finally:
+        job_feed.unsubscribe(sub)
+
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    channel: str = Query("daily", pattern="^(daily|disability)$"),
+    problem_type: str = "",
+    profession: str = "",
+    locality: str = "",
+):
+    sub = job_feed.subscribe(channel, problem_type=problem_type, profession=profession, locality=locality)
+    return StreamingResponse(
+        _sse(request, sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def websocket_feed(
+    websocket: WebSocket,
+    channel: str = Query("daily", pattern="^(daily|disability)$"),
+    problem_type: str = "",
+    profession: str = "",
+    locality: str = "",
+):
+    await websocket.accept()
+    sub = job_feed.subscribe(channel, problem_type=problem_type, profession=profession, locality=locality)
+    try:
+        while True:
+            item = await sub.next(HEARTBEAT_SECONDS)
+            kind, data = item if item else ("ping", "{}")
+            await websocket.send_text(f'{{"type": "{kind}", "data": {data}}}')
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        job_feed.unsubscribe(sub)
@@ -0,0 +1,39 @@
+"""
+Sparse fieldsets for profile reads.
+
+    GET /student/me/a@b.com                          -> the endpoint's default fields
+    GET /student/me/a@b.com?fields=name,document_id  -> exactly those (plus id)
+
+Every read endpoint declares a Fieldset: the lean default a page usually needs
+and the opt-in fields (identity documents, inline media, embedded histories)
+that are only read from Mongo when a caller names them. Names map straight onto
+a find() projection; computed fields (like pending_earnings) are allowed in
+`fields=` but are not projected, the endpoint checks for them itself.
+"""
+from fastapi import HTTPException, Query
+
+FIELDS_QUERY = Query("", description="Comma-separated fields to return; empty for the endpoint's default set")
+
+
+class Fieldset:
+    def __init__(self, default: tuple, opt_in: tuple = (), computed: tuple = ()):
+        self.default = frozenset(default)
+        self.allowed = self.default | frozenset(opt_in) | frozenset(computed)
+        self.computed = frozenset(computed)
+
+    def select(self, fields: str = "") -> frozenset:
+        """Field names for a `fields=` value; 400 on a name the endpoint does not serve."""
+        names = frozenset(f.strip() for f in fields.split(",") if f.strip())
+        if not names:
+            return self.default
+        unknown = names - self.allowed
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(self.allowed))}",
+            )
+        return names
+
+    def projection(self, names: frozenset) -> dict:
+        # An empty projection would return the whole document
+        return {name: 1 for name in sorted(names - self.computed)} or {"_id": 1}
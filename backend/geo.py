@@ -0,0 +1,107 @@
+"""
+Location helpers for the nearby-worker and nearby-job searches.
+
+Workers and work listings store `geo`, a GeoJSON Point on a 2dsphere index, when
+the client sent browser coordinates. They always store `locality`, the normalized
+area name from the free-text location ("HSR Layout, Bangalore" -> "hsr layout"),
+which backs an equality lookup for records and clients without coordinates.
+
+Records written before `locality` existed are backfilled at startup (once per
+database, recorded in `meta`), together with `problem_type` on work listings
+seeded with only a `category` and `created_at` (from the ObjectId) where missing. To run it by hand:
+    python geo.py --backfill-locality
+"""
+import asyncio
+import re
+from pymongo import UpdateOne
+from datetime import datetime
+from database import daily_workers_col, meta_col, work_listings_col
+
+DEFAULT_RADIUS_KM = 5.0
+MAX_RADIUS_KM = 50.0
+BACKFILL_ID = "backfill_locality"
+BACKFILL_VERSION = 3  # bump when backfill_locality() learns a new field
+
+
+def point(lat, lng):
+    """GeoJSON Point (note the lng, lat order), or None without both coordinates."""
+    if lat is None or lng is None:
+        return None
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def normalize_locality(location: str) -> str:
+    area = (location or "").split(",")[0]
+    return re.sub(r"\W+", " ", area.lower()).strip()
+
+
+def geo_near(lat: float, lng: float, radius_km: float, query: dict, min_distance: float = None) -> dict:
+    """$geoNear stage returning documents within radius_km, nearest first, with distance_m."""
+    stage = {
+        "near": point(lat, lng),
+        "key": "geo",
+        "distanceField": "distance_m",
+        "maxDistance": radius_km * 1000,
+        "spherical": True,
+        "query": query,
+    }
+    if min_distance is not None:
+        stage["minDistance"] = min_distance
+    return {"$geoNear": stage}
+
+
+def _legacy_fields(doc: dict) -> dict:
+    fields = {}
+    if "locality" not in doc:
+        fields["locality"] = normalize_locality(doc.get("location"))
+    if "problem_type" not in doc and doc.get("category"):
+        fields["problem_type"] = doc["category"]  # seeded listings only had a category
+    if "created_at" not in doc:
+        fields["created_at"] = doc["_id"].generation_time.replace(tzinfo=None)  # feed order and cursors
+    return fields
+
+
+async def backfill_locality(batch_size: int = 500) -> dict:
+    """Set locality, created_at (and problem_type on listings) where missing; safe to re-run."""
+    filled = {}
+    for col, legacy in (
+        (daily_workers_col, {"$or": [{"locality": {"$exists": False}}, {"created_at": {"$exists": False}}]}),
+        (work_listings_col, {"$or": [{"locality": {"$exists": False}}, {"problem_type": {"$exists": False}},
+                                     {"created_at": {"$exists": False}}]}),
+    ):
+        ops, count = [], 0
+        projection = {"location": 1, "category": 1, "locality": 1, "problem_type": 1, "created_at": 1}
+        async for doc in col.find(legacy, projection):
+            fields = _legacy_fields(doc)
+            if not fields:
+                continue
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+            count += 1
+            if len(ops) >= batch_size:
+                await col.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            await col.bulk_write(ops, ordered=False)
+        filled[col.name] = count
+    return filled
+
+
+async def ensure_backfilled():
+    """Startup hook: run backfill_locality() once per database (and again after a version bump)."""
+    done = await meta_col.find_one({"_id": BACKFILL_ID}, {"version": 1})
+    if done and done.get("version", 0) >= BACKFILL_VERSION:
+        return
+    filled = await backfill_locality()
+    await meta_col.update_one(
+        {"_id": BACKFILL_ID}, {"$set": {"version": BACKFILL_VERSION, "at": datetime.utcnow(), "filled": filled}},
+        upsert=True,
+    )
+    if any(filled.values()):
+        print(f"✅ Backfilled locality/problem_type/created_at: {filled}")
+
+
+if __name__ == "__main__":
+    import sys
+    if "--backfill-locality" in sys.argv:
+        for name, count in asyncio.run(backfill_locality()).items():
+            print(f"✅ {name}: set locality on {count} documents")
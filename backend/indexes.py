@@ -0,0 +1,269 @@
+"""
+Declarative index manifest for every query shape the routers issue.
+
+INDEXES is the single source of truth: create_indexes() applies it at startup,
+diff_indexes() compares it against the live server and explain_shapes() asserts
+that no registered query shape plans a COLLSCAN.
+
+Run:
+    python indexes.py            # diff live indexes against the manifest
+    python indexes.py --apply    # create missing indexes, then diff
+    python indexes.py --explain  # apply, then exit 1 if any QUERY_SHAPES entry plans a COLLSCAN
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import OperationFailure
+from database import get_db
+
+OPEN = {"status": {"$eq": "open"}}
+
+# ── Manifest ───────────────────────────────────────────────────────────────────
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+    ],
+    "students": [
+        IndexModel([("user_email", ASCENDING)], name="user_email_1", unique=True),
+    ],
+    "quiz_attempts": [
+        # Append-only history: a student's attempts by month, newest first within a month
+        IndexModel([("user_email", ASCENDING), ("month", ASCENDING), ("submitted_at", DESCENDING)],
+                   name="user_month_submitted"),
+    ],
+    "daily_workers": [
+        IndexModel([("user_email", ASCENDING)], name="user_email_1", unique=True),
+        # /daily/nearby: $geoNear with coordinates, locality equality without
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+        IndexModel([("locality", ASCENDING), ("problem_type", ASCENDING)], name="locality_1_problem_type_1"),
+        IndexModel([("problem_type", ASCENDING)], name="problem_type_1"),  # /daily/nearby by type alone
+        IndexModel([("last_seen", ASCENDING)], name="last_seen_1"),  # dispatcher refresh
+    ],
+    "disability_users": [
+        IndexModel([("user_email", ASCENDING)], name="user_email_1", unique=True),
+        # Recommendation fan-out: users matching a new job by profession or any skill
+        IndexModel([("profession_key", ASCENDING)], name="profession_key_1"),
+        IndexModel([("skill_keys", ASCENDING)], name="skill_keys_1"),
+    ],
+    "recommendations": [
+        IndexModel([("user_email", ASCENDING)], name="user_email_1", unique=True),
+        IndexModel([("jobs.job_id", ASCENDING)], name="jobs.job_id_1"),  # pull taken jobs from every list
+    ],
+    "investments": [
+        IndexModel([("user_email", ASCENDING)], name="user_email_1", unique=True),
+    ],
+    "organizations": [
+        IndexModel([("field", ASCENDING), ("name", ASCENDING)], name="field_1_name_1"),
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+    "ledger": [
+        # Keyset pagination on (timestamp, _id); the typed variant serves ?type= filters
+        IndexModel([("user_email", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                   name="user_timeline"),
+        IndexModel([("user_email", ASCENDING), ("type", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                   name="user_type_timeline"),
+    ],
+    "ledger_rollups": [
+        IndexModel([("user_email", ASCENDING)], name="user_email_1", unique=True),
+    ],
+    "work_listings": [
+        # /daily/work feed: one partial index per (filter, sort) pair, open listings only
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="open_newest",
+                   partialFilterExpression=OPEN),
+        IndexModel([("problem_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="open_type_newest", partialFilterExpression=OPEN),
+        IndexModel([("pay", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="open_pay", partialFilterExpression=OPEN),
+        IndexModel([("problem_type", ASCENDING), ("pay", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="open_type_pay", partialFilterExpression=OPEN),
+        IndexModel([("locality", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="open_locality_newest", partialFilterExpression=OPEN),
+        # 2dsphere indexes skip documents without `geo`, so legacy listings cost nothing here
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ],
+    "offers": [
+        IndexModel([("listing_id", ASCENDING), ("worker_email", ASCENDING)], name="listing_worker", unique=True),
+        IndexModel([("worker_email", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+                   name="worker_status_created"),
+    ],
+    "disability_jobs": [
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="open_by_created",
+                   partialFilterExpression=OPEN),
+        # Recommendation watermark: open jobs in (created_at, _id) order, as on work_listings
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="open_newest",
+                   partialFilterExpression=OPEN),
+        IndexModel([("accepted_by", ASCENDING), ("status", ASCENDING)], name="accepted_by_1_status_1"),
+    ],
+}
+
+# ── Query shapes issued by the routers ─────────────────────────────────────────
+# Sample values only matter for the planner; keep one entry per distinct shape.
+# Left out on purpose: unfiltered reads capped by a limit (/daily/nearby with no
+# filters, the dispatcher's first worker load) and the one-off migration scans.
+QUERY_SHAPES = [
+    {"collection": "users", "filter": {"email": "x@example.com"}},
+    {"collection": "students", "filter": {"user_email": "x@example.com"}},
+    {"collection": "students", "filter": {"user_email": {"$in": ["x@example.com", "y@example.com"]}}},
+    {"collection": "quiz_attempts", "filter": {"user_email": "x@example.com"},
+     "sort": [("month", ASCENDING), ("submitted_at", DESCENDING)]},
+    {"collection": "quiz_attempts", "filter": {"user_email": "x@example.com", "month": 1},
+     "sort": [("submitted_at", DESCENDING)]},
+    {"collection": "daily_workers", "filter": {"user_email": "x@example.com"}},
+    {"collection": "daily_workers", "filter": {"locality": "koramangala"}},
+    {"collection": "daily_workers", "filter": {"locality": "koramangala", "problem_type": "Plumbing"}},
+    {"collection": "daily_workers", "filter": {"problem_type": "Plumbing"}},
+    {"collection": "daily_workers", "filter": {"last_seen": {"$gte": datetime(2024, 1, 1)}}},
+    {"collection": "disability_users", "filter": {"user_email": "x@example.com"}},
+    {"collection": "disability_users", "filter": {"_id": {"$gte": ObjectId("0" * 24), "$lt": ObjectId("f" * 24)}},
+     "sort": [("_id", ASCENDING)]},
+    {"collection": "disability_users",
+     "filter": {"$or": [{"profession_key": "tailor"}, {"skill_keys": {"$in": ["stitching", "embroidery"]}}]}},
+    {"collection": "recommendations", "filter": {"user_email": "x@example.com"}},
+    {"collection": "recommendations", "filter": {"jobs.job_id": {"$in": [ObjectId("0" * 24)]}}},
+    {"collection": "investments", "filter": {"user_email": "x@example.com"}},
+    {"collection": "organizations", "filter": {"field": "Scientist"}},
+    {"collection": "organizations", "filter": {"name": "ISRO"}},
+    {"collection": "ledger", "filter": {"user_email": "x@example.com"},
+     "sort": [("timestamp", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "ledger", "filter": {"user_email": "x@example.com", "type": "credit"},
+     "sort": [("timestamp", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "ledger", "filter": {}, "sort": [("_id", ASCENDING)]},
+    {"collection": "ledger_rollups", "filter": {"user_email": "x@example.com"}},
+    {"collection": "work_listings", "filter": {"status": "open"},
+     "sort": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "work_listings", "filter": {"status": "open", "problem_type": "Plumbing"},
+     "sort": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "work_listings", "filter": {"status": "open", "pay": {"$gte": 500}},
+     "sort": [("pay", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "work_listings", "filter": {"status": "open", "problem_type": "Plumbing"},
+     "sort": [("pay", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "work_listings", "filter": {"status": "open", "locality": "koramangala"},
+     "sort": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "work_listings",
+     "filter": {"status": "open", "created_at": {"$lte": datetime(2024, 1, 2)},
+                "$or": [{"created_at": {"$gt": datetime(2024, 1, 1)}},
+                        {"created_at": datetime(2024, 1, 1), "_id": {"$gt": ObjectId("0" * 24)}}]},
+     "sort": [("created_at", ASCENDING), ("_id", ASCENDING)]},
+    {"collection": "work_listings", "filter": {"_id": {"$in": [ObjectId("0" * 24)]}, "status": "open"}},
+    {"collection": "offers", "filter": {"worker_email": "x@example.com", "status": "pending"},
+     "sort": [("created_at", DESCENDING)]},
+    {"collection": "disability_jobs", "filter": {"status": "open"}},
+    {"collection": "disability_jobs", "filter": {"status": "open"},
+     "sort": [("created_at", ASCENDING), ("_id", ASCENDING)]},
+    {"collection": "disability_jobs", "filter": {"_id": {"$in": [ObjectId("0" * 24)]}}},
+    {"collection": "disability_jobs", "filter": {"_id": {"$in": [ObjectId("0" * 24)]}, "status": "open"}},
+    {"collection": "disability_jobs", "filter": {"status": "open", "created_at": {"$gt": datetime(2024, 1, 1)}},
+     "sort": [("created_at", ASCENDING), ("_id", ASCENDING)]},
+    {"collection": "disability_jobs",
+     "filter": {"status": "open", "created_at": {"$lte": datetime(2024, 1, 2)},
+                "$or": [{"created_at": {"$gt": datetime(2024, 1, 1)}},
+                        {"created_at": datetime(2024, 1, 1), "_id": {"$gt": ObjectId("0" * 24)}}]},
+     "sort": [("created_at", ASCENDING), ("_id", ASCENDING)]},
+    {"collection": "disability_jobs", "filter": {"status": "open"},
+     "sort": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "disability_jobs",
+     "filter": {"accepted_by": "x@example.com", "status": {"$in": ["in_progress", "completed", "approved"]}}},
+    {"collection": "disability_jobs", "filter": {"accepted_by": "x@example.com", "status": "completed"}},
+]
+
+
+def _spec(model: IndexModel) -> dict:
+    doc = model.document
+    return {
+        "key": list(doc["key"].items()),
+        "unique": bool(doc.get("unique", False)),
+        "partialFilterExpression": doc.get("partialFilterExpression"),
+    }
+
+
+def _live_spec(info: dict) -> dict:
+    return {
+        "key": [(field, int(d) if isinstance(d, float) else d) for field, d in info["key"]],
+        "unique": bool(info.get("unique", False)),
+        "partialFilterExpression": info.get("partialFilterExpression"),
+    }
+
+
+async def create_indexes():
+    db = get_db()
+    for name, models in INDEXES.items():
+        try:
+            await db[name].create_indexes(models)
+        except OperationFailure as e:
+            print(f"⚠️  Index creation warning ({name}): {e}")
+
+
+async def diff_indexes() -> dict:
+    """Compare live indexes with the manifest: {collection: {missing, changed, extra}}."""
+    db = get_db()
+    report = {}
+    for name, models in INDEXES.items():
+        live = {k: _live_spec(v) for k, v in (await db[name].index_information()).items() if k != "_id_"}
+        wanted = {m.document["name"]: _spec(m) for m in models}
+        missing = sorted(set(wanted) - set(live))
+        extra = sorted(set(live) - set(wanted))
+        changed = sorted(k for k in set(wanted) & set(live) if wanted[k] != live[k])
+        if missing or extra or changed:
+            report[name] = {"missing": missing, "changed": changed, "extra": extra}
+    return report
+
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for child in ("inputStage", "queryPlan"):
+        if child in plan:
+            yield from _stages(plan[child])
+    for sub in plan.get("inputStages", []):
+        yield from _stages(sub)
+
+
+async def explain_shapes() -> list:
+    """Return the QUERY_SHAPES entries whose winning plan contains a COLLSCAN."""
+    db = get_db()
+    scans = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        plan = (await cursor.explain())["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in set(_stages(plan)):
+            scans.append(shape)
+    return scans
+
+
+async def check_indexes():
+    """Startup check: print any drift between the live indexes and the manifest."""
+    try:
+        report = await diff_indexes()
+    except Exception as e:
+        print(f"⚠️  Index check skipped: {e}")
+        return
+    for name, drift in report.items():
+        print(f"⚠️  Index drift on {name}: {drift}")
+
+
+async def _main(args) -> int:
+    if args.apply or args.explain:
+        await create_indexes()
+    if args.explain:
+        scans = await explain_shapes()
+        for shape in scans:
+            print(f"❌ COLLSCAN: {shape['collection']} {shape['filter']} sort={shape.get('sort')}")
+        print(f"{'❌' if scans else '✅'} {len(QUERY_SHAPES) - len(scans)}/{len(QUERY_SHAPES)} query shapes use an index")
+        return 1 if scans else 0
+    report = await diff_indexes()
+    for name, drift in report.items():
+        print(f"{name}: {drift}")
+    if not report:
+        print("✅ Live indexes match the manifest")
+    return 1 if report else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="create missing indexes first")
+    parser.add_argument("--explain", action="store_true", help="fail if any query shape plans a COLLSCAN")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
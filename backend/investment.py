@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
-from database import daily_workers_col, investments_col, ledger_col
+from pymongo import ReturnDocument
+from database import daily_workers_col, investments_col, upsert_one
+from ledger import record_entry
 
 router = APIRouter(prefix="/investment", tags=["investment"])
 
@@ -18,31 +20,30 @@ class RecoverRequest(BaseModel):
 
 
 @router.post("/invest")
-def invest(req: InvestRequest):
-    worker = daily_workers_col.find_one({"user_email": req.user_email})
+async def invest(req: InvestRequest):
+    # Balance check lives in the filter: one round trip debits or matches nothing.
+    worker = await daily_workers_col.find_one_and_update(
+        {"user_email": req.user_email, "balance": {"$gte": INVEST_AMOUNT}},
+        {"$inc": {"balance": -INVEST_AMOUNT, "invested_amount": INVEST_AMOUNT}},
+        projection={"balance": 1},
+        return_document=ReturnDocument.AFTER,
+    )
     if not worker:
-        raise HTTPException(status_code=404, detail="Worker not found")
-    if worker["balance"] < INVEST_AMOUNT:
-        raise HTTPException(status_code=400, detail=f"Insufficient balance. Need ₹{INVEST_AMOUNT}, have ₹{worker['balance']}")
+        await _reject_debit(req.user_email)
 
     gold_grams = round(INVEST_AMOUNT / GOLD_PRICE, 6)
-    daily_workers_col.update_one({"user_email": req.user_email}, {"$inc": {"balance": -INVEST_AMOUNT, "invested_amount": INVEST_AMOUNT}})
-
-    inv = investments_col.find_one({"user_email": req.user_email})
-    if inv:
-        investments_col.update_one(
-            {"user_email": req.user_email},
-            {"$inc": {"total_invested": INVEST_AMOUNT, "gold_grams": gold_grams}}
-        )
-    else:
-        investments_col.insert_one({
-            "user_email": req.user_email,
-            "total_invested": INVEST_AMOUNT,
-            "gold_grams": gold_grams,
-            "created_at": datetime.utcnow(),
-        })
-
-    ledger_col.insert_one({
+    inv = await upsert_one(
+        investments_col,
+        {"user_email": req.user_email},
+        {
+            "$inc": {"total_invested": INVEST_AMOUNT, "gold_grams": gold_grams},
+            "$setOnInsert": {"created_at": datetime.utcnow()},
+        },
+        projection={"total_invested": 1, "gold_grams": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+
+    await record_entry({
         "user_email": req.user_email,
         "type": "debit",
         "amount": INVEST_AMOUNT,
@@ -50,20 +51,26 @@ def invest(req: InvestRequest):
         "timestamp": datetime.utcnow(),
     })
 
-    worker = daily_workers_col.find_one({"user_email": req.user_email})
-    inv = investments_col.find_one({"user_email": req.user_email})
     return {
         "invested": INVEST_AMOUNT,
         "gold_grams": gold_grams,
         "remaining_balance": worker["balance"],
-        "total_invested": inv["total_invested"] if inv else INVEST_AMOUNT,
-        "total_gold_grams": inv["gold_grams"] if inv else gold_grams,
+        "total_invested": inv["total_invested"],
+        "total_gold_grams": inv["gold_grams"],
     }
 
 
+async def _reject_debit(user_email: str):
+    """Failure path only: tell a missing worker apart from a short balance."""
+    worker = await daily_workers_col.find_one({"user_email": user_email}, {"balance": 1})
+    if not worker:
+        raise HTTPException(status_code=404, detail="Worker not found")
+    raise HTTPException(status_code=400, detail=f"Insufficient balance. Need ₹{INVEST_AMOUNT}, have ₹{worker['balance']}")
+
+
 @router.get("/status/{user_email}")
-def get_investment_status(user_email: str):
-    inv = investments_col.find_one({"user_email": user_email})
+async def get_investment_status(user_email: str):
+    inv = await investments_col.find_one({"user_email": user_email})
     if not inv:
         return {"total_invested": 0, "gold_grams": 0, "current_value": 0}
     current_value = round(inv["gold_grams"] * GOLD_PRICE * 1.015, 2)
@@ -76,26 +83,29 @@ def get_investment_status(user_email: str):
 
 
 @router.post("/recover")
-def recover(req: RecoverRequest):
-    inv = investments_col.find_one({"user_email": req.user_email})
-    if not inv or inv.get("total_invested", 0) == 0:
+async def recover(req: RecoverRequest):
+    # Zero the holding and read what it was in one step, so a double tap can't pay twice.
+    inv = await investments_col.find_one_and_update(
+        {"user_email": req.user_email, "total_invested": {"$gt": 0}},
+        {"$set": {"total_invested": 0, "gold_grams": 0}},
+        projection={"total_invested": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not inv:
         raise HTTPException(status_code=400, detail="No investments to recover")
 
     recovered = round(inv["total_invested"] * 1.015, 2)
-    daily_workers_col.update_one(
-        {"user_email": req.user_email},
-        {"$inc": {"balance": recovered}, "$set": {"invested_amount": 0}}
-    )
-    investments_col.update_one(
+    worker = await daily_workers_col.find_one_and_update(
         {"user_email": req.user_email},
-        {"$set": {"total_invested": 0, "gold_grams": 0}}
+        {"$inc": {"balance": recovered}, "$set": {"invested_amount": 0}},
+        projection={"balance": 1},
+        return_document=ReturnDocument.AFTER,
     )
-    ledger_col.insert_one({
+    await record_entry({
         "user_email": req.user_email,
         "type": "credit",
         "amount": recovered,
         "description": "Emergency gold recovery (1.5% appreciation)",
         "timestamp": datetime.utcnow(),
     })
-    worker = daily_workers_col.find_one({"user_email": req.user_email})
-    return {"recovered_amount": recovered, "new_balance": worker["balance"]}
+    return {"recovered_amount": recovered, "new_balance": worker["balance"] if worker else recovered}
@@ -0,0 +1,257 @@
+"""
+In-memory inverted index over open disability jobs for /disability/jobs.
+
+Every open job gets a sequence number in posting order, and each normalized
+skill and profession keeps a bitset of the sequence numbers that carry it. A
+query scores
+    match_score = 10 * (profession matches) + (number of shared skills)
+so a profession match outranks a non-match unless the non-match shares at least
+PROFESSION_WEIGHT more skills. Within the profession tier and the rest, every
+job's shared-skill count is kept bit-sliced: adding a skill's bitset is a
+ripple-carry add across log2(skills) ints, so all of the user's skills are
+counted however many there are. Jobs with an exact score are then read off the
+slices of both tiers from the highest score down, newest first, until the page
+is full. The bitsets are ANDed, ORed and XORed as Python ints, so a query is a
+few dozen C-level passes over 125 KB instead of a Python loop over every job.
+
+A bitset is sized by the newest sequence number it holds (about 125 KB per skill
+at 1M jobs), plus an int copy kept for queries until the next write touches it.
+Sequence numbers are reassigned from 1 when the index is reloaded at startup.
+
+The index is kept current from the job feed (created/claimed/completed events),
+which the routers emit on post/accept/complete and which a change stream
+delivers from every process on a replica set. Without one, events only reach the
+process that emitted them, so a background task polls for jobs posted since a
+created_at watermark (minus a grace window for inserts that commit late), and
+/disability/jobs evicts any ranked job it finds is no longer open.
+"""
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta
+from database import disability_jobs_col
+from feed import job_feed
+
+PROFESSION_WEIGHT = 10
+OPEN = ("open", "")
+POLL_SECONDS = float(os.getenv("JOB_INDEX_POLL_SECONDS", "5"))
+CATCH_UP_GRACE = timedelta(seconds=float(os.getenv("JOB_INDEX_GRACE_SECONDS", "30")))
+
+_NONZERO = re.compile(rb"[^\x00]")
+_BITS = [tuple(b for b in range(7, -1, -1) if v >> b & 1) for v in range(256)]  # set bits, high to low
+
+
+def normalize(value: str) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def _set(bits: bytearray, seq: int):
+    i = seq >> 3
+    if i >= len(bits):
+        bits.extend(bytes(i + 1 - len(bits)))
+    bits[i] |= 1 << (seq & 7)
+
+
+def _clear(bits: bytearray, seq: int):
+    i = seq >> 3
+    if i < len(bits):
+        bits[i] &= ~(1 << (seq & 7)) & 0xFF
+
+
+def _newest(bits: int, need: int) -> list:
+    """Up to `need` set bit positions of `bits`, highest (newest) first."""
+    out = []
+    if not bits or need <= 0:
+        return out
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "big")  # highest byte first
+    top, i = len(data) - 1, 0
+    while i <= top:
+        if not data[i]:
+            run = _NONZERO.search(data, i)  # skips an empty stretch in C
+            if run is None:
+                break
+            i = run.start()
+        base = (top - i) << 3
+        for b in _BITS[data[i]]:
+            out.append(base + b)
+            if len(out) == need:
+                return out
+        i += 1
+    return out
+
+
+def _counts(postings: list) -> list:
+    """Bit-sliced popcount: bit i of slices[i] at position seq is bit i of that job's count."""
+    slices = []
+    for carry in postings:
+        for i, bits in enumerate(slices):
+            if not carry:
+                break
+            slices[i], carry = bits ^ carry, bits & carry
+        if carry:
+            slices.append(carry)
+    return slices
+
+
+class _Tier:
+    """Shared-skill counts of the jobs in `universe`, bit-sliced."""
+
+    def __init__(self, postings: list, universe: int):
+        self.universe = universe
+        self.slices = _counts([p for p in (p & universe for p in postings) if p])
+        self.top = (1 << len(self.slices)) - 1  # no count exceeds this
+        self.matched = 0
+        for bits in self.slices:
+            self.matched |= bits
+
+    def exact(self, c: int) -> int:
+        """Bitset of the jobs sharing exactly c skills."""
+        if c == 0:
+            return self.universe & ~self.matched
+        if not 0 < c <= self.top:
+            return 0
+        exact = self.matched
+        for i, bits in enumerate(self.slices):
+            exact &= bits if c >> i & 1 else ~bits
+            if not exact:
+                break
+        return exact
+
+
+class JobIndex:
+    def __init__(self):
+        self._task = None
+        self._reset()
+
+    def _reset(self):
+        self.jobs = {}     # seq -> (job_id, profession, frozenset(skills))
+        self.seq_of = {}   # job_id -> seq; seq grows with posting order
+        self.bits = {}     # ("skill", s) | ("profession", p) | OPEN -> bytearray bitset of seq
+        self._ints = {}    # same keys -> int view of the bitset, dropped when it changes
+        self._seq = 0
+        self.loaded = False
+        self.watermark = None  # jobs created after this (less the grace) may be missing
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __contains__(self, job_id) -> bool:
+        return job_id in self.seq_of
+
+    def _mark(self, key: tuple, seq: int, on: bool):
+        if on:
+            _set(self.bits.setdefault(key, bytearray()), seq)
+        else:
+            _clear(self.bits[key], seq)
+        self._ints.pop(key, None)
+
+    def _view(self, key: tuple) -> int:
+        value = self._ints.get(key)
+        if value is None:
+            if key not in self.bits:
+                return 0  # unknown skills from a query are not cached
+            value = self._ints[key] = int.from_bytes(self.bits[key], "little")
+        return value
+
+    # ── Maintenance ────────────────────────────────────────────────────────────
+    def add(self, job_id, profession: str = "", skills=()):
+        self.remove(job_id)
+        self._seq += 1
+        seq = self._seq
+        profession = normalize(profession)
+        skills = frozenset(normalize(s) for s in skills if s)
+        self.jobs[seq] = (job_id, profession, skills)
+        self.seq_of[job_id] = seq
+        for key in self._keys(profession, skills):
+            self._mark(key, seq, True)
+
+    def remove(self, job_id):
+        seq = self.seq_of.pop(job_id, None)
+        if seq is None:
+            return
+        _, profession, skills = self.jobs.pop(seq)
+        for key in self._keys(profession, skills):
+            self._mark(key, seq, False)
+
+    @staticmethod
+    def _keys(profession: str, skills) -> list:
+        return [OPEN, ("profession", profession)] + [("skill", s) for s in skills]
+
+    def on_event(self, kind: str, doc: dict):
+        if kind == "created":
+            self.add(doc["_id"], doc.get("profession", ""), doc.get("required_skills", []))
+        else:
+            self.remove(doc["_id"])
+
+    async def load(self):
+        self._reset()
+        watermark = datetime.utcnow()
+        cursor = disability_jobs_col.find(
+            {"status": "open"}, {"profession": 1, "required_skills": 1},
+        ).sort([("created_at", 1), ("_id", 1)])
+        async for doc in cursor:
+            self.add(doc["_id"], doc.get("profession", ""), doc.get("required_skills", []))
+        self.watermark = watermark
+        self.loaded = True
+
+    async def catch_up(self) -> int:
+        """Add open jobs posted since the watermark that no event delivered; returns how many."""
+        watermark = datetime.utcnow()
+        cursor = disability_jobs_col.find(
+            {"status": "open", "created_at": {"$gt": self.watermark - CATCH_UP_GRACE}},
+            {"profession": 1, "required_skills": 1},
+        ).sort([("created_at", 1), ("_id", 1)])
+        added = 0
+        async for doc in cursor:
+            if doc["_id"] not in self:
+                self.add(doc["_id"], doc.get("profession", ""), doc.get("required_skills", []))
+                added += 1
+        self.watermark = watermark
+        return added
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(POLL_SECONDS)
+            if job_feed.mode == "change_stream" or not self.loaded:
+                continue  # the stream already delivers posts from every process
+            try:
+                await self.catch_up()
+            except Exception as e:
+                print(f"⚠️  Job index catch-up failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # ── Queries ────────────────────────────────────────────────────────────────
+    def top(self, profession: str = "", skills=(), offset: int = 0, limit: int = 20) -> list:
+        """Page of (job_id, match_score, shared_skill_count): match_score desc, newest first on ties."""
+        profession = normalize(profession)
+        skills = {normalize(s) for s in skills if s}
+        postings = [self._view(("skill", s)) for s in skills]
+        need = offset + limit
+
+        everything = self._view(OPEN)
+        in_tier = self._view(("profession", profession)) & everything if profession else 0
+        tiers = [(PROFESSION_WEIGHT, _Tier(postings, in_tier)), (0, _Tier(postings, everything & ~in_tier))]
+        ranked, seen = [], 0
+        for score in range(max(weight + tier.top for weight, tier in tiers), -1, -1):
+            if len(ranked) >= need or seen == everything:
+                break
+            hits = 0
+            for weight, tier in tiers:
+                hits |= tier.exact(score - weight)
+            if hits:
+                for seq in _newest(hits, need - len(ranked)):
+                    ranked.append((seq, score, score - PROFESSION_WEIGHT if in_tier >> seq & 1 else score))
+                seen |= hits
+        return [(self.jobs[seq][0], score, shared) for seq, score, shared in ranked[offset:need]]
+
+
+job_index = JobIndex()
+job_feed.listen("disability", job_index.on_event)
@@ -0,0 +1,23 @@
+"""
+Opaque keyset-pagination cursors, shared by /daily/work and /ledger/{email}.
+
+A cursor is the sort key of the last row a page returned, as URL-safe base64
+JSON without padding. Each endpoint decides what goes in it and passes a parser
+that rebuilds the values; a token that does not decode or parse is a 400.
+"""
+import base64
+import json
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+
+def encode_cursor(raw: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, parse):
+    """parse(raw dict) for a cursor made by encode_cursor; 400 on anything malformed."""
+    try:
+        return parse(json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))))
+    except (ValueError, KeyError, TypeError, AttributeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,14 +1,212 @@
-from fastapi import APIRouter, HTTPException
-from database import ledger_col
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+from bson import ObjectId
+import asyncio
+import csv
+import io
+import json
+import zlib
+from database import ledger_col, ledger_rollups_col
+from keyset import decode_cursor, encode_cursor
+from ledger_writer import ledger_writer
 
 router = APIRouter(prefix="/ledger", tags=["ledger"])
 
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 1000      # documents per server-side cursor batch
+EXPORT_CHUNK_BYTES = 64 * 1024  # flush the response buffer at this size
+EXPORT_COLUMNS = ["id", "user_email", "type", "amount", "description", "timestamp"]
+
+
+# ── Write path ─────────────────────────────────────────────────────────────────
+async def record_entry(entry: dict, durable: bool = False):
+    """Queue a ledger entry; the writer folds it into the user's rollup on flush.
+
+    Every money-moving endpoint goes through here so ledger_rollups stays in step
+    with ledger_col; `python ledger.py --rebuild-rollups` repairs any drift.
+    Pass durable=True to wait until the batch holding the entry is acknowledged.
+    """
+    await ledger_writer.submit(entry, durable=durable)
+
+
+async def rebuild_rollups():
+    """Recompute every user's rollup from ledger_col in one aggregation.
+
+    Increments that land while the pipeline runs can be overwritten, so run it
+    in a quiet period (or run it twice).
+    """
+    pipeline = [
+        {"$group": {
+            "_id": {"user_email": "$user_email", "type": "$type"},
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1},
+            "last": {"$max": "$timestamp"},
+        }},
+        {"$group": {
+            "_id": "$_id.user_email",
+            "by_type": {"$push": {"type": "$_id.type", "total": "$total", "count": "$count"}},
+            "entry_count": {"$sum": "$count"},
+            "last_entry_at": {"$max": "$last"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_email": "$_id",
+            "totals": {"$arrayToObject": {"$map": {"input": "$by_type", "in": {"k": "$$this.type", "v": "$$this.total"}}}},
+            "counts": {"$arrayToObject": {"$map": {"input": "$by_type", "in": {"k": "$$this.type", "v": "$$this.count"}}}},
+            "entry_count": 1,
+            "last_entry_at": 1,
+        }},
+        {"$merge": {"into": "ledger_rollups", "on": "user_email", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    await ledger_col.aggregate(pipeline, allowDiskUse=True).to_list(None)
+
+
+# ── Keyset cursor ──────────────────────────────────────────────────────────────
+# Pages walk (timestamp desc, _id desc) on the (user_email, [type,] timestamp, _id)
+# indexes, so page N costs the same as page 1. The token is opaque to clients.
+def _encode_cursor(entry: dict) -> str:
+    return encode_cursor({"t": entry["timestamp"].isoformat(), "i": str(entry["_id"])})
+
+
+def _decode_cursor(token: str):
+    return decode_cursor(token, lambda raw: (datetime.fromisoformat(raw["t"]), ObjectId(raw["i"])))
+
+
+def _entry(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "user_email": doc.get("user_email"),
+        "type": doc.get("type"),
+        "amount": doc.get("amount"),
+        "description": doc.get("description", ""),
+        "timestamp": doc["timestamp"].isoformat() if doc.get("timestamp") else None,
+    }
+
+
+# ── Export ─────────────────────────────────────────────────────────────────────
+async def _export_chunks(query: dict, sort: list, fmt: str, compress: bool):
+    """Yield the export in ~64 KB chunks; only one cursor batch is ever resident."""
+    gz = zlib.compressobj(wbits=31) if compress else None  # wbits=31 → gzip framing
+    buf = io.StringIO()
+    writer = csv.writer(buf) if fmt == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+
+    def drain() -> bytes:
+        data = buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+        return gz.compress(data) if gz else data
+
+    docs = ledger_col.find(query).sort(sort).batch_size(EXPORT_BATCH_SIZE)
+    async for doc in docs:
+        row = _entry(doc)
+        if writer:
+            writer.writerow([row[c] for c in EXPORT_COLUMNS])
+        else:
+            buf.write(json.dumps(row, ensure_ascii=False))
+            buf.write("\n")
+        if buf.tell() >= EXPORT_CHUNK_BYTES:
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+    tail = drain()
+    if gz:
+        tail += gz.flush()
+    if tail:
+        yield tail
+
+
+@router.get("/export")
+async def export_ledger(
+    user_email: Optional[str] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+):
+    """Stream one user's ledger, or every user's for reconciliation, as NDJSON or CSV."""
+    if user_email:
+        query = {"user_email": user_email}
+        sort = [("timestamp", -1), ("_id", -1)]
+    else:
+        query, sort = {}, [("_id", 1)]
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"ledger-{user_email or 'all'}.{format}"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+    return StreamingResponse(
+        _export_chunks(query, sort, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/{user_email}/summary")
+async def get_summary(user_email: str):
+    """Credit/debit totals from the rollup — one indexed document read."""
+    rollup = await ledger_rollups_col.find_one({"user_email": user_email}) or {}
+    totals, counts = rollup.get("totals", {}), rollup.get("counts", {})
+    last = rollup.get("last_entry_at")
+    return {
+        "user_email": user_email,
+        "credit_total": totals.get("credit", 0),
+        "debit_total": totals.get("debit", 0),
+        "net": totals.get("credit", 0) - totals.get("debit", 0),
+        "credit_count": counts.get("credit", 0),
+        "debit_count": counts.get("debit", 0),
+        "entry_count": rollup.get("entry_count", 0),
+        "last_entry_at": last.isoformat() if last else None,
+    }
+
 
 @router.get("/{user_email}")
-def get_ledger(user_email: str):
-    entries = list(ledger_col.find({"user_email": user_email}).sort("timestamp", -1).limit(50))
-    for e in entries:
-        e["id"] = str(e.pop("_id"))
-        if "timestamp" in e:
-            e["timestamp"] = e["timestamp"].isoformat()
-    return entries
+async def get_ledger(
+    user_email: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    query = {"user_email": user_email}
+    if type:
+        query["type"] = type
+
+    ts_range = {}
+    if since:
+        ts_range["$gte"] = since
+    if until:
+        ts_range["$lt"] = until
+    if cursor:
+        ts, oid = _decode_cursor(cursor)
+        # $lte bounds the index scan; the $or breaks ties on _id within one timestamp
+        ts_range["$lte"] = ts
+        query["$or"] = [{"timestamp": {"$lt": ts}}, {"_id": {"$lt": oid}}]
+    if ts_range:
+        query["timestamp"] = ts_range
+
+    docs = ledger_col.find(query).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1)
+    entries, last, has_more = [], None, False
+    async for doc in docs:
+        if len(entries) == limit:
+            has_more = True  # the extra row only signals another page
+            break
+        entries.append(_entry(doc))
+        last = doc
+
+    return {
+        "entries": entries,
+        "next_cursor": _encode_cursor(last) if has_more else None,
+        "limit": limit,
+    }
+
+
+if __name__ == "__main__":
+    # Run: python ledger.py --rebuild-rollups
+    import sys
+    if "--rebuild-rollups" in sys.argv:
+        asyncio.run(rebuild_rollups())
+        print("✅ Ledger rollups rebuilt")
@@ -0,0 +1,251 @@
+"""
+Coalesced write-behind queue for ledger entries.
+
+Endpoints hand entries to `ledger_writer.submit()` and return; a background task
+flushes the buffer with one `insert_many(ordered=False)` plus one rollup
+`bulk_write` whenever it reaches LEDGER_FLUSH_SIZE entries or the oldest entry
+has waited LEDGER_FLUSH_MS. `durable=True` callers await the flush acknowledgment.
+
+The balance an entry records has already moved when it is submitted, so a failed
+flush does not drop it: the rows that did not land go back to the front of the
+buffer and are retried with exponential backoff, up to LEDGER_MAX_ATTEMPTS. Each
+entry gets its _id on submit, so a retried insert that already landed is a
+duplicate-key error and is counted as written. Rows that were inserted but whose
+rollup failed only retry the rollup.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from database import DUPLICATE_KEY, ledger_col, ledger_rollups_col, percentile_ms
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = int(os.getenv("LEDGER_FLUSH_SIZE", "500"))
+FLUSH_MS = float(os.getenv("LEDGER_FLUSH_MS", "20"))
+MAX_QUEUE = int(os.getenv("LEDGER_MAX_QUEUE", "50000"))  # beyond this, submit() waits for the flush
+MAX_ATTEMPTS = int(os.getenv("LEDGER_MAX_ATTEMPTS", "8"))
+RETRY_BASE_MS = float(os.getenv("LEDGER_RETRY_BASE_MS", "100"))
+RETRY_MAX_MS = float(os.getenv("LEDGER_RETRY_MAX_MS", "5000"))
+
+
+def _rollup_updates(entries: list) -> list:
+    """Fold a batch into one upsert per user."""
+    per_user = {}
+    for e in entries:
+        u = per_user.setdefault(e["user_email"], {"inc": {"entry_count": 0}, "last": e["timestamp"]})
+        inc = u["inc"]
+        inc[f"totals.{e['type']}"] = inc.get(f"totals.{e['type']}", 0) + e["amount"]
+        inc[f"counts.{e['type']}"] = inc.get(f"counts.{e['type']}", 0) + 1
+        inc["entry_count"] += 1
+        u["last"] = max(u["last"], e["timestamp"])
+    return [
+        UpdateOne({"user_email": email}, {"$inc": u["inc"], "$max": {"last_entry_at": u["last"]}}, upsert=True)
+        for email, u in per_user.items()
+    ]
+
+
+async def insert_entries(entries: list) -> set:
+    """Insert a batch; returns the indexes of the rows that did not land.
+
+    A duplicate _id means an earlier attempt landed the row, so it counts as
+    inserted. Anything but a per-row write error (network, timeout) raises.
+    """
+    try:
+        await ledger_col.insert_many(entries, ordered=False)
+    except BulkWriteError as e:
+        return {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY}
+    return set()
+
+
+async def fold_rollups(entries: list) -> set:
+    """Apply the batch's rollup increments; returns the users whose upsert did not apply."""
+    ops = _rollup_updates(entries)
+    if not ops:
+        return set()
+    try:
+        await ledger_rollups_col.bulk_write(ops, ordered=False)
+    except BulkWriteError as error:
+        users = list(dict.fromkeys(e["user_email"] for e in entries))  # the order _rollup_updates emits
+        return {users[err["index"]] for err in error.details.get("writeErrors", [])}
+    return set()
+
+
+async def write_entries(entries: list):
+    """Insert a batch and fold the entries that landed into their rollups (write-through path)."""
+    for entry in entries:
+        entry.setdefault("_id", ObjectId())
+    failed = await insert_entries(entries)
+    stale = await fold_rollups([entry for i, entry in enumerate(entries) if i not in failed])
+    if failed or stale:
+        raise RuntimeError(f"{len(failed)} of {len(entries)} ledger entries were not written, "
+                           f"{len(stale)} rollups not updated")
+
+
+class _Pending:
+    __slots__ = ("entry", "future", "attempts", "inserted")
+
+    def __init__(self, entry: dict, future):
+        self.entry = entry
+        self.future = future
+        self.attempts = 0
+        self.inserted = False  # landed in ledger_col; only the rollup is outstanding
+
+
+class LedgerWriter:
+    def __init__(self, flush_size: int = FLUSH_SIZE, flush_ms: float = FLUSH_MS, max_queue: int = MAX_QUEUE):
+        self.flush_size = flush_size
+        self.flush_delay = flush_ms / 1000
+        self.max_queue = max_queue
+        self._buffer = []            # [_Pending]
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+        self._closing = False
+        self._retry_at = 0.0         # monotonic time before which a failed flush is not retried
+        self._failures = 0           # consecutive failed flushes, for the backoff
+        # metrics
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0              # entries given up on after MAX_ATTEMPTS
+        self.retries = 0
+        self.flushes = 0
+        self._flush_ms = deque(maxlen=1024)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, entry: dict, durable: bool = False):
+        # Outside the app (CLI scripts, seeding) there is no flusher — write through.
+        if not self.running:
+            await write_entries([entry])
+            self.written += 1
+            return
+        durable = durable or len(self._buffer) >= self.max_queue
+        future = asyncio.get_running_loop().create_future() if durable else None
+        entry.setdefault("_id", ObjectId())  # makes a retried insert idempotent
+        self._buffer.append(_Pending(entry, future))
+        self.enqueued += 1
+        self._pending.set()
+        if len(self._buffer) >= self.flush_size:
+            self._full.set()
+        if future:
+            await future
+
+    async def drain(self):
+        """Flush everything still buffered and stop; called on app shutdown."""
+        if not self.running:
+            return
+        self._closing = True
+        self._pending.set()
+        self._full.set()
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await self._pending.wait()
+            backoff = self._retry_at - time.monotonic()
+            if backoff > 0:
+                await asyncio.sleep(backoff)
+            if not self._closing:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.flush_delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush()
+            if self._closing and not self._buffer:
+                return
+
+    async def _flush(self):
+        batch, self._buffer = self._buffer[:self.flush_size], self._buffer[self.flush_size:]
+        if len(self._buffer) < self.flush_size:
+            self._full.clear()
+        if not self._buffer:
+            self._pending.clear()
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        error = None
+        to_insert = [p for p in batch if not p.inserted]
+        try:
+            unlanded = await insert_entries([p.entry for p in to_insert])
+            for i, p in enumerate(to_insert):
+                p.inserted = i not in unlanded
+            if unlanded:
+                error = RuntimeError(f"{len(unlanded)} ledger rows rejected")
+        except Exception as e:
+            error = e  # nothing is known to have landed; duplicates sort it out on retry
+        landed = [p for p in batch if p.inserted]
+        try:
+            stale = await fold_rollups([p.entry for p in landed])
+            if stale:
+                error = RuntimeError(f"rollups for {len(stale)} users rejected")
+        except Exception as e:
+            error = e
+            stale = {p.entry["user_email"] for p in landed}
+        done = [p for p in landed if p.entry["user_email"] not in stale]
+        retry = [p for p in batch if not p.inserted or p.entry["user_email"] in stale]
+        self.flushes += 1
+        self._flush_ms.append((time.perf_counter() - started) * 1000)
+
+        self.written += len(done)
+        for p in done:
+            if p.future and not p.future.done():
+                p.future.set_result(None)
+        if retry:
+            self._retry(retry, error)
+        else:
+            self._failures = 0
+            self._retry_at = 0.0
+
+    def _retry(self, pending: list, error: Exception):
+        """Put failed entries back at the front with backoff; give up on those out of attempts."""
+        again = []
+        for p in pending:
+            p.attempts += 1
+            if p.attempts < MAX_ATTEMPTS:
+                again.append(p)
+                continue
+            self.failed += 1
+            logger.error("Ledger entry dropped after %d attempts (%s): %r", p.attempts, error, p.entry)
+            if p.future and not p.future.done():
+                p.future.set_exception(error)
+        self._failures += 1
+        delay = min(RETRY_MAX_MS, RETRY_BASE_MS * 2 ** (self._failures - 1)) / 1000
+        self._retry_at = time.monotonic() + delay
+        logger.warning("Ledger flush failed for %d entries, retrying %d in %.2fs: %s",
+                       len(pending), len(again), delay, error)
+        if again:
+            self.retries += len(again)
+            self._buffer[:0] = again
+            self._pending.set()
+            if len(self._buffer) >= self.flush_size:
+                self._full.set()
+
+    def snapshot(self) -> dict:
+        samples = sorted(self._flush_ms)
+        return {
+            "running": self.running,
+            "queue_depth": len(self._buffer),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "flush_ms": {"p50": percentile_ms(samples, 50), "p99": percentile_ms(samples, 99), "max": round(samples[-1], 3) if samples else 0.0},
+        }
+
+
+ledger_writer = LedgerWriter()
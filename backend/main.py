@@ -1,8 +1,18 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from database import create_indexes
+from database import ping, close_client, pool_monitor
+from indexes import create_indexes, check_indexes
+from ledger_writer import ledger_writer
+from catalog import catalog
+from curriculum import curricula
+from dispatch import dispatcher
+from feed import job_feed
+from geo import ensure_backfilled
+from job_index import job_index
+from recommend import recommender
 from seed import seed
-import auth, student, daily_worker, investment, disability, ledger
+import auth, student, daily_worker, investment, disability, ledger, media, feed
 
 app = FastAPI(title="EquiBridge API", version="2.0.0")
 
@@ -16,19 +26,61 @@ app.add_middleware(
 
 
 @app.on_event("startup")
-def startup():
-    create_indexes()
-    seed()
+async def startup():
+    await ping()
+    await create_indexes()
+    await check_indexes()
+    await seed()
+    await ensure_backfilled()  # location searches match on locality
+    ledger_writer.start()
+    await catalog.load()
+    catalog.start()
+    curricula.start()
+    dispatcher.start()
+    await job_feed.start()
+    await job_index.load()
+    job_index.start()
+    await recommender.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await catalog.stop()
+    await curricula.stop()
+    await dispatcher.stop()
+    await job_feed.stop()
+    await job_index.stop()
+    await recommender.stop()
+    await ledger_writer.drain()
+    close_client()
 
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "Welcome to EquiBridge API ", "docs": "/docs", "version": "2.0.0", "db": "MongoDB"}
 
 
+@app.get("/health/ready")
+async def ready():
+    """Readiness probe: DB reachable, plus pool checkout wait times for sizing."""
+    ok = await ping(log=False)
+    body = {
+        "status": "ready" if ok else "unavailable",
+        "pool": pool_monitor.snapshot(),
+        "ledger_writer": ledger_writer.snapshot(),
+        "dispatch": dispatcher.snapshot(),
+        "feed": job_feed.snapshot(),
+        "recommend": recommender.snapshot(),
+        "curriculum": curricula.snapshot(),
+    }
+    return JSONResponse(body, status_code=200 if ok else 503)
+
+
 app.include_router(auth.router)
 app.include_router(student.router)
 app.include_router(daily_worker.router)
 app.include_router(investment.router)
 app.include_router(disability.router)
 app.include_router(ledger.router)
+app.include_router(media.router)
+app.include_router(feed.router)
@@ -0,0 +1,367 @@
+"""
+Content-addressed media store.
+
+Uploads are hashed (SHA-256) while they stream to disk and stored once under
+MEDIA_ROOT/ab/cd/<hash>, with a small <hash>.json sidecar holding the content
+type. Documents keep only the hash (`photo_id`, `completion_video_id`), and
+responses expose it as `/media/<hash>`. The bytes never change for a given ID,
+so they are served with Range support and an immutable Cache-Control.
+Only image and video types are accepted (415 otherwise, SVG included), and every
+response carries X-Content-Type-Options: nosniff.
+
+Images also get fixed-size WebP thumbnails (`/media/<hash>/thumb/<size>`), built
+once on a background thread pool right after the upload is stored; list
+endpoints reference only those.
+
+Extract inline data: URLs that older clients stored in documents:
+    python media.py --migrate
+Build thumbnails for media stored before thumbnails existed:
+    python media.py --thumbnails
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from pymongo import UpdateOne
+from starlette.concurrency import run_in_threadpool
+from database import get_db
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None  # Pillow not installed: thumbnail URLs redirect to the original
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "media_store"))
+MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(25 * 1024 * 1024)))
+READ_CHUNK = 64 * 1024
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+THUMB_SIZES = (96, 320)  # avatar / card preview, longest edge in px
+THUMB_QUALITY = 70
+
+_thumb_pool = ThreadPoolExecutor(max_workers=int(os.getenv("MEDIA_THUMB_WORKERS", "2")), thread_name_prefix="thumb")
+
+# Only images and video are stored; anything else served from the API origin could be
+# rendered by the browser (text/html, SVG with scripts). Responses also carry nosniff.
+SAFE_TYPES = ("image/", "video/")
+UNSAFE_TYPES = {"image/svg+xml"}
+
+_MEDIA_ID = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?(;[^,]*)?,", re.IGNORECASE)
+
+
+def media_type(content_type: str) -> str:
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def is_safe_type(content_type: str) -> bool:
+    kind = media_type(content_type)
+    return kind.startswith(SAFE_TYPES) and kind not in UNSAFE_TYPES
+
+
+def require_safe_type(content_type: str) -> str:
+    if not is_safe_type(content_type):
+        raise HTTPException(status_code=415, detail="Only image and video uploads are accepted")
+    return media_type(content_type)
+
+
+# ── Storage ────────────────────────────────────────────────────────────────────
+def _path(media_id: str) -> str:
+    return os.path.join(MEDIA_ROOT, media_id[:2], media_id[2:4], media_id)
+
+
+def media_url(media_id: str) -> str:
+    return f"/media/{media_id}"
+
+
+def exists(media_id: str) -> bool:
+    return bool(media_id) and bool(_MEDIA_ID.match(media_id)) and os.path.exists(_path(media_id))
+
+
+def _commit(tmp_path: str, media_id: str, content_type: str) -> str:
+    """Move a fully written temp file into place; identical content is kept once."""
+    final = _path(media_id)
+    if os.path.exists(final):
+        os.remove(tmp_path)  # dedup: same bytes already stored
+        return media_id
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    with open(final + ".json", "w") as f:
+        json.dump({"content_type": content_type, "size": os.path.getsize(tmp_path)}, f)
+    os.replace(tmp_path, final)
+    schedule_thumbnails(media_id, content_type)
+    return media_id
+
+
+def _tmp_file():
+    os.makedirs(MEDIA_ROOT, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=MEDIA_ROOT, prefix=".upload-", delete=False)
+
+
+def _discard(tmp_path: str):
+    """Remove a temp file an upload left behind; it is gone already once committed."""
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+def store_bytes(data: bytes, content_type: str) -> str:
+    media_id = hashlib.sha256(data).hexdigest()
+    if os.path.exists(_path(media_id)):
+        return media_id
+    tmp = _tmp_file()
+    try:
+        with tmp:
+            tmp.write(data)
+        return _commit(tmp.name, media_id, content_type)
+    except BaseException:
+        _discard(tmp.name)
+        raise
+
+
+def _meta(media_id: str) -> dict:
+    try:
+        with open(_path(media_id) + ".json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"content_type": "application/octet-stream", "size": os.path.getsize(_path(media_id))}
+
+
+# ── Thumbnails ─────────────────────────────────────────────────────────────────
+def _thumb_path(media_id: str, size: int) -> str:
+    return f"{_path(media_id)}.{size}.webp"
+
+
+def thumb_url(media_id: str, size: int) -> str:
+    return f"/media/{media_id}/thumb/{size}"
+
+
+def make_thumbnails(media_id: str):
+    """Decode once, write every THUMB_SIZES variant. Runs on the thumbnail pool."""
+    if Image is None:
+        return
+    try:
+        with Image.open(_path(media_id)) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            for size in THUMB_SIZES:
+                out = _thumb_path(media_id, size)
+                if os.path.exists(out):
+                    continue
+                thumb = img.copy()
+                thumb.thumbnail((size, size))
+                thumb.save(out + ".tmp", "WEBP", quality=THUMB_QUALITY, method=4)
+                os.replace(out + ".tmp", out)
+    except Exception as e:
+        print(f"⚠️  Thumbnail failed for {media_id}: {e}")
+
+
+def schedule_thumbnails(media_id: str, content_type: str):
+    if Image is not None and content_type.startswith("image/"):
+        _thumb_pool.submit(make_thumbnails, media_id)
+
+
+def parse_data_url(value: str):
+    """Return (bytes, content_type) for a data: URL, or None for anything else."""
+    match = _DATA_URL.match(value or "")
+    if not match:
+        return None
+    payload = value[match.end():]
+    try:
+        data = base64.b64decode(payload) if ";base64" in (match.group(2) or "").lower() else payload.encode()
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Malformed data URL")
+    return data, match.group(1) or "application/octet-stream"
+
+
+async def resolve_media(media_id: str = "", url: str = "") -> tuple:
+    """Map a request's media reference to the (id, url) pair stored on a document.
+
+    New clients upload to POST /media and send the ID; an inline data: URL from an
+    older client is extracted into the store here, so only the hash is persisted.
+    Any other URL (e.g. external links) is kept as-is.
+    """
+    if media_id:
+        if not await run_in_threadpool(exists, media_id):
+            raise HTTPException(status_code=400, detail="Unknown media ID")
+        return media_id, ""
+    inline = parse_data_url(url)
+    if inline:
+        if len(inline[0]) > MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Media too large")
+        data, content_type = inline
+        return await run_in_threadpool(store_bytes, data, require_safe_type(content_type)), ""
+    return "", url or ""
+
+
+def with_media_urls(doc: dict) -> dict:
+    """Expose stored media IDs as URLs in API responses."""
+    if doc and doc.get("photo_id"):
+        doc["photo_url"] = media_url(doc["photo_id"])
+    if doc and doc.get("completion_video_id"):
+        doc["completion_video_url"] = media_url(doc["completion_video_id"])
+    return doc
+
+
+def with_thumbnail_urls(doc: dict) -> dict:
+    """List views: point photo_url at the card-size thumbnail, thumb_url at the avatar."""
+    photo_id = doc.pop("photo_id", "")
+    if photo_id:
+        doc["photo_url"] = thumb_url(photo_id, THUMB_SIZES[-1])
+        doc["thumb_url"] = thumb_url(photo_id, THUMB_SIZES[0])
+    elif (doc.get("photo_url") or "").startswith("data:"):
+        doc["photo_url"] = ""  # not migrated yet; never ship inline bytes in a list
+    return doc
+
+
+# ── Endpoints ──────────────────────────────────────────────────────────────────
+@router.post("")
+async def upload_media(file: UploadFile = File(...)):
+    content_type = require_safe_type(file.content_type)
+    digest, size = hashlib.sha256(), 0
+    tmp = _tmp_file()
+    try:
+        with tmp:
+            while chunk := await file.read(READ_CHUNK):
+                size += len(chunk)
+                if size > MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Media too large")
+                digest.update(chunk)
+                await run_in_threadpool(tmp.write, chunk)
+        media_id = digest.hexdigest()
+        await run_in_threadpool(_commit, tmp.name, media_id, content_type)
+    except BaseException:
+        # Too large, a client disconnect, a failed write or commit: never leave .upload-* behind
+        _discard(tmp.name)
+        raise
+    return {"id": media_id, "url": media_url(media_id), "size": size}
+
+
+def _iter_file(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(READ_CHUNK, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _parse_range(header: str, size: int):
+    match = re.match(r"^bytes=(\d*)-(\d*)$", header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":  # suffix range: last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+@router.get("/{media_id}")
+async def get_media(media_id: str, request: Request):
+    if not await run_in_threadpool(exists, media_id):
+        raise HTTPException(status_code=404, detail="Media not found")
+    meta = await run_in_threadpool(_meta, media_id)
+    size = meta["size"]
+    headers = {"ETag": f'"{media_id}"', "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes",
+               "X-Content-Type-Options": "nosniff"}
+    if not is_safe_type(meta["content_type"]):
+        headers["Content-Disposition"] = "attachment"  # stored before uploads were restricted
+
+    if request.headers.get("if-none-match", "").strip('W/"') == media_id:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = _parse_range(request.headers["range"], size) if "range" in request.headers else None
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        status, length = 206, end - start + 1
+    else:
+        start, status, length = 0, 200, size
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(_iter_file(_path(media_id), start, length), status_code=status,
+                             media_type=meta["content_type"], headers=headers)
+
+
+@router.get("/{media_id}/thumb/{size}")
+async def get_thumbnail(media_id: str, size: int):
+    if size not in THUMB_SIZES or not await run_in_threadpool(exists, media_id):
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    path = _thumb_path(media_id, size)
+    if not await run_in_threadpool(os.path.exists, path):
+        # Not an image, Pillow missing, or still being generated
+        return RedirectResponse(media_url(media_id), status_code=307)
+
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+
+    return Response(await run_in_threadpool(read), media_type="image/webp",
+                    headers={"ETag": f'"{media_id}-{size}"', "Cache-Control": CACHE_CONTROL})
+
+
+# ── Migration ──────────────────────────────────────────────────────────────────
+MIGRATIONS = [
+    # (collection, inline url field, id field)
+    ("daily_workers", "photo_url", "photo_id"),
+    ("work_listings", "photo_url", "photo_id"),
+    ("work_listings", "completion_video_url", "completion_video_id"),
+]
+
+
+async def migrate_inline_media(batch_size: int = 200) -> dict:
+    db = get_db()
+    moved = {}
+    for collection, url_field, id_field in MIGRATIONS:
+        col, ops, count = db[collection], [], 0
+        async for doc in col.find({url_field: {"$regex": "^data:"}}, {url_field: 1}):
+            try:
+                inline = parse_data_url(doc[url_field])
+            except HTTPException:
+                print(f"⚠️  Skipping malformed data URL in {collection} {doc['_id']}")
+                continue
+            if not is_safe_type(inline[1]):
+                print(f"⚠️  Skipping {inline[1]} data URL in {collection} {doc['_id']} (not an image or video)")
+                continue
+            media_id = await run_in_threadpool(store_bytes, inline[0], media_type(inline[1]))
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {id_field: media_id, url_field: ""}}))
+            count += 1
+            if len(ops) >= batch_size:
+                await col.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            await col.bulk_write(ops, ordered=False)
+        moved[f"{collection}.{url_field}"] = count
+    return moved
+
+
+def backfill_thumbnails() -> int:
+    built = 0
+    for dirpath, _, files in os.walk(MEDIA_ROOT):
+        for name in files:
+            if _MEDIA_ID.match(name) and _meta(name)["content_type"].startswith("image/"):
+                if not all(os.path.exists(_thumb_path(name, s)) for s in THUMB_SIZES):
+                    make_thumbnails(name)
+                    built += 1
+    return built
+
+
+if __name__ == "__main__":
+    import sys
+    if "--migrate" in sys.argv:
+        for field, count in asyncio.run(migrate_inline_media()).items():
+            print(f"✅ {field}: moved {count} inline data URLs into the media store")
+    if "--thumbnails" in sys.argv:
+        print(f"✅ Built thumbnails for {backfill_thumbnails()} images")
@@ -0,0 +1,371 @@
+"""
+Fan-out-on-write job recommendations for disability users.
+
+When a job is posted, the Recommender finds the disability_users it matches
+(same profession or any shared skill, on the profession_key / skill_keys indexes)
+and pushes a card of the job onto each user's `recommendations` document, kept
+sorted by match_score and capped at RECS_PER_USER. Reading a user's
+recommendations is then one find_one on recommendations.user_email.
+
+Like the dispatcher, the stage follows a created_at/_id watermark in
+meta._id == "recommend", so posts are never lost while it lags or restarts; the
+job feed only wakes it up. Jobs are admitted once older than RECS_GRACE_SECONDS,
+so one whose insert commits late cannot fall behind the watermark, and only the
+process holding the "recommend_lease" in `meta` fans out. Backpressure:
+  - each job's users are streamed RECS_BATCH_SIZE at a time, one unordered
+    bulk_write per chunk, and the next chunk is read only after the write is acked;
+  - up to RECS_MAX_ACTIVE jobs take turns chunk by chunk, so a job matching a
+    huge share of users does not hold up the ones posted after it;
+  - before every chunk the stage waits while the connection pool is nearly
+    exhausted, leaving the connections to request traffic.
+Pushes are guarded with `jobs.job_id $ne`, so replaying a job after a restart
+writes nothing twice. Claimed and completed jobs are pulled from every list that
+holds them with one update_many on the jobs.job_id index.
+
+Run:
+    python recommend.py --rebuild                 # recompute every user's list
+    python recommend.py --rebuild --processes 4   # split users by _id across 4 processes
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from database import (
+    disability_users_col, disability_jobs_col, recommendations_col, meta_col, pool_monitor, POOL_OPTIONS, close_client,
+    duplicates_ignored, hold_lease,
+)
+from feed import job_feed
+from job_index import job_index, normalize, PROFESSION_WEIGHT
+
+RECS_PER_USER = int(os.getenv("RECS_PER_USER", "50"))
+BATCH_SIZE = int(os.getenv("RECS_BATCH_SIZE", "1000"))
+MAX_ACTIVE = int(os.getenv("RECS_MAX_ACTIVE", "8"))
+INTERVAL = float(os.getenv("RECS_INTERVAL", "5"))
+GRACE = timedelta(seconds=float(os.getenv("RECS_GRACE_SECONDS", "2")))
+LEASE_SECONDS = float(os.getenv("RECS_LEASE_SECONDS", "30"))
+POOL_HEADROOM = 0.8  # chunks wait while this share of the pool is checked out
+ENTRY_FIELDS = ("title", "company", "description", "required_skills", "pay", "profession", "job_type", "emoji",
+                "created_at")
+USER_FIELDS = {"user_email": 1, "profession_key": 1, "skill_keys": 1}
+STATE_ID = "recommend"
+LEASE_ID = "recommend_lease"
+
+
+def user_keys(profession: str, skills) -> dict:
+    """Normalized match keys stored on disability_users next to the raw fields."""
+    return {"profession_key": normalize(profession), "skill_keys": sorted({normalize(s) for s in skills if s})}
+
+
+def _entry(job: dict, score: int, shared: int) -> dict:
+    return {"job_id": job["_id"], "score": score, "shared": shared, **{k: job[k] for k in ENTRY_FIELDS if k in job}}
+
+
+def card(entry: dict) -> dict:
+    """Recommendation entry in the same shape as a /disability/jobs item."""
+    job = {k: entry[k] for k in ENTRY_FIELDS if k in entry}
+    job["id"] = str(entry["job_id"])
+    job["skill_match_count"] = entry["shared"]
+    job["is_profession_match"] = entry["score"] - entry["shared"] == PROFESSION_WEIGHT
+    job["match_score"] = entry["score"]
+    return job
+
+
+def _push(email: str, entry: dict, now: datetime) -> UpdateOne:
+    return UpdateOne(
+        {"user_email": email, "jobs.job_id": {"$ne": entry["job_id"]}},
+        {
+            "$push": {"jobs": {"$each": [entry], "$sort": {"score": -1, "created_at": -1}, "$slice": RECS_PER_USER}},
+            "$set": {"updated_at": now},
+        },
+        upsert=True,
+    )
+
+
+async def _bulk(col, ops: list):
+    # A user who already holds the job fails the $ne guard and the upsert hits the unique index
+    with duplicates_ignored():
+        await col.bulk_write(ops, ordered=False)
+
+
+# ── Whole-list recompute (registration, rebuild) ───────────────────────────────
+async def _ranked_entries(users: list) -> dict:
+    """email -> full recommendation list from the job index, with one card read for the whole batch."""
+    ranked = {u["user_email"]: job_index.top(u.get("profession", ""), u.get("skills", []), limit=RECS_PER_USER)
+              for u in users}
+    ids = list({job_id for page in ranked.values() for job_id, _, _ in page})
+    fields = {f: 1 for f in ENTRY_FIELDS}
+    jobs = {j["_id"]: j async for j in disability_jobs_col.find({"_id": {"$in": ids}}, fields)}
+    return {
+        email: [_entry(jobs[job_id], score, shared) for job_id, score, shared in page if score and job_id in jobs]
+        for email, page in ranked.items()
+    }
+
+
+async def recommend_for(users: list):
+    """Replace the recommendation lists of these users from the job index."""
+    if not users:
+        return
+    if not job_index.loaded:
+        await job_index.load()
+    now = datetime.utcnow()
+    entries = await _ranked_entries(users)
+    await recommendations_col.bulk_write([
+        UpdateOne({"user_email": email}, {"$set": {"jobs": jobs, "updated_at": now}}, upsert=True)
+        for email, jobs in entries.items()
+    ], ordered=False)
+
+
+class Recommender:
+    def __init__(self, batch_size: int = BATCH_SIZE, max_active: int = MAX_ACTIVE, interval: float = INTERVAL):
+        self.batch_size = batch_size
+        self.max_active = max_active
+        self.interval = interval
+        self._wake = asyncio.Event()
+        self._task = None
+        self._active = {}        # job_id -> (job doc, cursor over its matching users)
+        self._admitted = deque()  # (created_at, job_id) in posting order, oldest unfinished first
+        self._done = set()       # admitted job ids whose fan-out finished
+        self._last = None        # newest admitted (created_at, job_id)
+        self._pull = set()       # job ids to drop from every list
+        # metrics
+        self.fanned_out = 0
+        self.pushes = 0
+        self.pulls = 0
+        self.throttled = 0
+
+    # ── Feed hook ──────────────────────────────────────────────────────────────
+    def on_event(self, kind: str, doc: dict):
+        if kind != "created":
+            self._pull.add(doc["_id"])
+        self._wake.set()
+
+    # ── Fan-out ────────────────────────────────────────────────────────────────
+    def _users(self, job: dict):
+        profession = normalize(job.get("profession", ""))
+        skills = [normalize(s) for s in job.get("required_skills", []) if s]
+        clauses = ([{"profession_key": profession}] if profession else []) + (
+            [{"skill_keys": {"$in": skills}}] if skills else [])
+        if not clauses:
+            return None
+        return disability_users_col.find({"$or": clauses}, USER_FIELDS).batch_size(self.batch_size)
+
+    async def _load_watermark(self):
+        state = await meta_col.find_one({"_id": STATE_ID})
+        if state is None:
+            # First run: existing jobs reach users through --rebuild or registration, not a replay.
+            # Only open jobs are ever admitted, so the newest open one is the watermark.
+            newest = await disability_jobs_col.find({"status": "open"}, {"created_at": 1}).sort(
+                [("created_at", -1), ("_id", -1)]).limit(1).to_list(1)
+            state = {"created_at": newest[0].get("created_at"), "job_id": newest[0]["_id"]} if newest else {}
+            await meta_col.update_one({"_id": STATE_ID}, {"$set": state}, upsert=True)
+        self._last = (state.get("created_at"), state.get("job_id"))
+
+    async def _admit(self) -> int:
+        """Open fan-outs for jobs posted after the newest admitted one, up to max_active; returns how many."""
+        if self._last is None:
+            await self._load_watermark()
+        room = self.max_active - len(self._active)
+        if room <= 0:
+            return 0
+        created_at, job_id = self._last
+        query = {"status": "open", "created_at": {"$lte": datetime.utcnow() - GRACE}}
+        if created_at:
+            query["$or"] = [{"created_at": {"$gt": created_at}}, {"created_at": created_at, "_id": {"$gt": job_id}}]
+        fields = {f: 1 for f in ENTRY_FIELDS}
+        admitted = 0
+        async for job in disability_jobs_col.find(query, fields).sort([("created_at", 1), ("_id", 1)]).limit(room):
+            admitted += 1
+            self._last = (job["created_at"], job["_id"])
+            self._admitted.append(self._last)
+            cursor = self._users(job)
+            if cursor is None:
+                self._done.add(job["_id"])
+            else:
+                self._active[job["_id"]] = (job, cursor)
+        return admitted
+
+    async def _yield_to_requests(self):
+        limit = POOL_HEADROOM * (POOL_OPTIONS["maxPoolSize"] or 100)
+        while pool_monitor.checked_out >= limit:
+            self.throttled += 1
+            await asyncio.sleep(0.05)
+
+    async def _chunk(self, job: dict, cursor) -> bool:
+        """Push the job to the next chunk of its users; False once they are exhausted."""
+        await self._yield_to_requests()
+        users = await cursor.to_list(self.batch_size)
+        if not users:
+            return False
+        profession = normalize(job.get("profession", ""))
+        skills = {normalize(s) for s in job.get("required_skills", []) if s}
+        now = datetime.utcnow()
+        ops = []
+        for u in users:
+            shared = len(skills.intersection(u.get("skill_keys", ())))
+            score = (PROFESSION_WEIGHT if profession and u.get("profession_key") == profession else 0) + shared
+            ops.append(_push(u["user_email"], _entry(job, score, shared), now))
+        await _bulk(recommendations_col, ops)
+        self.pushes += len(ops)
+        return True
+
+    async def _drop_pulled(self):
+        pulled, self._pull = self._pull, set()
+        for job_id in pulled:
+            active = self._active.pop(job_id, None)
+            if active:
+                await active[1].close()
+                self._done.add(job_id)
+        if pulled:
+            result = await recommendations_col.update_many(
+                {"jobs.job_id": {"$in": list(pulled)}}, {"$pull": {"jobs": {"job_id": {"$in": list(pulled)}}}},
+            )
+            self.pulls += result.modified_count
+
+    async def _checkpoint(self):
+        """Advance the watermark past every admitted job whose fan-out has finished, in order."""
+        last = None
+        while self._admitted and self._admitted[0][1] in self._done:
+            last = self._admitted.popleft()
+            self._done.discard(last[1])
+        if last:
+            await meta_col.update_one(
+                {"_id": STATE_ID}, {"$set": {"created_at": last[0], "job_id": last[1]}}, upsert=True,
+            )
+
+    async def run_once(self) -> int:
+        """Admit new jobs and give every active fan-out one chunk; returns 0 once there is nothing left to do."""
+        await self._drop_pulled()
+        admitted = await self._admit()
+        for job_id, (job, cursor) in list(self._active.items()):
+            if job_id not in self._active:
+                continue
+            if not await self._chunk(job, cursor):
+                del self._active[job_id]
+                self._done.add(job_id)
+                self.fanned_out += 1
+        await self._checkpoint()
+        return len(self._active) + admitted
+
+    # ── Loop ───────────────────────────────────────────────────────────────────
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while await hold_lease(LEASE_ID, LEASE_SECONDS):
+                    if not (await self.run_once() or self._pull):
+                        break
+                else:
+                    # Another process fans out; still pull the jobs claimed through this one
+                    await self._drop_pulled()
+                    for _, cursor in self._active.values():
+                        await cursor.close()
+                    self._reset()
+            except Exception as e:
+                print(f"⚠️  Recommendation fan-out failed: {e}")
+                self._reset()  # cursors may be dead
+
+    def _reset(self):
+        """Forget in-flight fan-outs; whoever runs next re-admits them from the watermark."""
+        self._active.clear()
+        self._admitted.clear()
+        self._done.clear()
+        self._last = None
+
+    async def start(self):
+        if self._task is None:
+            await self._load_watermark()  # before any request can post a job
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> dict:
+        oldest = self._admitted[0][0] if self._admitted else None
+        return {
+            "active": len(self._active),
+            "lag_s": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+            "fanned_out": self.fanned_out,
+            "pushes": self.pushes,
+            "pulls": self.pulls,
+            "throttled": self.throttled,
+        }
+
+
+recommender = Recommender()
+job_feed.listen("disability", recommender.on_event)
+
+
+# ── Rebuild ────────────────────────────────────────────────────────────────────
+async def rebuild_range(lo=None, hi=None, batch_size: int = 500) -> int:
+    """Recompute the lists of users with lo <= _id < hi; returns how many were written."""
+    await job_index.load()
+    query = {"_id": {k: v for k, v in (("$gte", lo), ("$lt", hi)) if v is not None}} if lo or hi else {}
+    written, batch = 0, []
+    cursor = disability_users_col.find(query, {"user_email": 1, "profession": 1, "skills": 1}).sort("_id", 1)
+    async for user in cursor:
+        batch.append(user)
+        if len(batch) == batch_size:
+            written += await _rebuild_batch(batch)
+            batch = []
+    return written + await _rebuild_batch(batch)
+
+
+async def _rebuild_batch(users: list) -> int:
+    if not users:
+        return 0
+    await recommend_for(users)
+    # Backfill the match keys of users registered before they existed
+    await disability_users_col.bulk_write([
+        UpdateOne({"_id": u["_id"]}, {"$set": user_keys(u.get("profession", ""), u.get("skills", []))})
+        for u in users
+    ], ordered=False)
+    return len(users)
+
+
+async def _boundaries(parts: int) -> list:
+    """_id ranges splitting disability_users into `parts` roughly equal slices."""
+    total = await disability_users_col.count_documents({})
+    cuts = []
+    for k in range(1, parts):
+        doc = await disability_users_col.find({}, {"_id": 1}).sort("_id", 1).skip(k * total // parts).limit(1).to_list(1)
+        if doc:
+            cuts.append(doc[0]["_id"])
+    edges = [None] + cuts + [None]
+    return list(zip(edges, edges[1:]))
+
+
+def _rebuild_process(lo, hi) -> int:
+    return asyncio.run(rebuild_range(lo, hi))
+
+
+def rebuild(processes: int = 1) -> int:
+    if processes <= 1:
+        return asyncio.run(rebuild_range())
+    ranges = asyncio.run(_boundaries(processes))
+    close_client()  # children open their own clients
+    with ProcessPoolExecutor(len(ranges), mp_context=multiprocessing.get_context("spawn")) as pool:
+        return sum(pool.map(_rebuild_process, *zip(*ranges)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="recompute every user's recommendations")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    if args.rebuild:
+        started = time.perf_counter()
+        count = rebuild(args.processes)
+        print(f"✅ Rebuilt recommendations for {count} users in {time.perf_counter() - started:.1f}s")
+    else:
+        parser.print_help()
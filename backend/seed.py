@@ -3,10 +3,13 @@ Seed MongoDB with rich organization data.
 Each org has org-specific roadmap steps with estimated fees and funding.
 Run: python seed.py
 """
+import asyncio
 from datetime import datetime
-from database import (
-    organizations_col, work_listings_col, disability_jobs_col, create_indexes
-)
+from database import organizations_col, work_listings_col, disability_jobs_col, curricula_col
+from indexes import create_indexes
+from catalog import bump_catalog_version
+from curriculum import import_curricula
+from geo import normalize_locality, point
 
 # ── Org roadmaps ───────────────────────────────────────────────────────────────
 ORGS = [
@@ -222,6 +225,20 @@ WORK_LISTINGS = [
     {"title": "Car Wash", "description": "Full exterior and interior cleaning of 3 cars.", "location": "JP Nagar, Bangalore", "pay": 450, "category": "Cleaning", "emoji": "🚗", "status": "open"},
 ]
 
+# Approximate area centres (lat, lng) so seeded listings show up in /daily/work?lat=&lng=
+AREA_COORDS = {
+    "koramangala": (12.9352, 77.6245),
+    "indiranagar": (12.9784, 77.6408),
+    "jayanagar": (12.9308, 77.5838),
+    "hsr layout": (12.9116, 77.6474),
+    "whitefield": (12.9698, 77.7500),
+    "mg road": (12.9756, 77.6050),
+    "sadashivanagar": (13.0068, 77.5813),
+    "btm layout": (12.9166, 77.6101),
+    "electronic city": (12.8452, 77.6602),
+    "jp nagar": (12.9063, 77.5857),
+}
+
 # ── Disability Jobs ────────────────────────────────────────────────────────────
 DISABILITY_JOBS = [
     {"title": "Remote Stitching Orders", "description": "Stitch garments from home. Designs sent digitally. Flexible hours.", "profession": "Tailor", "pay": 3000, "company": "FabricHub India", "job_type": "remote", "emoji": "🧵", "status": "open"},
@@ -237,31 +254,40 @@ DISABILITY_JOBS = [
 ]
 
 
-def seed():
-    create_indexes()
+async def seed():
+    await create_indexes()
 
-    if organizations_col.count_documents({}) == 0:
+    if await organizations_col.count_documents({}) == 0:
         for org in ORGS:
             org["created_at"] = datetime.utcnow()
-        organizations_col.insert_many(ORGS)
+        await organizations_col.insert_many(ORGS)
+        await bump_catalog_version()
         print(f"✅ Seeded {len(ORGS)} organizations with roadmaps")
 
-    if work_listings_col.count_documents({}) == 0:
+    if await work_listings_col.count_documents({}) == 0:
         for w in WORK_LISTINGS:
             w["created_at"] = datetime.utcnow()
             w["accepted_by"] = None
-        work_listings_col.insert_many(WORK_LISTINGS)
+            w["problem_type"] = w["category"]  # what /daily/work?problem_type= filters on
+            w["locality"] = normalize_locality(w["location"])
+            if w["locality"] in AREA_COORDS:
+                w["geo"] = point(*AREA_COORDS[w["locality"]])
+        await work_listings_col.insert_many(WORK_LISTINGS)
         print(f"✅ Seeded {len(WORK_LISTINGS)} work listings")
 
-    if disability_jobs_col.count_documents({}) == 0:
+    if await disability_jobs_col.count_documents({}) == 0:
         for j in DISABILITY_JOBS:
             j["created_at"] = datetime.utcnow()
             j["accepted_by"] = None
-        disability_jobs_col.insert_many(DISABILITY_JOBS)
+        await disability_jobs_col.insert_many(DISABILITY_JOBS)
         print(f"✅ Seeded {len(DISABILITY_JOBS)} disability jobs")
 
+    if await curricula_col.count_documents({}) == 0:
+        imported = await import_curricula()
+        print(f"✅ Seeded {len(imported)} field curricula")
+
     print("🌱 MongoDB seeded successfully!")
 
 
 if __name__ == "__main__":
-    seed()
+    asyncio.run(seed())
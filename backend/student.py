@@ -1,10 +1,18 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import asyncio
+import calendar
+from collections import Counter
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-from database import students_col, organizations_col, ledger_col
-from curriculum import get_curriculum
+from pymongo import ReturnDocument, UpdateOne
+from database import quiz_attempts_col, students_col, upsert_one
+from fieldset import FIELDS_QUERY, Fieldset
+from catalog import catalog
+from ledger import record_entry
+from curriculum import curricula, grade
 
 router = APIRouter(prefix="/student", tags=["student"])
 
@@ -30,10 +38,40 @@ class QuizSubmitRequest(BaseModel):
     task_submission: str = ""   # text/link submitted for the practical task
 
 
+MAX_BATCH_SUBMISSIONS = 100_000
+PASS_PCT = 60
+
+
+class AnswerSheet(BaseModel):
+    user_email: str
+    answers: List[int]
+    task_submission: str = ""
+
+
+class BatchGradeRequest(BaseModel):
+    field: str
+    month: int
+    submissions: List[AnswerSheet] = Field(..., max_length=MAX_BATCH_SUBMISSIONS)
+
+
 class RepaymentRequest(BaseModel):
     user_email: str
 
 
+class PlacementRequest(BaseModel):
+    user_email: str
+    salary: Optional[int] = None  # monthly; keeps the stored salary when omitted
+
+
+# /me returns the journey; the identity document, repayment figures and quiz history are opt-in
+STUDENT_FIELDS = Fieldset(
+    default=("user_email", "name", "age", "field_of_interest", "selected_org", "completed_steps",
+             "total_funding_received", "progress_pct", "job_placed", "created_at"),
+    opt_in=("document_id", "quiz_results", "salary", "repayment_paid", "months_repaid", "repayment_schedule",
+            "funding_breakdown", "placed_at"),
+)
+
+
 def _serialize(doc):
     if doc and "_id" in doc:
         doc["id"] = str(doc.pop("_id"))
@@ -41,13 +79,9 @@ def _serialize(doc):
 
 
 @router.post("/register")
-def register_student(req: StudentRegisterRequest):
-    existing = students_col.find_one({"user_email": req.user_email})
-    if existing:
-        return {"message": "Existing student found", **_serialize(existing)}
-
+async def register_student(req: StudentRegisterRequest):
     doc = {
-        "user_email": req.user_email,
+        "_id": ObjectId(),
         "name": req.name,
         "age": req.age,
         "document_id": req.document_id,
@@ -59,77 +93,72 @@ def register_student(req: StudentRegisterRequest):
         "salary": 50000,
         "repayment_paid": 0,       # total repaid so far
         "months_repaid": 0,        # how many months of repayment done
-        "quiz_results": {},        # month -> {score, passed, task_submitted}
+        "quiz_results": {},        # month_N -> latest attempt's summary; history is in quiz_attempts
+        "funding_breakdown": [],
+        "repayment_schedule": _repayment_schedule(50000, 0, 0),
         "created_at": datetime.utcnow(),
     }
-    result = students_col.insert_one(doc)
-    doc["id"] = str(result.inserted_id)
-    doc.pop("_id", None)
-    return {"message": "Student registered", **doc}
+    # Insert-if-absent in one round trip; BEFORE is None only when this call created it.
+    existing = await upsert_one(students_col, {"user_email": req.user_email}, {"$setOnInsert": doc},
+                                return_document=ReturnDocument.BEFORE)
+    if existing:
+        return {"message": "Existing student found", **_serialize(existing)}
+    return {"message": "Student registered", **_serialize({"user_email": req.user_email, **doc})}
 
 
 @router.get("/me/{user_email}")
-def get_student(user_email: str):
-    student = students_col.find_one({"user_email": user_email})
+async def get_student(user_email: str, fields: str = FIELDS_QUERY):
+    projection = STUDENT_FIELDS.projection(STUDENT_FIELDS.select(fields))
+    student = await students_col.find_one({"user_email": user_email}, projection)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return _serialize(student)
 
 
 @router.get("/organizations")
-def get_organizations(field: str = ""):
-    query = {"field": field} if field else {}
-    orgs = list(organizations_col.find(query, {"roadmap": 0}))
-    for org in orgs:
-        org["id"] = str(org.pop("_id"))
-    return orgs
+async def get_organizations(field: str = ""):
+    return await catalog.organizations(field)
 
 
 @router.get("/pipeline/{org_name}")
-def get_pipeline(org_name: str):
-    org = organizations_col.find_one({"name": org_name})
+async def get_pipeline(org_name: str):
+    org = await catalog.org(org_name)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    org["id"] = str(org.pop("_id"))
     return org
 
 
 @router.post("/select-org")
-def select_org(user_email: str, org_name: str):
-    org = organizations_col.find_one({"name": org_name})
-    if not org:
+async def select_org(user_email: str, org_name: str):
+    if not await catalog.org(org_name):
         raise HTTPException(status_code=404, detail="Org not found")
-    students_col.update_one(
-        {"user_email": user_email},
-        {"$set": {"selected_org": org_name, "completed_steps": [], "total_funding_received": 0}}
-    )
+    await _update_finances(user_email, lambda student: {
+        "selected_org": org_name, "completed_steps": [], "total_funding_received": 0, "funding_breakdown": [],
+    })
     return {"message": f"Joined {org_name}", "org": org_name}
 
 
 @router.post("/progress")
-def update_progress(req: ProgressUpdateRequest):
-    org = organizations_col.find_one({"name": req.org_name})
-    if not org:
+async def update_progress(req: ProgressUpdateRequest):
+    if not await catalog.org(req.org_name):
         raise HTTPException(status_code=404, detail="Org not found")
+    steps = await catalog.roadmap_steps(req.org_name)
 
     # Org funds 100% — student pays nothing. Calculate total funding from completed steps.
-    total_funding = 0
-    for step in org.get("roadmap", []):
-        if step["step"] in req.completed_steps:
-            # All fees funded by org — student cost = 0
-            total_funding += step.get("estimated_fee", 0)
+    # All fees funded by org — student cost = 0
+    breakdown = _funding_breakdown(steps, set(req.completed_steps))
+    total_funding = sum(item["org_funded"] for item in breakdown)
 
-    total_steps = len(org.get("roadmap", []))
+    total_steps = len(steps)
     pct = round(len(req.completed_steps) / total_steps * 100) if total_steps else 0
 
-    students_col.update_one(
-        {"user_email": req.user_email},
-        {"$set": {
-            "completed_steps": req.completed_steps,
-            "total_funding_received": total_funding,
-            "progress_pct": pct,
-        }}
-    )
+    # The breakdown and repayment schedule are stored here so /job-status is a plain read
+    await _update_finances(req.user_email, lambda student: {
+        "completed_steps": req.completed_steps,
+        "total_funding_received": total_funding,
+        "progress_pct": pct,
+        "funding_breakdown": breakdown,
+    })
     return {
         "completed_steps": req.completed_steps,
         "total_funding_received": total_funding,
@@ -141,160 +170,302 @@ def update_progress(req: ProgressUpdateRequest):
 # ── Quiz & Task Endpoints ──────────────────────────────────────────────────────
 
 @router.get("/curriculum/{field}")
-def get_curriculum_for_field(field: str):
-    """Return monthly quiz + task curriculum for a given field."""
-    curriculum = get_curriculum(field)
-    # Strip correct answers before sending to frontend
-    safe = []
-    for month_data in curriculum:
-        quiz_safe = [{"q": q["q"], "options": q["options"]} for q in month_data["quiz"]]
-        safe.append({
-            "month": month_data["month"],
-            "topic": month_data["topic"],
-            "quiz": quiz_safe,
-            "task": month_data["task"],
-        })
-    return safe
+async def get_curriculum_for_field(field: str, request: Request):
+    """Return monthly quiz + task curriculum for a given field, answers stripped (prebuilt bytes)."""
+    payload = await curricula.get(field)
+    headers = {"ETag": f'"{payload.etag}"', "Cache-Control": "no-cache"}  # revalidate; unchanged content is a 304
+    if request.headers.get("if-none-match", "").strip('W/"') == payload.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(payload.body, media_type="application/json", headers=headers)
+
+
+def _pct(score: int, total_q: int) -> int:
+    return round(score / total_q * 100)
+
+
+def _quiz_result(month: int, topic: str, score: int, total_q: int, task_submission: str, submitted_at: str) -> dict:
+    """One graded attempt, as stored in quiz_attempts (with submitted_at as a datetime there)."""
+    pct_score = _pct(score, total_q)
+    return {
+        "month": month,
+        "topic": topic,
+        "score": score,
+        "total": total_q,
+        "pct_score": pct_score,
+        "passed": pct_score >= PASS_PCT,
+        "task_submitted": bool(task_submission),
+        "task_submission": task_submission,
+        "submitted_at": submitted_at,
+    }
+
+
+def _attempt_doc(user_email: str, result: dict, submitted_at: datetime) -> dict:
+    return {"user_email": user_email, **result, "submitted_at": submitted_at}
+
+
+SUMMARY_FIELDS = ("month", "topic", "score", "total", "pct_score", "passed", "task_submitted", "submitted_at")
+
+
+def _summary_update(result: dict, attempts: int = 1) -> dict:
+    """Point quiz_results.month_N at the latest attempt and count it; the task text stays in quiz_attempts."""
+    prefix = f"quiz_results.month_{result['month']}"
+    return {
+        "$set": {f"{prefix}.{k}": result[k] for k in SUMMARY_FIELDS},
+        "$inc": {f"{prefix}.attempts": attempts},
+        "$unset": {f"{prefix}.task_submission": ""},
+    }
 
 
 @router.post("/quiz/submit")
-def submit_quiz(req: QuizSubmitRequest):
+async def submit_quiz(req: QuizSubmitRequest):
     """Submit quiz answers and task for a given month. Returns score and pass/fail."""
-    student = students_col.find_one({"user_email": req.user_email})
+    student = await students_col.find_one({"user_email": req.user_email}, {"field_of_interest": 1})
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
     field = student.get("field_of_interest", "Software Developer")
-    curriculum = get_curriculum(field)
-
-    # Find the month
-    month_data = next((m for m in curriculum if m["month"] == req.month), None)
-    if not month_data:
+    month_key = (await curricula.get(field)).months.get(req.month)
+    if not month_key:
         raise HTTPException(status_code=404, detail=f"Month {req.month} curriculum not found")
+    topic, correct_answers = month_key
 
     # Grade the quiz
-    correct_answers = [q["answer"] for q in month_data["quiz"]]
-    score = sum(1 for i, ans in enumerate(req.answers) if i < len(correct_answers) and ans == correct_answers[i])
+    score = grade(correct_answers, [req.answers])[0]
     total_q = len(correct_answers)
-    pct_score = round(score / total_q * 100)
-    passed = pct_score >= 60  # 60% to pass
+    now = datetime.utcnow()
+    result = _quiz_result(req.month, topic, score, total_q, req.task_submission, now.isoformat())
+    pct_score, passed = result["pct_score"], result["passed"]
 
-    result = {
-        "month": req.month,
-        "topic": month_data["topic"],
+    # Append the attempt, then move the student's summary to it
+    await quiz_attempts_col.insert_one(_attempt_doc(req.user_email, result, now))
+    await students_col.update_one({"user_email": req.user_email}, _summary_update(result))
+
+    return {
         "score": score,
         "total": total_q,
         "pct_score": pct_score,
         "passed": passed,
-        "task_submitted": bool(req.task_submission),
-        "task_submission": req.task_submission,
-        "submitted_at": datetime.utcnow().isoformat(),
+        "correct_answers": list(correct_answers),
+        "message": "✅ Passed! Great work." if passed else "❌ Failed. Score 60%+ to pass. Try again next month.",
     }
 
-    # Save result
-    students_col.update_one(
-        {"user_email": req.user_email},
-        {"$set": {f"quiz_results.month_{req.month}": result}}
-    )
 
+@router.post("/quiz/grade-batch")
+async def grade_quiz_batch(req: BatchGradeRequest):
+    """Grade a cohort's answer sheets for one field and month.
+
+    Every sheet of a registered student is appended to quiz_attempts with one
+    insert_many; the summaries are updated with one bulk_write, where a student's
+    last sheet in the batch wins.
+    """
+    month_key = (await curricula.get(req.field)).months.get(req.month)
+    if not month_key:
+        raise HTTPException(status_code=404, detail=f"Month {req.month} curriculum not found")
+    topic, correct_answers = month_key
+    total_q = len(correct_answers)
+
+    scores = grade(correct_answers, [s.answers for s in req.submissions])
+    now = datetime.utcnow()
+    submitted_at = now.isoformat()
+    counts = Counter(s.user_email for s in req.submissions)
+    known = {
+        d["user_email"]
+        async for d in students_col.find({"user_email": {"$in": list(counts)}}, {"_id": 0, "user_email": 1})
+    }
+
+    results = {}  # email -> its last result in the batch
+    attempts = []
+    for i, s in enumerate(req.submissions):
+        if s.user_email in known:
+            result = _quiz_result(req.month, topic, scores[i], total_q, s.task_submission, submitted_at)
+            attempts.append(_attempt_doc(s.user_email, result, now))
+            results[s.user_email] = result
+    if attempts:
+        await quiz_attempts_col.insert_many(attempts, ordered=False)
+        await students_col.bulk_write(
+            [UpdateOne({"user_email": email}, _summary_update(result, counts[email])) for email, result in results.items()],
+            ordered=False,
+        )
+
+    passing = sum(1 for score in scores if _pct(score, total_q) >= PASS_PCT)
     return {
-        "score": score,
+        "field": req.field,
+        "month": req.month,
         "total": total_q,
-        "pct_score": pct_score,
-        "passed": passed,
-        "correct_answers": correct_answers,
-        "message": "✅ Passed! Great work." if passed else "❌ Failed. Score 60%+ to pass. Try again next month.",
+        "graded": len(scores),
+        "passed": passing,
+        "stored": len(results),  # students whose summary moved
+        "attempts": len(attempts),
+        "not_found": len(counts) - len(results),
+        "scores": list(scores),  # in submission order
     }
 
 
 @router.get("/quiz/results/{user_email}")
-def get_quiz_results(user_email: str):
-    student = students_col.find_one({"user_email": user_email})
+async def get_quiz_results(user_email: str):
+    """Latest attempt per month, keyed month_N."""
+    student = await students_col.find_one({"user_email": user_email}, {"_id": 0, "quiz_results": 1})
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student.get("quiz_results", {})
 
 
+@router.get("/quiz/attempts/{user_email}")
+async def get_quiz_attempts(user_email: str, month: Optional[int] = None, limit: int = Query(50, ge=1, le=200)):
+    """Attempt history with task submissions: by month, newest first within a month."""
+    if month is None:
+        query, sort = {"user_email": user_email}, [("month", 1), ("submitted_at", -1)]
+    else:
+        query, sort = {"user_email": user_email, "month": month}, [("submitted_at", -1)]
+    return [_serialize(doc) async for doc in quiz_attempts_col.find(query).sort(sort).limit(limit)]
+
+
 # ── Job Status & Repayment ────────────────────────────────────────────────────
+# Everything /job-status shows is written by the endpoints that change it:
+# update_progress (funding), repay_month (repaid total) and placement (salary).
+REPAYMENT_RATE = 0.10  # share of salary repaid each month
+SCHEDULE_INPUTS = {"salary": 50000, "total_funding_received": 0, "repayment_paid": 0}  # field -> default
+FINANCE_WRITE_ATTEMPTS = 3
+
+JOB_STATUS_FIELDS = {
+    "_id": 0, "name": 1, "selected_org": 1, "field_of_interest": 1, "salary": 1, "total_funding_received": 1,
+    "repayment_paid": 1, "months_repaid": 1, "funding_breakdown": 1, "repayment_schedule": 1,
+    "completed_steps": 1, "progress_pct": 1, "job_placed": 1, "placed_at": 1,
+}
+
+
+def _funding_breakdown(steps: dict, completed: set) -> list:
+    return [
+        {
+            "step": n,
+            "title": step["title"],
+            "org_funded": step["estimated_fee"],
+            "student_paid": 0,  # org funds 100%
+        }
+        for n, step in steps.items() if n in completed
+    ]
+
+
+def _add_months(day: datetime, months: int) -> datetime:
+    """Same day `months` later, clamped to the end of a shorter month (Jan 31 + 1 -> Feb 28/29)."""
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _repayment_schedule(salary, total_funding, repayment_paid, as_of: Optional[datetime] = None) -> dict:
+    """Monthly deduction, what is left, and when it is paid off if every month is paid from `as_of`."""
+    as_of = as_of or datetime.utcnow()
+    monthly = round(salary * REPAYMENT_RATE)
+    remaining = max(0, total_funding - repayment_paid)
+    months = -(-remaining // monthly) if remaining > 0 and monthly > 0 else 0  # the last payment may be partial
+    return {
+        "monthly_repayment": monthly,
+        "remaining_debt": remaining,
+        "months_remaining": months,
+        "net_this_month": salary - (monthly if remaining > 0 else 0),
+        "payoff_date": _add_months(as_of, months) if months else None,
+        "as_of": as_of,
+    }
+
+
+async def _update_finances(user_email: str, changes, fields: tuple = ()) -> tuple:
+    """Read the schedule inputs (and `fields`), $set `changes(student)` with the schedule recomputed.
+
+    The write is conditional on salary, funding and repaid total still being what
+    was read, so concurrent writers retry instead of storing a schedule that lags
+    the figures. `changes` returns None to skip the write. Returns (student, $set).
+    """
+    projection = {k: 1 for k in (*SCHEDULE_INPUTS, *fields)}
+    for _ in range(FINANCE_WRITE_ATTEMPTS):
+        student = await students_col.find_one({"user_email": user_email}, projection)
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+        update = changes(student)
+        if update is None:
+            return student, None
+        after = {k: update.get(k, student.get(k, default)) for k, default in SCHEDULE_INPUTS.items()}
+        update["repayment_schedule"] = _repayment_schedule(
+            after["salary"], after["total_funding_received"], after["repayment_paid"],
+        )
+        read = {k: student.get(k) for k in SCHEDULE_INPUTS}  # None also matches a missing field
+        if (await students_col.update_one({"user_email": user_email, **read}, {"$set": update})).matched_count:
+            return student, update
+    raise HTTPException(status_code=409, detail="Student record changed concurrently, please retry")
+
 
 @router.get("/job-status/{user_email}")
-def get_job_status(user_email: str):
-    student = students_col.find_one({"user_email": user_email})
+async def get_job_status(user_email: str):
+    """Placement and repayment view; one projected read, no writes."""
+    student = await students_col.find_one({"user_email": user_email}, JOB_STATUS_FIELDS)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    org_name = student.get("selected_org", "")
-    org = organizations_col.find_one({"name": org_name}) if org_name else None
-
     salary = student.get("salary", 50000)
     total_funding = student.get("total_funding_received", 0)
     repayment_paid = student.get("repayment_paid", 0)
-    months_repaid = student.get("months_repaid", 0)
-
-    # 10% of salary per month until fully repaid
-    monthly_repayment = round(salary * 0.10)
-    remaining_debt = max(0, total_funding - repayment_paid)
-    months_remaining = (remaining_debt // monthly_repayment + 1) if remaining_debt > 0 else 0
-    net_this_month = salary - (monthly_repayment if remaining_debt > 0 else 0)
-
-    # Build step-by-step funding breakdown
-    funding_breakdown = []
-    if org:
-        for step in org.get("roadmap", []):
-            if step["step"] in student.get("completed_steps", []):
-                funding_breakdown.append({
-                    "step": step["step"],
-                    "title": step["title"],
-                    "org_funded": step.get("estimated_fee", 0),
-                    "student_paid": 0,  # org funds 100%
-                })
-
-    students_col.update_one({"user_email": user_email}, {"$set": {"job_placed": True}})
+    # Students not backfilled yet (python student.py --backfill-schedules) get it computed, not stored
+    schedule = student.get("repayment_schedule") or _repayment_schedule(salary, total_funding, repayment_paid)
 
     return {
         "name": student.get("name", ""),
-        "org": org_name,
+        "org": student.get("selected_org", ""),
         "field": student.get("field_of_interest", ""),
         "salary": salary,
         "total_funding_received": total_funding,
         "repayment_paid": repayment_paid,
-        "remaining_debt": remaining_debt,
-        "monthly_repayment": monthly_repayment,   # 10% of salary
-        "months_repaid": months_repaid,
-        "months_remaining": months_remaining,
-        "net_this_month": net_this_month,
-        "funding_breakdown": funding_breakdown,
+        "remaining_debt": schedule["remaining_debt"],
+        "monthly_repayment": schedule["monthly_repayment"],   # 10% of salary
+        "months_repaid": student.get("months_repaid", 0),
+        "months_remaining": schedule["months_remaining"],
+        "net_this_month": schedule["net_this_month"],
+        "payoff_date": schedule["payoff_date"],
+        "funding_breakdown": student.get("funding_breakdown", []),
         "completed_steps": student.get("completed_steps", []),
         "progress_pct": student.get("progress_pct", 0),
+        "job_placed": student.get("job_placed", False),
+        "placed_at": student.get("placed_at"),
     }
 
 
-@router.post("/repay-month")
-def repay_month(req: RepaymentRequest):
-    """Record one month's repayment (10% of salary)."""
-    student = students_col.find_one({"user_email": req.user_email})
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
+@router.post("/placement")
+async def record_placement(req: PlacementRequest):
+    """Mark the student as placed (once); repayment starts from the placed salary."""
+    def place(student):
+        if student.get("job_placed"):
+            return None
+        update = {"job_placed": True, "placed_at": datetime.utcnow()}
+        if req.salary is not None:
+            update["salary"] = req.salary
+        return update
 
-    salary = student.get("salary", 50000)
-    monthly_repayment = round(salary * 0.10)
-    total_funding = student.get("total_funding_received", 0)
-    repayment_paid = student.get("repayment_paid", 0)
-    remaining = max(0, total_funding - repayment_paid)
+    student, update = await _update_finances(req.user_email, place, fields=("job_placed",))
+    if update is None:
+        raise HTTPException(status_code=409, detail="Student is already placed")
+    return {"message": "🎉 Placement recorded", "job_placed": True, **update["repayment_schedule"]}
 
-    if remaining <= 0:
-        return {"message": "Debt fully repaid! 🎉", "remaining_debt": 0}
 
-    actual_payment = min(monthly_repayment, remaining)
-    new_paid = repayment_paid + actual_payment
-    new_remaining = max(0, total_funding - new_paid)
+@router.post("/repay-month")
+async def repay_month(req: RepaymentRequest):
+    """Record one month's repayment (10% of salary)."""
+    def pay(student):
+        salary = student.get("salary", 50000)
+        remaining = max(0, student.get("total_funding_received", 0) - student.get("repayment_paid", 0))
+        if remaining <= 0:
+            return None
+        return {
+            "repayment_paid": student.get("repayment_paid", 0) + min(round(salary * REPAYMENT_RATE), remaining),
+            "months_repaid": student.get("months_repaid", 0) + 1,
+        }
+
+    student, update = await _update_finances(req.user_email, pay, fields=("months_repaid", "selected_org"))
+    if update is None:
+        return {"message": "Debt fully repaid! 🎉", "remaining_debt": 0}
 
-    students_col.update_one(
-        {"user_email": req.user_email},
-        {"$inc": {"repayment_paid": actual_payment, "months_repaid": 1}}
-    )
+    actual_payment = update["repayment_paid"] - student.get("repayment_paid", 0)
+    new_remaining = update["repayment_schedule"]["remaining_debt"]
 
-    ledger_col.insert_one({
+    await record_entry({
         "user_email": req.user_email,
         "type": "debit",
         "amount": actual_payment,
@@ -304,7 +475,90 @@ def repay_month(req: RepaymentRequest):
 
     return {
         "paid_this_month": actual_payment,
-        "total_paid": new_paid,
+        "total_paid": update["repayment_paid"],
         "remaining_debt": new_remaining,
+        "payoff_date": update["repayment_schedule"]["payoff_date"],
         "message": "✅ Payment recorded" if new_remaining > 0 else "🎉 Debt fully repaid!",
     }
+
+
+# ── Migration ──────────────────────────────────────────────────────────────────
+def _submitted_at(entry: dict, student_id) -> datetime:
+    try:
+        return datetime.fromisoformat(entry["submitted_at"])
+    except (KeyError, TypeError, ValueError):
+        return student_id.generation_time.replace(tzinfo=None)
+
+
+async def migrate_quiz_results(batch_size: int = 500) -> int:
+    """Copy embedded quiz_results into quiz_attempts and slim them to summaries; safe to re-run."""
+    attempt_ops, summary_ops, moved = [], [], 0
+
+    async def flush():
+        # Attempts first: a crash in between leaves summaries to redo, never lost history
+        if attempt_ops:
+            await quiz_attempts_col.bulk_write(attempt_ops, ordered=False)
+        if summary_ops:
+            await students_col.bulk_write(summary_ops, ordered=False)
+        attempt_ops.clear()
+        summary_ops.clear()
+
+    cursor = students_col.find({"quiz_results": {"$exists": True, "$ne": {}}}, {"user_email": 1, "quiz_results": 1})
+    async for student in cursor:
+        legacy = {k: v for k, v in (student.get("quiz_results") or {}).items()
+                  if isinstance(v, dict) and "attempts" not in v}
+        if not legacy:
+            continue
+        for key, entry in legacy.items():
+            month = entry.get("month") or int(key.rsplit("_", 1)[-1])
+            submitted_at = _submitted_at(entry, student["_id"])
+            attempt = {**entry, "month": month, "migrated": True}
+            attempt.pop("submitted_at", None)
+            attempt_ops.append(UpdateOne(
+                {"user_email": student["user_email"], "month": month, "submitted_at": submitted_at},
+                {"$setOnInsert": attempt}, upsert=True,
+            ))
+            moved += 1
+        summary_ops.append(UpdateOne({"_id": student["_id"]}, {
+            "$set": {f"quiz_results.{k}.attempts": 1 for k in legacy},
+            "$unset": {f"quiz_results.{k}.task_submission": "" for k in legacy},
+        }))
+        if len(attempt_ops) >= batch_size:
+            await flush()
+    await flush()
+    return moved
+
+
+async def backfill_schedules(batch_size: int = 500) -> int:
+    """Store funding_breakdown and repayment_schedule on students written before they existed."""
+    ops, count = [], 0
+    cursor = students_col.find(
+        {"repayment_schedule": {"$exists": False}},
+        {"selected_org": 1, "completed_steps": 1, **{k: 1 for k in SCHEDULE_INPUTS}},
+    )
+    async for student in cursor:
+        org = student.get("selected_org")
+        steps = await catalog.roadmap_steps(org) if org else {}
+        read = {k: student.get(k) for k in SCHEDULE_INPUTS}
+        figures = {k: student.get(k, default) for k, default in SCHEDULE_INPUTS.items()}
+        ops.append(UpdateOne({"_id": student["_id"], **read}, {"$set": {
+            "funding_breakdown": _funding_breakdown(steps, set(student.get("completed_steps", []))),
+            "repayment_schedule": _repayment_schedule(
+                figures["salary"], figures["total_funding_received"], figures["repayment_paid"],
+            ),
+        }}))
+        count += 1
+        if len(ops) >= batch_size:
+            await students_col.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await students_col.bulk_write(ops, ordered=False)
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+    if "--migrate-quiz-results" in sys.argv:
+        print(f"✅ Moved {asyncio.run(migrate_quiz_results())} embedded quiz results into quiz_attempts")
+    if "--backfill-schedules" in sys.argv:
+        print(f"✅ Stored repayment schedules for {asyncio.run(backfill_schedules())} students")
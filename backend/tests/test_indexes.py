@@ -0,0 +1,27 @@
+import asyncio
+import os
+
+import pytest
+
+import database
+from indexes import create_indexes, explain_shapes
+
+TEST_DB = os.getenv("MONGO_TEST_DB", "equibridge_test_indexes")
+
+
+def test_every_query_shape_uses_an_index(monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", TEST_DB)
+    monkeypatch.setitem(database.POOL_OPTIONS, "serverSelectionTimeoutMS", 1000)
+
+    async def run():
+        try:
+            if not await database.ping(log=False):
+                pytest.skip(f"no MongoDB reachable at {database.MONGO_URI}")
+            await database.get_client().drop_database(TEST_DB)
+            await create_indexes()
+            return await explain_shapes()
+        finally:
+            database.close_client()
+
+    scans = asyncio.run(run())
+    assert not scans, [(s["collection"], s["filter"], s.get("sort")) for s in scans]
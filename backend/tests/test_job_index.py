@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from job_index import PROFESSION_WEIGHT, JobIndex
+
+PROFESSIONS = ["tailor", "weaver", "potter", "clerk", ""]
+SKILLS = [f"skill {i}" for i in range(20)]
+
+
+def _brute_force(jobs: dict, profession: str, skills: set) -> list:
+    """Every open job scored the slow way: (job_id, match_score, shared), best then newest first."""
+    scored = []
+    for seq, (job_id, job_profession, job_skills) in jobs.items():
+        shared = len(job_skills & skills)
+        score = (PROFESSION_WEIGHT if profession and job_profession == profession else 0) + shared
+        scored.append((-score, -seq, (job_id, score, shared)))
+    return [item for *_, item in sorted(scored)]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_top_matches_brute_force_with_many_skills(seed):
+    rng = random.Random(seed)
+    index = JobIndex()
+    for job_id in range(rng.randint(50, 400)):
+        index.add(job_id, rng.choice(PROFESSIONS), rng.sample(SKILLS, rng.randint(0, 12)))
+    for job_id in rng.sample(range(50), 10):  # claimed or completed jobs leave the index
+        index.remove(job_id)
+
+    profession = rng.choice(PROFESSIONS)
+    skills = set(rng.sample(SKILLS, rng.randint(9, 20)))  # more than the old cap of 8
+    expected = _brute_force(index.jobs, profession, skills)
+
+    for offset, limit in ((0, 20), (20, 20), (0, len(expected) + 5), (rng.randint(0, 100), 7)):
+        assert index.top(profession, skills, offset=offset, limit=limit) == expected[offset:offset + limit]
+
+
+def test_top_normalizes_and_dedupes_query_skills():
+    index = JobIndex()
+    index.add("a", "Tailor", ["Stitching", "Embroidery"])
+    index.add("b", "Weaver", ["stitching"])
+    assert index.top("tailor", [" STITCHING", "stitching", "embroidery"]) == [("a", 12, 2), ("b", 1, 1)]
@@ -0,0 +1,39 @@
+import pytest
+from bson import ObjectId
+
+from daily_worker import _decode_cursor, _geo_page
+
+
+def _geo_near(rows: list, min_distance, seen: list, limit: int) -> list:
+    """What the $geoNear stage hands back: nearest first from min_distance, minus seen ids, limit + 1 rows."""
+    seen = set(seen)
+    batch = [r for r in rows if (min_distance is None or r["distance_m"] >= min_distance) and r["_id"] not in seen]
+    # Ties come back in no particular order; reverse them to make sure the cursor does not rely on it
+    batch.sort(key=lambda r: (r["distance_m"], -rows.index(r)))
+    return batch[:limit + 1]
+
+
+def _walk(rows: list, limit: int) -> list:
+    returned, cursor = [], None
+    for _ in range(len(rows) + 2):
+        min_distance, seen = _decode_cursor(cursor, geo=True) if cursor else (None, [])
+        page, cursor = _geo_page(_geo_near(rows, min_distance, seen, limit), limit, min_distance, seen)
+        returned += [r["_id"] for r in page]
+        if cursor is None:
+            return returned
+    pytest.fail("nearby pages never ran out")
+
+
+@pytest.mark.parametrize("limit", [1, 3, 5])
+def test_ties_spanning_many_pages_are_returned_once(limit):
+    rows = [{"_id": ObjectId(), "distance_m": 10.0} for _ in range(2)]
+    rows += [{"_id": ObjectId(), "distance_m": 250.0} for _ in range(3 * limit + 1)]  # > 2 × limit at one distance
+    rows += [{"_id": ObjectId(), "distance_m": 900.0} for _ in range(limit)]
+    returned = _walk(rows, limit)
+    assert sorted(returned) == sorted(r["_id"] for r in rows)
+
+
+def test_last_page_has_no_cursor():
+    rows = [{"_id": ObjectId(), "distance_m": float(d)} for d in range(4)]
+    page, cursor = _geo_page(_geo_near(rows, None, [], 4), 4, None, [])
+    assert cursor is None and len(page) == 4
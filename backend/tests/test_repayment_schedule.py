@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+
+from student import REPAYMENT_RATE, _add_months, _repayment_schedule
+
+
+@pytest.mark.parametrize("start, months, expected", [
+    (datetime(2025, 1, 31), 1, datetime(2025, 2, 28)),
+    (datetime(2024, 1, 31), 1, datetime(2024, 2, 29)),  # leap year
+    (datetime(2025, 3, 31), 1, datetime(2025, 4, 30)),
+    (datetime(2025, 1, 31), 2, datetime(2025, 3, 31)),  # clamps per target month, not once for all
+    (datetime(2025, 11, 30), 3, datetime(2026, 2, 28)),  # across a year end
+    (datetime(2025, 5, 15, 9, 30), 12, datetime(2026, 5, 15, 9, 30)),
+    (datetime(2025, 5, 15), 0, datetime(2025, 5, 15)),
+])
+def test_add_months_clamps_to_the_target_month(start, months, expected):
+    assert _add_months(start, months) == expected
+
+
+def test_schedule_rounds_the_last_partial_month_up():
+    as_of = datetime(2025, 1, 31)
+    schedule = _repayment_schedule(50000, 45000, 0, as_of=as_of)
+    assert schedule["monthly_repayment"] == 50000 * REPAYMENT_RATE == 5000
+    assert schedule["remaining_debt"] == 45000
+    assert schedule["months_remaining"] == 9
+    assert schedule["net_this_month"] == 45000
+    assert schedule["payoff_date"] == datetime(2025, 10, 31)
+    assert schedule["as_of"] == as_of
+
+    partial = _repayment_schedule(50000, 45500, 0, as_of=as_of)
+    assert partial["months_remaining"] == 10
+    assert partial["payoff_date"] == datetime(2025, 11, 30)
+
+
+def test_schedule_counts_what_is_already_repaid():
+    schedule = _repayment_schedule(50000, 45000, 40000, as_of=datetime(2024, 1, 31))
+    assert schedule["remaining_debt"] == 5000
+    assert schedule["months_remaining"] == 1
+    assert schedule["payoff_date"] == datetime(2024, 2, 29)
+
+
+@pytest.mark.parametrize("salary, funding, paid", [(50000, 45000, 45000), (50000, 45000, 50000), (0, 45000, 0)])
+def test_schedule_without_a_payoff(salary, funding, paid):
+    schedule = _repayment_schedule(salary, funding, paid, as_of=datetime(2025, 1, 31))
+    assert schedule["months_remaining"] == 0
+    assert schedule["payoff_date"] is None
+    assert schedule["remaining_debt"] == max(0, funding - paid)
+    if schedule["remaining_debt"] == 0:
+        assert schedule["net_this_month"] == salary
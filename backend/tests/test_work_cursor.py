@@ -0,0 +1,53 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+import daily_worker
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def _listings(rng: random.Random) -> list:
+    """Open listings with tied timestamps and pays, some missing pay and some predating created_at."""
+    base = datetime(2025, 1, 1)
+    docs = []
+    for _ in range(40):
+        doc = {"_id": ObjectId(), "title": "t", "status": "open"}
+        if rng.random() < 0.7:
+            doc["created_at"] = base + timedelta(minutes=rng.randint(0, 5))
+        if rng.random() < 0.8:
+            doc["pay"] = rng.choice([100, 200, 300])
+        docs.append(doc)
+    return docs
+
+
+def _walk(col, sort: str, limit: int) -> list:
+    async def run():
+        ids, cursor = [], None
+        for _ in range(100):
+            page = await daily_worker.get_work(
+                limit=limit, cursor=cursor, problem_type="", location="", min_pay=None, sort=sort,
+                lat=None, lng=None, radius_km=daily_worker.DEFAULT_RADIUS_KM,
+            )
+            ids += [job["id"] for job in page["jobs"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+        pytest.fail("work pages never ran out")
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("sort", ["newest", "pay"])
+@pytest.mark.parametrize("seed", range(5))
+def test_pages_cover_listings_without_created_at(monkeypatch, sort, seed):
+    col = mongomock_motor.AsyncMongoMockClient()["test"]["work_listings"]
+    docs = _listings(random.Random(seed))
+    asyncio.run(col.insert_many([dict(d) for d in docs]))
+    monkeypatch.setattr(daily_worker, "work_listings_col", col)
+
+    expected = asyncio.run(col.find({}, {"_id": 1}).sort(daily_worker.WORK_SORTS[sort]).to_list(None))
+    for limit in (1, 3, 7):
+        assert _walk(col, sort, limit) == [str(d["_id"]) for d in expected]
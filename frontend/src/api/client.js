@@ -5,4 +5,30 @@ const API = axios.create({
     headers: { 'Content-Type': 'application/json' },
 })
 
+// Upload a Blob/File (or a data: URL from a canvas capture) to the media store.
+// Returns the short media ID to send instead of the raw bytes.
+export async function uploadMedia(source, filename = 'upload') {
+    const blob = typeof source === 'string' ? await (await fetch(source)).blob() : source
+    const form = new FormData()
+    form.append('file', blob, source.name || filename)
+    const res = await API.post('/media', form, { headers: { 'Content-Type': 'multipart/form-data' } })
+    return res.data.id
+}
+
+// Media URLs come back as API-relative paths (/media/<id>).
+export function mediaUrl(url) {
+    return url && url.startsWith('/media/') ? `${API.defaults.baseURL}${url}` : url
+}
+
+// Server-sent job events (created / claimed / completed) for one channel.
+// Returns the EventSource; call .close() on unmount.
+export function subscribeJobs(channel, filters, handlers) {
+    const params = new URLSearchParams({ channel, ...filters })
+    const source = new EventSource(`${API.defaults.baseURL}/feed/stream?${params}`)
+    for (const [event, handler] of Object.entries(handlers)) {
+        source.addEventListener(event, e => handler(JSON.parse(e.data)))
+    }
+    return source
+}
+
 export default API
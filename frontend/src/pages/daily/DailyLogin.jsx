@@ -1,7 +1,7 @@
 import { useState, useRef, useCallback } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAuth } from '../../context/AuthContext'
-import API from '../../api/client'
+import API, { uploadMedia } from '../../api/client'
 import SegmentHeader from '../../components/SegmentHeader'
 
 export default function DailyLogin() {
@@ -10,6 +10,7 @@ export default function DailyLogin() {
 
     // Location state
     const [location, setLocation] = useState('')
+    const [coords, setCoords] = useState(null)
     const [geoLoading, setGeoLoading] = useState(false)
     const [geoError, setGeoError] = useState('')
 
@@ -45,6 +46,7 @@ export default function DailyLogin() {
         setGeoError('')
         navigator.geolocation.getCurrentPosition(
             async ({ coords: { latitude, longitude } }) => {
+                setCoords({ lat: latitude, lng: longitude })
                 try {
                     const res = await fetch(
                         `https://nominatim.openstreetmap.org/reverse?lat=${latitude}&lon=${longitude}&format=json`
@@ -139,12 +141,15 @@ export default function DailyLogin() {
         setLoading(true)
         try {
             const probType = problemType === 'Other' ? customProblem : problemType
+            // Upload the photo once and reference it by ID in both records
+            const photoId = photoPreview ? await uploadMedia(photoPreview, photoName || 'photo.jpg') : ''
             const res = await API.post('/daily/post-problem', {
                 user_email: user.email,
                 location,
                 problem_type: probType,
-                photo_url: photoPreview || '',
-                description: `Request for ${probType} at ${location}`
+                photo_id: photoId,
+                description: `Request for ${probType} at ${location}`,
+                ...coords,
             })
             // Also register/update worker profile simultaneously for convenience
             await API.post('/daily/register', {
@@ -152,9 +157,10 @@ export default function DailyLogin() {
                 name: user.email.split('@')[0],
                 location,
                 problem_type: probType,
-                photo_url: photoPreview || '',
+                photo_id: photoId,
+                ...coords,
             })
-            localStorage.setItem('equibridge_worker', JSON.stringify({ ...res.data, problem_id: res.data.id }))
+            localStorage.setItem('equibridge_worker', JSON.stringify({ ...res.data, ...coords, problem_id: res.data.id }))
             navigate('/daily/work')
         } catch (err) {
             console.error('Registration error:', err)
@@ -186,7 +192,7 @@ export default function DailyLogin() {
                             className="input-field"
                             placeholder="Type your area (e.g. Koramangala, Bangalore)"
                             value={location}
-                            onChange={e => { setLocation(e.target.value); setGeoError('') }}
+                            onChange={e => { setLocation(e.target.value); setCoords(null); setGeoError('') }}
                             style={{ flex: 1 }}
                         />
                         <button
@@ -1,7 +1,7 @@
 import { useEffect, useState, useRef, useCallback } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAuth } from '../../context/AuthContext'
-import API from '../../api/client'
+import API, { mediaUrl, subscribeJobs, uploadMedia } from '../../api/client'
 import SegmentHeader from '../../components/SegmentHeader'
 
 // ── Concentric Circle UI Component ───────────────────────────────────────────
@@ -53,7 +53,7 @@ const ConcentricCircles = ({ jobs, workers, onSelectJob }) => {
                         }}
                     >
                         {item.type === 'worker' && item.photo_url ? (
-                            <img src={item.photo_url} style={{ width: '100%', height: '100%', borderRadius: '50%', objectFit: 'cover' }} alt="worker" />
+                            <img src={mediaUrl(item.thumb_url || item.photo_url)} style={{ width: '100%', height: '100%', borderRadius: '50%', objectFit: 'cover' }} alt="worker" />
                         ) : (
                             item.emoji || '🛠'
                         )}
@@ -100,6 +100,7 @@ export default function NearbyWork() {
     const [completing, setCompleting] = useState(false)
     const [aiVerifying, setAiVerifying] = useState(false)
     const [videoPreview, setVideoPreview] = useState(null)
+    const [videoFile, setVideoFile] = useState(null)
     const [aiResult, setAiResult] = useState(null)
 
     // Camera refs
@@ -110,22 +111,45 @@ export default function NearbyWork() {
     useEffect(() => {
         if (!user?.email) return
         // Fetch nearby jobs and workers simultaneously
+        // With browser coordinates both lists come back nearest first; otherwise match by area name
+        const near = worker.lat != null && worker.lng != null
+            ? { lat: worker.lat, lng: worker.lng }
+            : { location: worker.location || '' }
         Promise.all([
-            API.get('/daily/work'),
-            API.get(`/daily/nearby?location=${encodeURIComponent(worker.location || '')}`)
+            API.get('/daily/work', { params: { limit: 20, ...(near.lat != null ? near : {}) } }),
+            API.get('/daily/nearby', { params: near })
         ]).then(([jobRes, workerRes]) => {
-            setJobs(jobRes.data || [])
+            setJobs(jobRes.data?.jobs || [])
             setWorkers(workerRes.data || [])
         }).catch(() => { }).finally(() => setLoading(false))
     }, [user])
 
+    // Live updates instead of re-fetching the list
+    useEffect(() => {
+        if (!user?.email) return
+        const drop = ({ id }) => setJobs(prev => prev.filter(j => j.id !== id))
+        const source = subscribeJobs('daily', worker.location ? { locality: worker.location } : {}, {
+            created: ({ job }) => setJobs(prev => [job, ...prev.filter(j => j.id !== job.id)]),
+            claimed: drop,
+            completed: drop,
+            resync: () => API.get('/daily/work', { params: { limit: 20 } }).then(res => setJobs(res.data?.jobs || [])),
+        })
+        return () => source.close()
+    }, [user])
+
 
     const handleAccept = async (job) => {
         if (!user?.email) return
         try {
             await API.post('/daily/accept', { user_email: user.email, job_id: job.id })
             setAccepted(job)
-        } catch {
+        } catch (err) {
+            if (err.response?.status === 409) {
+                // Another worker claimed it first
+                setJobs(prev => prev.filter(j => j.id !== job.id))
+                alert('Sorry, this job was just taken by another worker.')
+                return
+            }
             // Fallback for demo
             setAccepted(job)
         }
@@ -154,7 +178,9 @@ export default function NearbyWork() {
 
     const handleFileChange = (e) => {
         const file = e.target.files[0]
-        if (file) setVideoPreview(URL.createObjectURL(file))
+        if (!file) return
+        setVideoFile(file)
+        setVideoPreview(URL.createObjectURL(file))
     }
 
     const handleComplete = async () => {
@@ -168,11 +194,14 @@ export default function NearbyWork() {
 
             setCompleting(true)
             try {
+                // Upload the proof once; the job only keeps its media ID
+                const videoId = videoFile ? await uploadMedia(videoFile) : ''
                 await API.post('/daily/complete', {
                     user_email: user.email,
                     job_id: accepted.id,
                     ai_verified: true,
-                    completion_video_url: videoPreview
+                    completion_video_id: videoId,
+                    completion_video_url: videoId ? '' : videoPreview
                 })
             } catch { }
             setTimeout(() => navigate('/daily/revenue'), 2000)
@@ -207,7 +236,7 @@ export default function NearbyWork() {
                             <label style={{ display: 'block', marginBottom: 12, fontWeight: 700, fontSize: 15, color: '#f59e0b' }}>🖼️ Initial Problem State</label>
                             {accepted.photo_url ? (
                                 <img
-                                    src={accepted.photo_url}
+                                    src={mediaUrl(accepted.photo_url)}
                                     style={{ width: '100%', maxHeight: 200, objectFit: 'cover', borderRadius: 12, border: '2px solid rgba(245, 158, 11, 0.3)' }}
                                     alt="initial problem"
                                 />
@@ -227,7 +256,7 @@ export default function NearbyWork() {
                                     <div style={{ fontSize: 48, marginBottom: 8 }}>✅</div>
                                     <div style={{ fontWeight: 700, color: '#f59e0b' }}>Completion Video Ready</div>
                                     <div style={{ fontSize: 12, color: 'rgba(255,255,255,0.4)', marginTop: 4 }}>Proof captured for AI verification</div>
-                                    <button className="btn-outline" style={{ marginTop: 12, fontSize: 12, padding: '4px 10px' }} onClick={() => setVideoPreview(null)}>Change Proof</button>
+                                    <button className="btn-outline" style={{ marginTop: 12, fontSize: 12, padding: '4px 10px' }} onClick={() => { setVideoPreview(null); setVideoFile(null) }}>Change Proof</button>
                                 </div>
                             ) : (
                                 <div style={{ display: 'grid', gridTemplateColumns: '1fr 1fr', gap: 12 }}>
@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAuth } from '../../context/AuthContext'
-import API from '../../api/client'
+import API, { subscribeJobs } from '../../api/client'
 import SegmentHeader from '../../components/SegmentHeader'
 
 export default function VacancyConnect() {
@@ -11,14 +11,51 @@ export default function VacancyConnect() {
     const [jobs, setJobs] = useState([])
     const [loading, setLoading] = useState(true)
     const [accepted, setAccepted] = useState(null)
+    const [nextOffset, setNextOffset] = useState(null)
+    const [showingRecs, setShowingRecs] = useState(false)
 
-    useEffect(() => {
-        if (!user?.email) return
+    const loadJobs = (offset = 0) => {
         const profession = dUser.profession || ''
-        API.get(`/disability/jobs?user_email=${encodeURIComponent(user.email)}&profession=${encodeURIComponent(profession)}`)
-            .then(res => setJobs(res.data))
+        return API.get('/disability/jobs', { params: { user_email: user.email, profession, offset, limit: 20 } })
+            .then(res => {
+                setJobs(prev => {
+                    if (!offset && !showingRecs) return res.data.jobs
+                    const seen = new Set(prev.map(j => j.id))
+                    return [...prev, ...res.data.jobs.filter(j => !seen.has(j.id))]
+                })
+                setShowingRecs(false)
+                setNextOffset(res.data.next_offset)
+            })
             .catch(() => { })
-            .finally(() => setLoading(false))
+    }
+
+    // First paint comes from the precomputed recommendation list; the ranked feed backs "Show more"
+    const loadRecommendations = () =>
+        API.get(`/disability/recommendations/${encodeURIComponent(user.email)}`)
+            .then(res => {
+                if (!res.data.jobs.length) return loadJobs()
+                setJobs(res.data.jobs)
+                setShowingRecs(true)
+                setNextOffset(0)
+            })
+            .catch(() => loadJobs())
+
+    useEffect(() => {
+        if (!user?.email) return
+        loadRecommendations().finally(() => setLoading(false))
+    }, [user])
+
+    // Live updates: new openings are appended, taken ones disappear
+    useEffect(() => {
+        if (!user?.email) return
+        const drop = ({ id }) => setJobs(prev => prev.filter(j => j.id !== id))
+        const source = subscribeJobs('disability', {}, {
+            created: ({ job }) => setJobs(prev => [...prev.filter(j => j.id !== job.id), job]),
+            claimed: drop,
+            completed: drop,
+            resync: () => loadJobs(),
+        })
+        return () => source.close()
     }, [user])
 
     const handleAccept = async (job) => {
@@ -28,6 +65,11 @@ export default function VacancyConnect() {
             setAccepted({ ...job, message: res.data.message })
             setJobs(prev => prev.filter(j => j.id !== job.id))
         } catch (err) {
+            if (err.response?.status === 409) {
+                setJobs(prev => prev.filter(j => j.id !== job.id))
+                alert('Sorry, this job is no longer open.')
+                return
+            }
             setAccepted({ ...job, message: 'Job accepted! Complete it to get paid.' })
         }
     }
@@ -114,6 +156,11 @@ export default function VacancyConnect() {
                             </div>
                         </div>
                     ))}
+                    {nextOffset !== null && (
+                        <div style={{ gridColumn: '1/-1', textAlign: 'center' }}>
+                            <button className="btn-outline" onClick={() => loadJobs(nextOffset)}>Show more jobs</button>
+                        </div>
+                    )}
                     {jobs.length === 0 && !loading && (
                         <div style={{ gridColumn: '1/-1', textAlign: 'center', padding: 80 }} className="glass">
                             <div style={{ fontSize: 48, marginBottom: 16 }}>🔍</div>
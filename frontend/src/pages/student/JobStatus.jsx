@@ -10,6 +10,7 @@ export default function JobStatus() {
     const [loading, setLoading] = useState(true)
     const [paying, setPaying] = useState(false)
     const [payMsg, setPayMsg] = useState('')
+    const [placing, setPlacing] = useState(false)
 
     const fetchStatus = () => {
         if (!user?.email) { setLoading(false); return }
@@ -32,6 +33,17 @@ export default function JobStatus() {
         setPaying(false)
     }
 
+    const handlePlacement = async () => {
+        if (!user?.email) return
+        setPlacing(true)
+        try {
+            const res = await API.post('/student/placement', { user_email: user.email })
+            setPayMsg(res.data.message)
+            fetchStatus()
+        } catch { }
+        setPlacing(false)
+    }
+
     if (loading) return <div className="page-container" style={{ textAlign: 'center', paddingTop: 120, color: 'rgba(255,255,255,0.4)' }}>Loading...</div>
 
     const d = data || {
@@ -39,6 +51,7 @@ export default function JobStatus() {
         salary: 50000, total_funding_received: 0, repayment_paid: 0,
         remaining_debt: 0, monthly_repayment: 5000, months_repaid: 0,
         months_remaining: 0, net_this_month: 50000, funding_breakdown: [], progress_pct: 0,
+        payoff_date: null, job_placed: false,
     }
 
     const repaidPct = d.total_funding_received > 0
@@ -77,7 +90,7 @@ export default function JobStatus() {
                         <div>
                             <span style={{ color: 'rgba(255,255,255,0.6)' }}>Fund Repayment (10% of salary)</span>
                             <div style={{ fontSize: 12, color: 'rgba(255,255,255,0.35)', marginTop: 2 }}>
-                                {d.remaining_debt > 0 ? `₹${d.remaining_debt.toLocaleString()} remaining · ~${d.months_remaining} months left` : '✅ Fully repaid!'}
+                                {d.remaining_debt > 0 ? `₹${d.remaining_debt.toLocaleString()} remaining · ~${d.months_remaining} months left${d.payoff_date ? ` · paid off by ${new Date(d.payoff_date).toLocaleDateString(undefined, { month: 'short', year: 'numeric' })}` : ''}` : '✅ Fully repaid!'}
                             </div>
                         </div>
                         <span style={{ fontWeight: 700, fontSize: 18, color: d.remaining_debt > 0 ? '#f87171' : '#4ade80' }}>
@@ -151,7 +164,12 @@ export default function JobStatus() {
             )}
 
             <div style={{ display: 'flex', gap: 12 }}>
-                {d.remaining_debt > 0 && (
+                {data && !d.job_placed && (
+                    <button className="btn-primary" style={{ flex: 1, padding: 14, fontSize: 15 }} onClick={handlePlacement} disabled={placing}>
+                        {placing ? 'Recording...' : '💼 I Got Placed'}
+                    </button>
+                )}
+                {d.job_placed && d.remaining_debt > 0 && (
                     <button className="btn-primary" style={{ flex: 1, padding: 14, fontSize: 15 }} onClick={handleRepayMonth} disabled={paying}>
                         {paying ? 'Processing...' : `💳 Pay This Month (₹${d.monthly_repayment.toLocaleString()})`}
                     </button>
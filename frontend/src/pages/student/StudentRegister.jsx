@@ -19,7 +19,7 @@ export default function StudentRegister() {
     useEffect(() => {
         if (!user?.email) return
         setChecking(true)
-        API.get(`/student/me/${encodeURIComponent(user.email)}`)
+        API.get(`/student/me/${encodeURIComponent(user.email)}`, { params: { fields: 'name,age,document_id,field_of_interest' } })
             .then(res => {
                 setExisting(res.data)
                 setForm({